@@ -0,0 +1 @@
+"""Benchmark suite for the AI service - see bench/run.py."""
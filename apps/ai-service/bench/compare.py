@@ -0,0 +1,74 @@
+"""
+Compare two benchmark result files from bench/run.py
+
+    python -m bench.compare bench/baseline.json bench/results.json --threshold 10
+
+Prints throughput, p95 and CPU per request side by side with the change in
+percent. Exits with status 1 when any scenario's p95 or CPU per request grew,
+or its throughput dropped, by more than --threshold percent, so it can gate CI.
+"""
+
+import argparse
+import json
+import sys
+
+
+def change(old, new):
+    if old in (None, 0) or new is None:
+        return None
+    return (new - old) / old * 100
+
+
+def fmt(value, suffix=""):
+    return f"{value:.1f}{suffix}" if value is not None else "-"
+
+
+def compare(baseline, current, threshold):
+    """Rows of (scenario, metric, old, new, change %, regressed)."""
+    rows = []
+    for key, new in current["scenarios"].items():
+        old = baseline["scenarios"].get(key)
+        if old is None:
+            continue
+        # (metric, old, new, higher is better)
+        metrics = [
+            ("rps", old["throughputRps"], new["throughputRps"], True),
+            ("p95 ms", old["latencyMs"]["p95"], new["latencyMs"]["p95"], False),
+            ("cpu ms/req", old.get("cpuMsPerRequest"), new.get("cpuMsPerRequest"), False),
+        ]
+        for metric, before, after, higher_is_better in metrics:
+            delta = change(before, after)
+            regressed = delta is not None and (-delta if higher_is_better else delta) > threshold
+            rows.append((key, metric, before, after, delta, regressed))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Regression threshold in percent")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+
+    print(f"baseline {baseline['meta'].get('commit')} ({baseline['meta'].get('timestamp')})")
+    print(f"current  {current['meta'].get('commit')} ({current['meta'].get('timestamp')})")
+    print()
+    print(f"{'scenario':<34}{'metric':<12}{'baseline':>11}{'current':>11}{'change':>10}")
+    rows = compare(baseline, current, args.threshold)
+    for key, metric, before, after, delta, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{key:<34}{metric:<12}{fmt(before):>11}{fmt(after):>11}{fmt(delta, '%'):>10}{flag}")
+
+    regressions = sum(1 for row in rows if row[-1])
+    if regressions:
+        print(f"\n{regressions} regression(s) above {args.threshold:.0f}%")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
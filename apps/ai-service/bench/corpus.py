@@ -0,0 +1,171 @@
+"""
+Synthetic resume corpus for benchmarks
+
+Deterministic (seeded) resumes in every format /parse-resume accepts: text
+PDFs, scanned PDFs (page images only, so they go through OCR), DOCX, PNG and
+JPG. Documents are written to a directory with a manifest.json so runs can
+reuse the same corpus.
+
+    python -m bench.corpus --out bench/.corpus --count 20 --pages 2
+"""
+
+import argparse
+import io
+import json
+import os
+import random
+
+import fitz  # PyMuPDF
+from docx import Document
+
+KINDS = ("pdf_text", "pdf_scanned", "docx", "png", "jpg")
+
+# 10pt lines on a Letter page
+LINES_PER_PAGE = 55
+
+EXTENSIONS = {"pdf_text": "pdf", "pdf_scanned": "pdf", "docx": "docx", "png": "png", "jpg": "jpg"}
+
+FIRST_NAMES = ["Alex", "Priya", "Jordan", "Mei", "Samuel", "Fatima", "Lucas", "Aisha", "Noah", "Elena"]
+LAST_NAMES = ["Morgan", "Sharma", "Lee", "Chen", "Okafor", "Haddad", "Silva", "Khan", "Novak", "Rossi"]
+SKILLS = [
+    "Python", "Java", "TypeScript", "React", "Node.js", "PostgreSQL", "MongoDB", "Docker", "Kubernetes",
+    "AWS", "Terraform", "GraphQL", "FastAPI", "Django", "Spring Boot", "Redis", "Kafka", "Go", "Rust",
+    "Machine Learning", "TensorFlow", "PyTorch", "CI/CD", "Jenkins", "Git", "Linux", "Agile", "Scrum",
+]
+TITLES = ["Software Engineer", "Backend Developer", "Data Engineer", "Frontend Engineer", "DevOps Engineer"]
+COMPANIES = ["Acme Corp", "Globex", "Initech", "Umbrella Labs", "Stark Industries", "Wayne Systems"]
+DUTIES = [
+    "Designed and shipped REST APIs serving millions of requests per day",
+    "Migrated legacy services to containers and cut deployment time by half",
+    "Built data pipelines that feed the analytics warehouse",
+    "Mentored junior engineers and led code reviews",
+    "Improved p95 latency of the search service by 40 percent",
+    "Owned on-call rotation and incident postmortems",
+]
+
+
+def resume_text(rng: random.Random, pages: int = 1) -> str:
+    """Plain-text resume; roughly one PDF page of content per `pages`."""
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    skills = rng.sample(SKILLS, 8)
+    lines = [
+        f"{first} {last}",
+        f"{first.lower()}.{last.lower()}@example.com | +1 555 {rng.randint(100, 999)} {rng.randint(1000, 9999)}",
+        "",
+        "SUMMARY",
+        f"{rng.choice(TITLES)} with {rng.randint(2, 15)} years of experience in {', '.join(skills[:3])}.",
+        "",
+        "SKILLS",
+        ", ".join(skills),
+        "",
+        "EXPERIENCE",
+    ]
+    for _ in range(8 * pages):
+        lines.append(f"{rng.choice(TITLES)} - {rng.choice(COMPANIES)} ({rng.randint(2010, 2020)} - Present)")
+        lines.extend(f"- {duty}" for duty in rng.sample(DUTIES, 3))
+        lines.append("")
+    lines += ["EDUCATION", f"BSc Computer Science, State University, {rng.randint(2005, 2018)}"]
+    return "\n".join(lines)
+
+
+def text_pdf(text: str) -> bytes:
+    document = fitz.open()
+    lines = text.split("\n")
+    for start in range(0, len(lines), LINES_PER_PAGE):
+        page = document.new_page()
+        page.insert_text((50, 60), "\n".join(lines[start:start + LINES_PER_PAGE]), fontsize=10)
+    data = document.tobytes()
+    document.close()
+    return data
+
+
+def page_images(pdf_bytes: bytes, zoom: float = 2.0):
+    """Grayscale pixmaps of each page - what a scanner would produce."""
+    document = fitz.open(stream=pdf_bytes, filetype="pdf")
+    try:
+        return [page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=fitz.csGRAY) for page in document]
+    finally:
+        document.close()
+
+
+def scanned_pdf(text: str) -> bytes:
+    document = fitz.open()
+    for pixmap in page_images(text_pdf(text)):
+        page = document.new_page()
+        page.insert_image(page.rect, stream=pixmap.tobytes("png"))
+    data = document.tobytes()
+    document.close()
+    return data
+
+
+def docx_file(text: str) -> bytes:
+    document = Document()
+    for line in text.split("\n"):
+        document.add_paragraph(line)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def image_file(text: str, fmt: str) -> bytes:
+    # First page only - image resumes are single page
+    pixmap = page_images(text_pdf(text))[0]
+    return pixmap.tobytes("jpg", jpg_quality=85) if fmt == "jpg" else pixmap.tobytes("png")
+
+
+def render(kind: str, text: str) -> bytes:
+    if kind == "pdf_text":
+        return text_pdf(text)
+    if kind == "pdf_scanned":
+        return scanned_pdf(text)
+    if kind == "docx":
+        return docx_file(text)
+    return image_file(text, kind)
+
+
+def build_corpus(out_dir: str, count: int = 10, pages: int = 1, seed: int = 0, kinds=KINDS) -> dict:
+    """
+    Write `count` resumes per kind to out_dir and return the manifest
+    {"seed", "pages", "documents": [{"kind", "file", "bytes", "text"}]}.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    rng = random.Random(seed)
+    documents = []
+    for index in range(count):
+        text = resume_text(rng, pages)
+        for kind in kinds:
+            filename = f"resume_{index:04d}_{kind}.{EXTENSIONS[kind]}"
+            data = render(kind, text)
+            with open(os.path.join(out_dir, filename), "wb") as f:
+                f.write(data)
+            documents.append({"kind": kind, "file": filename, "bytes": len(data), "text": text})
+    manifest = {"seed": seed, "pages": pages, "count": count, "documents": documents}
+    with open(os.path.join(out_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def load_corpus(out_dir: str, count: int = 10, pages: int = 1, seed: int = 0) -> dict:
+    """Reuse the corpus in out_dir if it was built with the same settings, otherwise (re)build it."""
+    path = os.path.join(out_dir, "manifest.json")
+    if os.path.exists(path):
+        with open(path) as f:
+            manifest = json.load(f)
+        if (manifest.get("seed"), manifest.get("pages"), manifest.get("count")) == (seed, pages, count):
+            return manifest
+    return build_corpus(out_dir, count, pages, seed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic resume corpus")
+    parser.add_argument("--out", default=os.path.join(os.path.dirname(__file__), ".corpus"))
+    parser.add_argument("--count", type=int, default=10, help="Resumes per format")
+    parser.add_argument("--pages", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    manifest = build_corpus(args.out, args.count, args.pages, args.seed)
+    print(f"Wrote {len(manifest['documents'])} documents to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
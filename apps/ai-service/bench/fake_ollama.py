@@ -0,0 +1,215 @@
+"""
+Stand-in Ollama server for benchmarks
+
+Serves /api/chat (streaming and not), /api/embeddings, /api/embed and
+/api/tags with a configurable prompt latency, generation speed and failure
+rate, so the service can be load-tested without a model. Chat replies are
+one JSON object carrying the fields every endpoint expects (resume fields,
+JD sections, bias issues, match scores, ...), padded to --output-tokens;
+timing fields (eval_count, eval_duration, ...) mirror real Ollama.
+
+    python -m bench.fake_ollama --port 11555 --tokens-per-second 40 --failure-rate 0.02
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import time
+
+import numpy as np
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+# Characters per token, for sizing replies and reporting prompt_eval_count
+CHARS_PER_TOKEN = 4
+
+FILLER = (
+    "Experienced engineer who designs, builds and operates reliable services, mentors peers "
+    "and works closely with product and design to ship measurable improvements. "
+)
+
+
+class FakeOllamaConfig:
+    def __init__(self, latency=0.2, tokens_per_second=50.0, output_tokens=300, failure_rate=0.0,
+                 embed_latency=0.01, embed_dim=768, seed=0):
+        self.latency = latency                      # seconds before the first token (prompt processing)
+        self.tokens_per_second = tokens_per_second  # generation speed
+        self.output_tokens = output_tokens          # approximate tokens per chat reply
+        self.failure_rate = failure_rate            # fraction of calls answered with HTTP 500
+        self.embed_latency = embed_latency          # seconds per embedding call
+        self.embed_dim = embed_dim
+        self.seed = seed
+
+
+def chat_reply(output_tokens):
+    """One JSON object that satisfies every endpoint's parser, about output_tokens long."""
+    reply = {
+        "firstName": "Alex",
+        "lastName": "Morgan",
+        "email": "alex.morgan@example.com",
+        "phone": "+1 555 010 0199",
+        "summary": "",
+        "skills": ["Python", "FastAPI", "PostgreSQL", "Docker", "Kubernetes"],
+        "experience": [{"title": "Senior Engineer", "company": "Acme", "startDate": "2019", "endDate": "Present",
+                        "description": "Led the platform team."}],
+        "education": [{"degree": "BSc Computer Science", "institution": "State University", "year": "2015"}],
+        "description": "<p>We are hiring an engineer to build our core platform.</p>",
+        "requirements": "<ul><li>5+ years of Python</li><li>Experience with PostgreSQL</li></ul>",
+        "responsibilities": "<ul><li>Design APIs</li><li>Review code</li></ul>",
+        "issues": [{"term": "rockstar", "type": "Gender-coded (Masculine)", "suggestion": "high performer"}],
+        "suggestions": ["Use inclusive language", "Clarify the salary range", "List must-have skills first",
+                        "Mention remote options", "Shorten the introduction"],
+        "score": 78,
+        "matchedSkills": ["Python", "PostgreSQL"],
+        "missingSkills": ["Kubernetes"],
+        "optimizedText": "We are hiring an engineer to build our core platform.",
+        "changes": "Tightened wording and removed jargon.",
+        "keywords": ["python engineer", "backend developer", "fastapi"],
+    }
+    base = len(json.dumps(reply))
+    missing = max(0, output_tokens * CHARS_PER_TOKEN - base)
+    reply["summary"] = (FILLER * (missing // len(FILLER) + 1))[:missing]
+    return json.dumps(reply)
+
+
+def split_tokens(content):
+    return [content[i:i + CHARS_PER_TOKEN] for i in range(0, len(content), CHARS_PER_TOKEN)]
+
+
+def prompt_tokens(payload):
+    chars = sum(len(message.get("content", "")) for message in payload.get("messages", []))
+    return max(1, chars // CHARS_PER_TOKEN)
+
+
+def embedding_for(text, dim):
+    # Deterministic per text, so identical inputs get identical vectors
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+    vector = np.random.default_rng(seed).standard_normal(dim).astype(np.float32)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+def create_app(config: FakeOllamaConfig) -> Starlette:
+    rng = random.Random(config.seed)
+    content = chat_reply(config.output_tokens)
+    tokens = split_tokens(content)
+    stats = {"chat": 0, "embeddings": 0, "failures": 0}
+
+    def should_fail():
+        if config.failure_rate > 0 and rng.random() < config.failure_rate:
+            stats["failures"] += 1
+            return True
+        return False
+
+    def timing(payload, eval_count, eval_seconds):
+        return {
+            "model": payload.get("model", ""),
+            "done": True,
+            "prompt_eval_count": prompt_tokens(payload),
+            "prompt_eval_duration": int(config.latency * 1e9),
+            "eval_count": eval_count,
+            "eval_duration": int(eval_seconds * 1e9),
+            "total_duration": int((config.latency + eval_seconds) * 1e9),
+        }
+
+    async def chat(request: Request):
+        payload = await request.json()
+        stats["chat"] += 1
+        if should_fail():
+            return JSONResponse({"error": "injected failure"}, status_code=500)
+        per_token = 1.0 / config.tokens_per_second if config.tokens_per_second > 0 else 0.0
+
+        if not payload.get("stream", False):
+            eval_seconds = len(tokens) * per_token
+            await asyncio.sleep(config.latency + eval_seconds)
+            return JSONResponse({"message": {"role": "assistant", "content": content}, **timing(payload, len(tokens), eval_seconds)})
+
+        async def chunks():
+            await asyncio.sleep(config.latency)
+            started = time.perf_counter()
+            for token in tokens:
+                await asyncio.sleep(per_token)
+                yield json.dumps({"model": payload.get("model", ""), "message": {"role": "assistant", "content": token},
+                                  "done": False}) + "\n"
+            final = {"message": {"role": "assistant", "content": ""},
+                     **timing(payload, len(tokens), time.perf_counter() - started)}
+            yield json.dumps(final) + "\n"
+
+        return StreamingResponse(chunks(), media_type="application/x-ndjson")
+
+    async def embeddings(request: Request):
+        payload = await request.json()
+        stats["embeddings"] += 1
+        if should_fail():
+            return JSONResponse({"error": "injected failure"}, status_code=500)
+        await asyncio.sleep(config.embed_latency)
+        return JSONResponse({"embedding": embedding_for(payload.get("prompt", ""), config.embed_dim)})
+
+    async def embed(request: Request):
+        payload = await request.json()
+        stats["embeddings"] += 1
+        if should_fail():
+            return JSONResponse({"error": "injected failure"}, status_code=500)
+        inputs = payload.get("input", [])
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        await asyncio.sleep(config.embed_latency)
+        return JSONResponse({
+            "model": payload.get("model", ""),
+            "embeddings": [embedding_for(text, config.embed_dim) for text in inputs],
+            "prompt_eval_count": sum(len(text) for text in inputs) // CHARS_PER_TOKEN,
+        })
+
+    async def tags(request: Request):
+        return JSONResponse({"models": [{"name": "llama3.2"}, {"name": "nomic-embed-text"}]})
+
+    async def fake_stats(request: Request):
+        return JSONResponse(stats)
+
+    return Starlette(routes=[
+        Route("/api/chat", chat, methods=["POST"]),
+        Route("/api/embeddings", embeddings, methods=["POST"]),
+        Route("/api/embed", embed, methods=["POST"]),
+        Route("/api/tags", tags, methods=["GET"]),
+        Route("/_stats", fake_stats, methods=["GET"]),
+    ])
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    defaults = FakeOllamaConfig()
+    parser.add_argument("--latency", type=float, default=defaults.latency, help="Seconds before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=defaults.tokens_per_second)
+    parser.add_argument("--output-tokens", type=int, default=defaults.output_tokens, help="Approximate tokens per chat reply")
+    parser.add_argument("--failure-rate", type=float, default=defaults.failure_rate, help="Fraction of calls that return HTTP 500")
+    parser.add_argument("--embed-latency", type=float, default=defaults.embed_latency)
+    parser.add_argument("--embed-dim", type=int, default=defaults.embed_dim)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+
+
+def config_from_args(args) -> FakeOllamaConfig:
+    return FakeOllamaConfig(
+        latency=args.latency,
+        tokens_per_second=args.tokens_per_second,
+        output_tokens=args.output_tokens,
+        failure_rate=args.failure_rate,
+        embed_latency=args.embed_latency,
+        embed_dim=args.embed_dim,
+        seed=args.seed,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stand-in Ollama server for benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11555)
+    add_arguments(parser)
+    args = parser.parse_args()
+    uvicorn.run(create_app(config_from_args(args)), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,498 @@
+"""
+Benchmark runner
+
+Starts the stand-in Ollama server (bench/fake_ollama.py) and the AI service
+on local ports, builds or reuses the synthetic corpus (bench/corpus.py), then
+drives every endpoint at each requested concurrency and reports throughput,
+latency percentiles, time to first byte for streaming endpoints and CPU time
+per request (service process tree, Linux only). Results are written as JSON
+for bench/compare.py.
+
+Run from apps/ai-service:
+
+    python -m bench.run --requests 50 --concurrency 1,8 --output bench/results.json
+    python -m bench.run --scenarios parse_resume,match --tokens-per-second 30 --failure-rate 0.05
+    python -m bench.run --service-url http://localhost:8000 --service-pid 1234   # an already running service
+
+Request inputs are unique per request and cached endpoints are called with
+refresh=true, so results measure real work rather than cache hits (pass
+--allow-cache to measure the warm path instead).
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timezone
+
+import httpx
+import numpy as np
+
+from bench import fake_ollama
+from bench.corpus import KINDS, SKILLS, load_corpus
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+JOB_DESCRIPTION = (
+    "We are looking for a Senior Backend Engineer to design and build our hiring platform APIs. "
+    "Requirements: 5+ years of Python, FastAPI or Django, PostgreSQL, Redis, Docker and Kubernetes; "
+    "experience with AWS and CI/CD pipelines. You will mentor engineers, own services end to end "
+    "and work with product on the roadmap. We want a rockstar ninja who thrives under pressure."
+)
+
+
+class Scenario:
+    """
+    One benchmarked call. build(i) returns the httpx request arguments for
+    request number i: {"method", "url", "json" | "files" | "params", "headers"}.
+    setup(client), if given, is awaited once before the first measurement.
+    """
+
+    def __init__(self, name, build, stream=False, setup=None):
+        self.name = name
+        self.build = build
+        self.stream = stream
+        self.setup = setup
+        self.issued = 0  # request numbers already used, so each concurrency level gets fresh inputs
+
+
+def random_vectors(rng, count, dim):
+    vectors = rng.standard_normal((count, dim)).astype(np.float32)
+    return np.round(vectors / np.linalg.norm(vectors, axis=1, keepdims=True), 5)
+
+
+def vector_index_setup(tenant, count, dim, seed):
+    """Fill a tenant partition with random vectors and wait until its IVF lists are trained."""
+    filled = []
+
+    async def setup(client):
+        if filled:
+            return
+        filled.append(True)
+        rng = np.random.default_rng(seed)
+        batch = 1024
+        for start in range(0, count, batch):
+            vectors = random_vectors(rng, min(batch, count - start), dim)
+            items = [{"id": f"v{start + n}", "vector": vector.tolist(), "metadata": {"skills": [SKILLS[(start + n) % len(SKILLS)]]}}
+                     for n, vector in enumerate(vectors)]
+            response = await client.post(f"/vectors/{tenant}/upsert", json={"items": items})
+            response.raise_for_status()
+        for _ in range(600):
+            partition = (await client.get(f"/vectors/{tenant}")).json()
+            if not partition["training"]:
+                break
+            await asyncio.sleep(1.0)
+        print(f"Vector index: {count} vectors, {partition['lists']} lists", flush=True)
+    return setup
+
+
+def build_scenarios(corpus_dir, manifest, run_id, allow_cache, vector_count=50000, vector_dim=768):
+    documents = manifest["documents"]
+    texts = [d["text"] for d in documents if d["kind"] == "pdf_text"]
+    refresh = {} if allow_cache else {"refresh": "true"}
+
+    def unique(text, i):
+        # Distinct inputs per request so content-keyed caches and request coalescing don't kick in
+        return text if allow_cache else f"{text}\nRef {run_id}-{i}"
+
+    def resume(i):
+        return texts[i % len(texts)]
+
+    def upload(kind, stream=False):
+        files = [d for d in documents if d["kind"] == kind]
+        contents = {}
+        for document in files:
+            with open(os.path.join(corpus_dir, document["file"]), "rb") as f:
+                contents[document["file"]] = f.read()
+
+        def build(i):
+            document = files[i % len(files)]
+            params = dict(refresh)
+            if stream:
+                params["stream"] = "true"
+            return {
+                "method": "POST",
+                "url": "/parse-resume",
+                "params": params,
+                "files": {"file": (document["file"], contents[document["file"]])},
+            }
+        return build
+
+    def ingest(batch):
+        files = [d for d in documents if d["kind"] in ("pdf_text", "docx")]
+        contents = {}
+        for document in files:
+            with open(os.path.join(corpus_dir, document["file"]), "rb") as f:
+                contents[document["file"]] = f.read()
+
+        def build(i):
+            # Job creation only (upload + staging); parsing continues in the background
+            chosen = [files[(i * batch + n) % len(files)] for n in range(batch)]
+            return {
+                "method": "POST",
+                "url": "/ingest",
+                "files": [("files", (d["file"], contents[d["file"]])) for d in chosen],
+            }
+        return build
+
+    def post(url, body, params=None, headers=None):
+        return lambda i: {"method": "POST", "url": url, "json": body(i), "params": params or {},
+                          "headers": headers or {}}
+
+    def get(url):
+        return lambda i: {"method": "GET", "url": url}
+
+    def match(mode):
+        return post("/match", lambda i: {
+            "resumeText": unique(resume(i), i), "jobDescription": JOB_DESCRIPTION, "mode": mode,
+        })
+
+    def jd(i):
+        return {"title": unique(f"Backend Engineer {i}", i), "department": "Engineering",
+                "skills": ["Python", "PostgreSQL", "Docker"], "experience": "5+ years"}
+
+    tenant = f"bench-{run_id}"
+    fill_index = vector_index_setup(tenant, vector_count, vector_dim, 0)
+
+    scenarios = [
+        Scenario("health", get("/health")),
+        Scenario("embeddings", post("/embeddings", lambda i: {"text": unique(resume(i), i)})),
+        # A long multi-page resume, embedded whole as pooled chunks
+        Scenario("embeddings_chunked", post("/embeddings", lambda i: {
+            "text": " ".join(unique(resume(i + n), f"{i}.{n}") for n in range(8)), "chunking": True,
+        })),
+        Scenario("embeddings_batch", post("/embeddings/batch", lambda i: {
+            "texts": [unique(resume(i + n), f"{i}.{n}") for n in range(32)],
+        })),
+    ]
+    scenarios += [
+        Scenario(f"embeddings_batch_{dtype}", post("/embeddings/batch", lambda i, dtype=dtype: {
+            "texts": [unique(resume(i + n), f"{dtype}.{i}.{n}") for n in range(32)],
+        }, headers={"Accept": f"application/x-embedding-{dtype}"}))
+        for dtype in ("float32", "int8")
+    ]
+    scenarios += [Scenario(f"parse_resume_{kind}", upload(kind)) for kind in KINDS]
+    scenarios += [
+        Scenario("parse_resume_stream", upload("pdf_text", stream=True), stream=True),
+        Scenario("ingest_submit", ingest(10)),
+        Scenario("extract_skills", post("/extract-skills", lambda i: {"text": unique(resume(i), i)})),
+        Scenario("generate_jd", post("/generate-jd", jd, refresh)),
+        Scenario("generate_jd_stream", post("/generate-jd", jd, {**refresh, "stream": "true"}), stream=True),
+        Scenario("check_bias", post("/check-bias", lambda i: {"text": unique(JOB_DESCRIPTION, i)})),
+        Scenario("check_bias_lexicon", post("/check-bias", lambda i: {
+            "text": unique(JOB_DESCRIPTION, i), "useLlm": False,
+        })),
+        Scenario("match_fast", match("fast")),
+        Scenario("match_llm", match("llm")),
+        Scenario("match_hybrid", match("hybrid")),
+        Scenario("match_rank", post("/match/rank", lambda i: {
+            "jobDescription": unique(JOB_DESCRIPTION, i),
+            "resumes": [{"id": str(n), "text": unique(resume(n), f"{i}.{n}")} for n in range(200)],
+            "topK": 5,
+        })),
+        Scenario("optimize_jd", post("/optimize-jd", lambda i: {"text": unique(JOB_DESCRIPTION, i)}, refresh)),
+        Scenario("optimize_jd_stream", post("/optimize-jd", lambda i: {"text": unique(JOB_DESCRIPTION, i)},
+                                            {**refresh, "stream": "true"}), stream=True),
+        Scenario("suggest_seo", post("/suggest-seo", lambda i: {
+            "title": "Backend Engineer", "description": unique(JOB_DESCRIPTION, i),
+        }, refresh)),
+        Scenario("subject_lines", post("/generate-subject-lines", lambda i: {
+            "context": unique("interview invitation", i), "candidateName": "Alex", "jobTitle": "Backend Engineer",
+        }, refresh)),
+        Scenario("vector_upsert", post(f"/vectors/{tenant}-upsert/upsert", lambda i: {
+            "items": [{"id": f"{i}.{n}", "vector": vector.tolist()}
+                      for n, vector in enumerate(random_vectors(np.random.default_rng(i), 100, vector_dim))],
+        })),
+        Scenario("vector_search", post(f"/vectors/{tenant}/search", lambda i: {
+            "vector": random_vectors(np.random.default_rng(i), 1, vector_dim)[0].tolist(), "k": 20,
+        }), setup=fill_index),
+        Scenario("vector_search_filtered", post(f"/vectors/{tenant}/search", lambda i: {
+            "vector": random_vectors(np.random.default_rng(i), 1, vector_dim)[0].tolist(), "k": 20,
+            "filters": {"skills": ["Rust"]}, "excludeIds": [f"v{n}" for n in range(20)],
+        }), setup=fill_index),
+        Scenario("cache_stats", get("/cache/stats")),
+        Scenario("llm_queue", get("/llm/queue")),
+        Scenario("metrics", get("/metrics")),
+    ]
+    return scenarios
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    # Nearest-rank percentile
+    index = max(0, math.ceil(q / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def process_tree_cpu(pid):
+    """User + system CPU seconds of pid and its descendants (Linux /proc), or None."""
+    if pid is None or not os.path.isdir("/proc"):
+        return None
+    ticks = os.sysconf("SC_CLK_TCK")
+    children = {}
+    times = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # Fields after the parenthesised command name: state ppid ... utime(14) stime(15)
+        fields = stat[stat.rfind(")") + 2:].split()
+        children.setdefault(int(fields[1]), []).append(int(entry))
+        times[int(entry)] = (int(fields[11]) + int(fields[12])) / ticks
+    total, stack = 0.0, [pid]
+    while stack:
+        current = stack.pop()
+        total += times.get(current, 0.0)
+        stack.extend(children.get(current, []))
+    return total
+
+
+async def run_scenario(client, scenario, requests, concurrency, warmup, service_pid):
+    latencies, first_bytes, statuses, errors = [], [], {}, []
+    first_index = scenario.issued
+    scenario.issued += warmup + requests
+    next_index = iter(range(first_index + warmup, first_index + warmup + requests))
+
+    async def one(i, record=True):
+        kwargs = scenario.build(i)
+        started = time.perf_counter()
+        first = None
+        try:
+            if scenario.stream:
+                async with client.stream(**kwargs) as response:
+                    async for _ in response.aiter_bytes():
+                        if first is None:
+                            first = time.perf_counter() - started
+                status = response.status_code
+            else:
+                response = await client.request(**kwargs)
+                status = response.status_code
+        except Exception as e:
+            if record:
+                errors.append(type(e).__name__)
+            return
+        if record:
+            statuses[status] = statuses.get(status, 0) + 1
+            if status < 400:
+                latencies.append(time.perf_counter() - started)
+                if first is not None:
+                    first_bytes.append(first)
+
+    async def worker():
+        for i in next_index:
+            await one(i)
+
+    for i in range(first_index, first_index + warmup):
+        await one(i, record=False)
+
+    cpu_before = process_tree_cpu(service_pid)
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - started
+    cpu_after = process_tree_cpu(service_pid)
+
+    latencies.sort()
+    first_bytes.sort()
+    ms = lambda value: round(value * 1000, 2) if value is not None else None
+    ok = len(latencies)
+    result = {
+        "requests": requests,
+        "concurrency": concurrency,
+        "ok": ok,
+        "failed": requests - ok,
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+        "exceptions": {name: errors.count(name) for name in sorted(set(errors))},
+        "wallSeconds": round(wall, 3),
+        "throughputRps": round(ok / wall, 2) if wall > 0 else None,
+        "latencyMs": {
+            "mean": ms(sum(latencies) / ok) if ok else None,
+            "p50": ms(percentile(latencies, 50)),
+            "p95": ms(percentile(latencies, 95)),
+            "p99": ms(percentile(latencies, 99)),
+            "max": ms(latencies[-1]) if ok else None,
+        },
+        "cpuMsPerRequest": round((cpu_after - cpu_before) * 1000 / requests, 2)
+        if cpu_before is not None and cpu_after is not None else None,
+    }
+    if scenario.stream:
+        result["firstByteMs"] = {"p50": ms(percentile(first_bytes, 50)), "p95": ms(percentile(first_bytes, 95))}
+    return result
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def wait_ready(url, process, timeout=60.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            if process is not None and process.poll() is not None:
+                raise RuntimeError(f"{url} exited with code {process.returncode} during startup")
+            try:
+                if (await client.get(url, timeout=1.0)).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"{url} not ready after {timeout:.0f}s")
+
+
+def start_fake_ollama(args, port):
+    command = [
+        sys.executable, "-m", "bench.fake_ollama", "--port", str(port),
+        "--latency", str(args.latency), "--tokens-per-second", str(args.tokens_per_second),
+        "--output-tokens", str(args.output_tokens), "--failure-rate", str(args.failure_rate),
+        "--embed-latency", str(args.embed_latency), "--embed-dim", str(args.embed_dim), "--seed", str(args.seed),
+    ]
+    return subprocess.Popen(command, cwd=SERVICE_DIR)
+
+
+def start_service(args, port, ollama_url, state_dir):
+    env = {
+        **os.environ,
+        "OLLAMA_BASE_URL": ollama_url,
+        # Fresh ingestion and vector index directories - jobs and vectors from
+        # earlier runs would otherwise be loaded
+        "INGEST_DIR": os.path.join(state_dir, "ingest"),
+        "VECTOR_INDEX_DIR": os.path.join(state_dir, "vectors"),
+        # Memory-only caches so runs don't share state through redis or disk
+        "REDIS_URL": "",
+        "EMBED_CACHE_BACKEND": "memory",
+        "PARSE_CACHE_BACKEND": "memory",
+        "MATCH_CACHE_BACKEND": "memory",
+        "GENERATION_CACHE_BACKEND": "memory",
+    }
+    env.update(dict(item.split("=", 1) for item in args.service_env))
+    log = open(args.service_log, "w") if args.service_log else subprocess.DEVNULL
+    command = [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+               "--log-level", "warning"]
+    return subprocess.Popen(command, cwd=SERVICE_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=SERVICE_DIR, capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def print_table(results):
+    header = f"{'scenario':<28}{'c':>4}{'ok':>6}{'fail':>6}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'cpu/req':>9}"
+    print(header)
+    print("-" * len(header))
+    for key, result in results.items():
+        latency = result["latencyMs"]
+        cells = [result["throughputRps"], latency["p50"], latency["p95"], latency["p99"], result["cpuMsPerRequest"]]
+        formatted = "".join(f"{value:>9}" if value is not None else f"{'-':>9}" for value in cells)
+        print(f"{key.split('@')[0]:<28}{result['concurrency']:>4}{result['ok']:>6}{result['failed']:>6}{formatted}")
+    print("(latency and cpu/req in ms)")
+
+
+async def run(args):
+    corpus_dir = args.corpus
+    manifest = load_corpus(corpus_dir, args.corpus_size, args.pages, args.seed)
+    run_id = uuid.uuid4().hex[:8]
+    selected = [name.strip() for name in args.scenarios.split(",")] if args.scenarios else []
+    scenarios = [
+        scenario for scenario in build_scenarios(corpus_dir, manifest, run_id, args.allow_cache, args.vector_count)
+        if not selected or any(name in scenario.name for name in selected)
+    ]
+    levels = [int(level) for level in args.concurrency.split(",")]
+
+    processes = []
+    state_dir = tempfile.mkdtemp(prefix="bench-state-")
+    try:
+        if args.service_url:
+            base_url, service_pid = args.service_url.rstrip("/"), args.service_pid
+        else:
+            ollama_port, service_port = free_port(), free_port()
+            ollama_url = f"http://127.0.0.1:{ollama_port}"
+            processes.append(start_fake_ollama(args, ollama_port))
+            await wait_ready(f"{ollama_url}/api/tags", processes[-1])
+            processes.append(start_service(args, service_port, ollama_url, state_dir))
+            base_url, service_pid = f"http://127.0.0.1:{service_port}", processes[-1].pid
+            await wait_ready(f"{base_url}/health", processes[-1])
+
+        results = {}
+        limits = httpx.Limits(max_connections=max(levels), max_keepalive_connections=max(levels))
+        async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+            for scenario in scenarios:
+                if scenario.setup:
+                    await scenario.setup(client)
+                for level in levels:
+                    result = await run_scenario(client, scenario, args.requests, level, args.warmup, service_pid)
+                    results[f"{scenario.name}@c{level}"] = result
+                    print(f"{scenario.name} c={level}: {result['throughputRps']} rps, "
+                          f"p95 {result['latencyMs']['p95']} ms, {result['failed']} failed", flush=True)
+    finally:
+        for process in reversed(processes):
+            process.terminate()
+        for process in processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        shutil.rmtree(state_dir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpuCount": os.cpu_count(),
+            "config": {key: value for key, value in vars(args).items() if key != "output"},
+        },
+        "scenarios": results,
+    }
+    print()
+    print_table(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the AI service against a stand-in Ollama server")
+    parser.add_argument("--requests", type=int, default=20, help="Measured requests per scenario and concurrency")
+    parser.add_argument("--concurrency", default="1,4", help="Comma-separated concurrency levels")
+    parser.add_argument("--warmup", type=int, default=2, help="Unmeasured requests before each scenario")
+    parser.add_argument("--scenarios", default="", help="Comma-separated name filters (substring match)")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--allow-cache", action="store_true", help="Repeat identical inputs so caches can hit")
+    parser.add_argument("--output", help="Write machine-readable results (JSON) here")
+    parser.add_argument("--corpus", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), ".corpus"))
+    parser.add_argument("--corpus-size", type=int, default=10, help="Resumes per format")
+    parser.add_argument("--pages", type=int, default=1, help="Pages per resume")
+    parser.add_argument("--vector-count", type=int, default=50000, help="Vectors indexed for the vector_search scenarios")
+    parser.add_argument("--service-url", help="Benchmark a running service instead of starting one")
+    parser.add_argument("--service-pid", type=int, help="PID of --service-url's process, for CPU accounting")
+    parser.add_argument("--service-env", action="append", default=[], metavar="NAME=VALUE",
+                        help="Extra environment for the started service (repeatable)")
+    parser.add_argument("--service-log", help="Write the started service's output here")
+    fake_ollama.add_arguments(parser)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
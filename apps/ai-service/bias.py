@@ -0,0 +1,129 @@
+"""
+Bias lexicon
+
+Loads the biased / non-inclusive term lexicon (see data/bias_lexicon.json)
+once at startup and compiles every surface form - the term, its listed
+variants and, for entries marked "inflect", simple plural/verb forms - into a
+single PhraseMatcher. A text is scanned once regardless of lexicon size and
+every occurrence is reported with character offsets, so the editor can
+highlight spans without waiting for the LLM.
+
+Lexicon entries:
+    {"term": "ninja", "type": "Gender-coded (Masculine)", "suggestion": "specialist",
+     "inflect": true, "variants": ["ninja coder"]}
+"""
+
+import json
+import os
+from typing import Dict, List, NamedTuple, Optional
+
+from phrase_matcher import PhraseMatcher
+
+DEFAULT_LEXICON_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "bias_lexicon.json")
+
+# Used when the lexicon file is missing or unreadable
+FALLBACK_TERMS = [
+    {"term": "ninja", "type": "Gender-coded (Masculine)", "suggestion": "specialist"},
+    {"term": "rockstar", "type": "Gender-coded (Masculine)", "suggestion": "high performer"},
+    {"term": "guru", "type": "Gender-coded (Masculine)", "suggestion": "expert"},
+    {"term": "manpower", "type": "Gender-coded (Masculine)", "suggestion": "workforce"},
+    {"term": "young", "type": "Possible Ageism", "suggestion": "energetic/early-career"},
+    {"term": "digital native", "type": "Ageism", "suggestion": "tech-savvy"},
+    {"term": "native english", "type": "Exclusivity", "suggestion": "fluent in English"},
+    {"term": "blacklist", "type": "Non-inclusive", "suggestion": "blocklist"},
+    {"term": "whitelist", "type": "Non-inclusive", "suggestion": "allowlist"},
+]
+
+
+class BiasTerm(NamedTuple):
+    term: str
+    type: str
+    suggestion: str
+
+
+def inflections(phrase: str) -> List[str]:
+    """Plural / third-person, past and -ing forms of the phrase's last word."""
+    head, _, word = phrase.rpartition(" ")
+    if len(word) < 3 or not word.isalpha():
+        return []
+    if word.endswith("e"):
+        forms = [word + "s", word + "d", word[:-1] + "ing"]
+    elif word.endswith("y") and word[-2] not in "aeiou":
+        forms = [word[:-1] + "ies", word[:-1] + "ied", word + "ing"]
+    elif word.endswith(("s", "x", "z", "ch", "sh")):
+        forms = [word + "es", word + "ed", word + "ing"]
+    else:
+        forms = [word + "s", word + "ed", word + "ing"]
+    return [f"{head} {form}" if head else form for form in forms]
+
+
+def load_lexicon(path: str) -> List[dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return data["terms"] if isinstance(data, dict) else data
+
+
+class BiasLexicon:
+    def __init__(self, entries: List[dict]):
+        forms: Dict[str, BiasTerm] = {}
+        for entry in entries:
+            term = entry.get("term")
+            if not term:
+                continue
+            bias_term = BiasTerm(term, entry.get("type", "Non-inclusive"), entry.get("suggestion", ""))
+            surface = [term, *entry.get("variants", [])]
+            if entry.get("inflect"):
+                surface += inflections(term)
+            for form in surface:
+                # First definition wins if two entries share a form
+                forms.setdefault(form, bias_term)
+        self.terms = len({form.term for form in forms.values()})
+        self._matcher = PhraseMatcher(forms)
+
+    def __len__(self) -> int:
+        return len(self._matcher)
+
+    def scan(self, text: str) -> List[dict]:
+        """
+        One issue per lexicon term found, in order of first occurrence, with
+        every occurrence as {"start", "end", "text"} character offsets.
+        """
+        issues: Dict[str, dict] = {}
+        for match in self._matcher.finditer(text):
+            bias_term = match.value
+            issue = issues.get(bias_term.term)
+            if issue is None:
+                issue = issues[bias_term.term] = {
+                    "term": bias_term.term,
+                    "type": bias_term.type,
+                    "suggestion": bias_term.suggestion,
+                    "count": 0,
+                    "occurrences": [],
+                }
+            issue["count"] += 1
+            issue["occurrences"].append({"start": match.start, "end": match.end, "text": match.text})
+        return list(issues.values())
+
+
+def locate_terms(text: str, terms: List[str]) -> Dict[str, List[dict]]:
+    """Occurrences of arbitrary terms (e.g. ones the LLM flagged) in a single pass."""
+    matcher = PhraseMatcher({term: term for term in terms if term})
+    found: Dict[str, List[dict]] = {}
+    for match in matcher.finditer(text):
+        found.setdefault(match.value, []).append({"start": match.start, "end": match.end, "text": match.text})
+    return found
+
+
+def build_bias_lexicon(path: Optional[str] = None) -> BiasLexicon:
+    path = path or os.getenv("BIAS_LEXICON_PATH", DEFAULT_LEXICON_PATH)
+    try:
+        entries = load_lexicon(path)
+    except Exception as e:
+        print(f"Could not load bias lexicon from {path} ({e}); using built-in list")
+        entries = FALLBACK_TERMS
+    lexicon = BiasLexicon(entries)
+    print(f"Bias lexicon ready: {lexicon.terms} terms, {len(lexicon)} surface forms")
+    return lexicon
+
+
+bias_lexicon = build_bias_lexicon()
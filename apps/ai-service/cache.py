@@ -0,0 +1,352 @@
+"""
+Caching
+
+Content-addressed caches with a bounded in-process LRU front tier and an
+optional second tier - Redis (shared by all workers) or an on-disk store.
+Backend failures never fail a request - the cache just degrades to memory only.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import struct
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+try:
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+
+def content_key(namespace: str, *parts: str) -> str:
+    """Stable cache key: namespace plus SHA-256 of the parts."""
+    digest = hashlib.sha256("\x00".join(parts).encode("utf-8")).hexdigest()
+    return f"{namespace}:{digest}"
+
+
+# Serializers for the backend tier: (encode, decode) pairs of value <-> bytes
+json_codec = (
+    lambda value: json.dumps(value).encode("utf-8"),
+    lambda data: json.loads(data),
+)
+float32_codec = (
+    lambda value: np.asarray(value, dtype="<f4").tobytes(),
+    lambda data: np.frombuffer(data, dtype="<f4"),
+)
+
+
+class LRUCache:
+    """Bounded in-process LRU with per-entry expiry."""
+
+    def __init__(self, max_entries: int, ttl: Optional[float] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.evictions = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key: str) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        if self.max_entries <= 0:
+            return
+        ttl = ttl if ttl is not None else self.ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: str):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+
+class RedisCache:
+    """Thin async wrapper over Redis storing pre-encoded bytes with a TTL."""
+
+    def __init__(self, url: str, prefix: str = "talentx-ai:"):
+        self.prefix = prefix
+        self._client = aioredis.from_url(url)
+
+    async def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        if not keys:
+            return []
+        return await self._client.mget([self.prefix + key for key in keys])
+
+    async def set_many(self, items: Dict[str, bytes], ttl: Optional[float] = None):
+        if not items:
+            return
+        async with self._client.pipeline(transaction=False) as pipe:
+            for key, data in items.items():
+                pipe.set(self.prefix + key, data, ex=int(ttl) if ttl else None)
+            await pipe.execute()
+
+    async def delete(self, key: str):
+        await self._client.delete(self.prefix + key)
+
+    async def close(self):
+        await self._client.aclose()
+
+
+class DiskCache:
+    """
+    On-disk store: one file per key, each starting with its expiry time, and
+    least-recently-written files evicted once the directory exceeds max_bytes.
+    """
+
+    # Entry header: magic + expiry as a Unix timestamp (0 = never)
+    _HEADER = struct.Struct("<4sd")
+    _MAGIC = b"TXC1"
+    _TMP_PREFIX = ".tmp-"
+
+    def __init__(self, directory: str, max_bytes: int = 512 * 1024 * 1024, ttl: Optional[float] = None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        # Reads and writes run in several to_thread calls at once
+        self._lock = threading.RLock()
+        os.makedirs(directory, exist_ok=True)
+        self._total_bytes = 0
+        for entry in self._entries(include_temporary=True):
+            if entry.name.startswith(self._TMP_PREFIX):
+                # Left behind by a process that died mid-write
+                os.remove(entry.path)
+            else:
+                self._total_bytes += entry.stat().st_size
+
+    def _entries(self, include_temporary: bool = False):
+        return [
+            entry for entry in os.scandir(self.directory)
+            if entry.is_file() and (include_temporary or not entry.name.startswith(self._TMP_PREFIX))
+        ]
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key.replace(":", "_"))
+
+    def _read(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        if len(data) < self._HEADER.size:
+            self._remove(path)
+            return None
+        magic, expires_at = self._HEADER.unpack_from(data)
+        # Files without a header predate per-entry expiry - treat them as stale
+        if magic != self._MAGIC or (expires_at and expires_at <= time.time()):
+            self._remove(path)
+            return None
+        return data[self._HEADER.size:]
+
+    def _write(self, key: str, data: bytes, ttl: Optional[float]):
+        path = self._path(key)
+        header = self._HEADER.pack(self._MAGIC, time.time() + ttl if ttl else 0.0)
+        # Unique temp file per write, so concurrent writers of one key can't interleave
+        fd, tmp_path = tempfile.mkstemp(prefix=self._TMP_PREFIX, dir=self.directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(header)
+                f.write(data)
+            with self._lock:
+                self._remove(path)
+                os.replace(tmp_path, path)
+                self._total_bytes += len(header) + len(data)
+                if self._total_bytes > self.max_bytes:
+                    self._evict()
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+
+    def _remove(self, path: str):
+        with self._lock:
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+                self._total_bytes -= size
+            except FileNotFoundError:
+                pass
+
+    def _evict(self):
+        with self._lock:
+            entries = sorted(self._entries(), key=lambda entry: entry.stat().st_mtime)
+            # Evict down to 90% so we don't rescan the directory on every write
+            target = self.max_bytes * 0.9
+            for entry in entries:
+                if self._total_bytes <= target:
+                    break
+                self._remove(entry.path)
+
+    async def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        return await asyncio.to_thread(lambda: [self._read(key) for key in keys])
+
+    async def set_many(self, items: Dict[str, bytes], ttl: Optional[float] = None):
+        ttl = ttl if ttl is not None else self.ttl
+
+        def write_all():
+            for key, data in items.items():
+                self._write(key, data, ttl)
+        await asyncio.to_thread(write_all)
+
+    async def delete(self, key: str):
+        await asyncio.to_thread(self._remove, self._path(key))
+
+    async def close(self):
+        pass
+
+
+def make_backend(
+    kind: Optional[str],
+    name: str,
+    redis_url: Optional[str] = None,
+    directory: Optional[str] = None,
+    max_bytes: Optional[int] = None,
+    ttl: Optional[float] = None,
+):
+    """Build the second cache tier: "memory" (none), "redis" or "disk"."""
+    kind = (kind or "memory").lower()
+    if kind == "memory":
+        return None
+    if kind == "redis":
+        if not redis_url:
+            print(f"Warning: {name} cache backend is redis but REDIS_URL is not set; using memory only")
+            return None
+        if not REDIS_AVAILABLE:
+            print(f"Warning: redis package not installed; {name} cache is memory only")
+            return None
+        return RedisCache(redis_url, prefix=f"talentx-ai:{name}:")
+    if kind == "disk":
+        directory = directory or os.path.join(tempfile.gettempdir(), "talentx-ai-cache", name)
+        return DiskCache(directory, max_bytes=max_bytes or 512 * 1024 * 1024, ttl=ttl)
+    raise ValueError(f"Unknown cache backend: {kind}")
+
+
+class TieredCache:
+    """
+    LRU front tier + optional backend tier (RedisCache or DiskCache).
+
+    Memory holds live Python values; the backend holds `encode(value)` bytes
+    and entries found there are promoted into memory. Redis size-based
+    eviction is left to the server's maxmemory policy; entries carry a TTL.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_entries: int,
+        ttl: Optional[float] = None,
+        backend=None,
+        codec=json_codec,
+    ):
+        self.name = name
+        self.ttl = ttl
+        self.memory = LRUCache(max_entries, ttl)
+        self.encode, self.decode = codec
+        self.backend = backend
+        self.memory_hits = 0
+        self.backend_hits = 0
+        self.misses = 0
+        self.backend_errors = 0
+
+    async def get(self, key: str) -> Any:
+        return (await self.get_many([key])).get(key)
+
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        found = {}
+        missing = []
+        for key in keys:
+            value = self.memory.get(key)
+            if value is not None:
+                found[key] = value
+                self.memory_hits += 1
+            else:
+                missing.append(key)
+
+        if missing and self.backend is not None:
+            try:
+                blobs = await self.backend.get_many(missing)
+            except Exception as e:
+                print(f"{self.name} cache backend read failed: {e}")
+                self.backend_errors += 1
+                blobs = [None] * len(missing)
+            still_missing = []
+            for key, blob in zip(missing, blobs):
+                if blob is None:
+                    still_missing.append(key)
+                    continue
+                value = self.decode(blob)
+                self.memory.set(key, value)
+                found[key] = value
+                self.backend_hits += 1
+            missing = still_missing
+
+        self.misses += len(missing)
+        return found
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        await self.set_many({key: value}, ttl)
+
+    async def set_many(self, items: Dict[str, Any], ttl: Optional[float] = None):
+        ttl = ttl if ttl is not None else self.ttl
+        for key, value in items.items():
+            self.memory.set(key, value, ttl)
+        if items and self.backend is not None:
+            try:
+                await self.backend.set_many({key: self.encode(value) for key, value in items.items()}, ttl)
+            except Exception as e:
+                print(f"{self.name} cache backend write failed: {e}")
+                self.backend_errors += 1
+
+    async def delete(self, key: str):
+        self.memory.delete(key)
+        if self.backend is not None:
+            try:
+                await self.backend.delete(key)
+            except Exception as e:
+                print(f"{self.name} cache backend delete failed: {e}")
+                self.backend_errors += 1
+
+    async def close(self):
+        if self.backend is not None:
+            await self.backend.close()
+
+    def stats(self) -> dict:
+        lookups = self.memory_hits + self.backend_hits + self.misses
+        return {
+            "entries": len(self.memory),
+            "maxEntries": self.memory.max_entries,
+            "backend": type(self.backend).__name__ if self.backend is not None else None,
+            "memoryHits": self.memory_hits,
+            "backendHits": self.backend_hits,
+            "misses": self.misses,
+            "hitRate": round((self.memory_hits + self.backend_hits) / lookups, 4) if lookups else 0.0,
+            "evictions": self.memory.evictions,
+            "backendErrors": self.backend_errors,
+        }
@@ -0,0 +1,112 @@
+"""
+Chunked embeddings
+
+Long texts are embedded as overlapping chunks that each fit the embedding
+model's context, instead of being cut at a fixed character count, and the
+chunk vectors are pooled back into one vector per text:
+
+    mean    token-weighted mean of the unit chunk vectors, renormalized
+    max     element-wise max of the unit chunk vectors, renormalized
+    chunks  per-chunk vectors for multi-vector search (plus the mean)
+
+Budgets are in estimated tokens. No tokenizer ships with the service, so a
+word is costed at one token per 4 characters, rounded up - more than a
+WordPiece/BPE tokenizer spends on common words, which keeps chunks inside
+the model's window.
+"""
+
+import os
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+CHUNK_TOKENS = int(os.getenv("EMBED_CHUNK_TOKENS", "512"))
+CHUNK_OVERLAP = int(os.getenv("EMBED_CHUNK_OVERLAP", "64"))
+# Text past this many chunks is dropped (and reported as truncated)
+MAX_CHUNKS = int(os.getenv("EMBED_MAX_CHUNKS", "32"))
+
+POOLING_MODES = ("mean", "max", "chunks")
+
+CHARS_PER_TOKEN = 4
+
+
+class Chunk(NamedTuple):
+    text: str
+    start: int  # character offsets into the whitespace-normalized text
+    end: int
+    tokens: int
+
+
+class ChunkedEmbedding(NamedTuple):
+    vector: np.ndarray
+    chunks: List[Chunk]
+    chunk_vectors: np.ndarray  # one row per chunk
+    truncated: bool
+
+
+def _words(text: str, max_tokens: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Start and end offsets of the space-separated words; words over max_tokens are cut into pieces."""
+    lengths = np.fromiter(map(len, text.split(" ")), dtype=np.int64)
+    starts = np.concatenate(([0], np.cumsum(lengths + 1)[:-1]))
+    ends = starts + lengths
+    piece = max_tokens * CHARS_PER_TOKEN
+    if lengths.max() > piece:
+        # Rare (base64 blobs, long URLs) - not worth vectorizing
+        cut = [(offset, min(offset + piece, end)) for start, end in zip(starts.tolist(), ends.tolist())
+               for offset in range(start, end, piece)]
+        starts, ends = np.array(cut, dtype=np.int64).T
+    return starts, ends
+
+
+def split_text(text: str, chunk_tokens: int = CHUNK_TOKENS, overlap: int = CHUNK_OVERLAP,
+               max_chunks: int = MAX_CHUNKS) -> Tuple[List[Chunk], bool]:
+    """
+    Split whitespace-normalized text into chunks of at most chunk_tokens
+    estimated tokens, each repeating about `overlap` tokens of the one before
+    so a sentence on a boundary is whole in at least one chunk.
+    Returns (chunks, truncated).
+    """
+    if not text:
+        return [], False
+    starts, ends = _words(text, chunk_tokens)
+    costs = np.maximum(1, -(-(ends - starts) // CHARS_PER_TOKEN))
+    # cumulative[i] = tokens in words [0, i)
+    cumulative = np.concatenate(([0], np.cumsum(costs)))
+    count = len(starts)
+    chunks = []
+    first = 0
+    while first < count and len(chunks) < max_chunks:
+        last = int(np.searchsorted(cumulative, cumulative[first] + chunk_tokens, side="right")) - 1
+        start, end = int(starts[first]), int(ends[last - 1])
+        chunks.append(Chunk(text[start:end], start, end, int(cumulative[last] - cumulative[first])))
+        if last == count:
+            return chunks, False
+        # Step back over the overlap, but always move forward
+        first = max(first + 1, int(np.searchsorted(cumulative, cumulative[last] - overlap, side="left")))
+    return chunks, first < count
+
+
+def pool(vectors: np.ndarray, weights: Sequence[float], mode: str = "mean") -> np.ndarray:
+    """
+    One vector from a (chunks x dim) matrix. A single chunk is returned as is,
+    so short texts get exactly the vector the unchunked path would give.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if len(vectors) == 1:
+        return vectors[0]
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    unit = vectors / np.where(norms > 0, norms, 1.0)
+    if mode == "max":
+        pooled = unit.max(axis=0)
+    else:
+        pooled = np.asarray(weights, dtype=np.float32) @ unit
+    norm = np.linalg.norm(pooled)
+    return pooled / norm if norm > 0 else pooled
+
+
+def combine(chunks: List[Chunk], chunk_vectors: np.ndarray, truncated: bool,
+            pooling: Optional[str] = "mean") -> ChunkedEmbedding:
+    # Per-chunk results still carry a pooled vector for single-vector callers
+    mode = "max" if pooling == "max" else "mean"
+    vector = pool(chunk_vectors, [chunk.tokens for chunk in chunks], mode)
+    return ChunkedEmbedding(vector, chunks, chunk_vectors, truncated)
@@ -0,0 +1,130 @@
+"""
+Extraction executor
+
+Runs CPU-bound document work (PyMuPDF, PyPDF2, python-docx, Tesseract) in a
+process pool so a scanned PDF never blocks the event loop - LLM endpoints and
+/health stay responsive while documents are parsed.
+"""
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+from fastapi import Request
+
+
+class ExtractionQueueFull(Exception):
+    """Too many extraction jobs are already queued or running."""
+
+
+class ClientDisconnected(Exception):
+    """The client went away before the extraction finished."""
+
+
+class ExtractionExecutor:
+    """
+    Sized process pool with a bound on queued + running jobs.
+
+    EXTRACTION_WORKERS=0 runs jobs in threads instead (handy for local dev
+    and tests where spawning processes is not worth it).
+    """
+
+    def __init__(self, workers: Optional[int] = None, max_pending: Optional[int] = None):
+        default_workers = min(4, os.cpu_count() or 1)
+        self.workers = workers if workers is not None else int(os.getenv("EXTRACTION_WORKERS", str(default_workers)))
+        self.max_pending = max_pending if max_pending is not None else int(
+            os.getenv("EXTRACTION_MAX_PENDING", str(max(self.workers, 1) * 4))
+        )
+        self.pending = 0
+        self.cancelled = 0
+        self.rejected = 0
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._threads: Optional[ThreadPoolExecutor] = None
+
+    def start(self):
+        if self.workers <= 0:
+            if self._threads is None:
+                self._threads = ThreadPoolExecutor(thread_name_prefix="extraction")
+            return
+        if self._pool is None:
+            # spawn: fresh interpreters that never inherit the event loop or client threads
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            print(f"Extraction pool ready ({self.workers} workers, max {self.max_pending} pending)")
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        if self._threads is not None:
+            self._threads.shutdown(wait=False, cancel_futures=True)
+            self._threads = None
+
+    def _restart(self, broken: Optional[ProcessPoolExecutor]):
+        # Every job waiting on a broken pool lands here; only the first replaces it,
+        # later ones must not shut down the fresh pool and cancel its jobs
+        if broken is not None and self._pool is broken:
+            print("Extraction pool broken, restarting")
+            self.shutdown()
+            self.start()
+
+    def _job_done(self, _job: Future):
+        self.pending -= 1
+
+    async def run(self, fn, *args, request: Optional[Request] = None):
+        """
+        Run fn(*args) in the pool. Raises ExtractionQueueFull when the queue is
+        at its limit and ClientDisconnected if `request` disconnects first -
+        a job that has not started yet is cancelled and never runs.
+        """
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise ExtractionQueueFull(f"{self.pending} extraction jobs pending")
+
+        self.pending += 1
+        job, pool = None, None
+        try:
+            self.start()
+            pool = self._pool
+            job = (pool or self._threads).submit(fn, *args)
+            # pending drops when the job itself finishes: a job that is already
+            # running keeps its worker busy after a disconnect cancels the wait
+            loop = asyncio.get_running_loop()
+            job.add_done_callback(lambda done: loop.call_soon_threadsafe(self._job_done, done))
+            future = asyncio.wrap_future(job)
+
+            if request is None:
+                return await future
+
+            while True:
+                done, _ = await asyncio.wait({future}, timeout=0.25)
+                if done:
+                    return future.result()
+                if await request.is_disconnected():
+                    future.cancel()
+                    self.cancelled += 1
+                    raise ClientDisconnected()
+        except BrokenProcessPool:
+            # A worker died (e.g. a native crash on a malformed file) - replace the pool
+            self._restart(pool)
+            raise
+        finally:
+            if job is None:
+                self.pending -= 1
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "pending": self.pending,
+            "maxPending": self.max_pending,
+            "cancelled": self.cancelled,
+            "rejected": self.rejected,
+        }
+
+
+extraction_executor = ExtractionExecutor()
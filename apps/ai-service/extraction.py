@@ -0,0 +1,291 @@
+"""
+Document text extraction
+
+Synchronous, CPU-bound extractors for PDF, DOCX and image resumes. Everything
+here is importable on its own so the functions can run in worker processes
+(see executor.py) without loading the FastAPI app.
+
+Stage timings can't be recorded directly from a worker process, so
+extract_text_timed returns them alongside the text for the caller to record.
+
+Extractors accept either the file's bytes or a path to it. The service passes
+the path of the spooled upload (see uploads.py), so PyMuPDF, PyPDF2 and
+python-docx read from disk on demand and the bytes never have to be pickled
+into the worker or copied into a BytesIO.
+"""
+
+import io
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from PyPDF2 import PdfReader
+from docx import Document
+
+try:
+    import fitz # PyMuPDF
+    FITZ_AVAILABLE = True
+except ImportError:
+    FITZ_AVAILABLE = False
+
+# OCR Support - optional dependencies
+try:
+    from PIL import Image
+    import pytesseract
+    OCR_AVAILABLE = True
+except ImportError:
+    OCR_AVAILABLE = False
+    print("Warning: OCR dependencies not installed. Install with: pip install pillow pytesseract")
+
+SUPPORTED_DOCUMENTS = ["pdf", "docx", "doc"]
+SUPPORTED_IMAGES = ["jpg", "jpeg", "png", "tiff", "tif", "bmp", "webp"]
+SUPPORTED_EXTENSIONS = SUPPORTED_DOCUMENTS + SUPPORTED_IMAGES
+
+# Pages with less text than this in their text layer are treated as scanned and OCR'd
+PAGE_MIN_TEXT_CHARS = int(os.getenv("PDF_PAGE_MIN_TEXT_CHARS", "50"))
+
+# Scanned PDF OCR limits
+OCR_MAX_PAGES = int(os.getenv("OCR_MAX_PAGES", "10"))
+OCR_TARGET_CHARS = int(os.getenv("OCR_TARGET_CHARS", "8000"))  # LLM extraction reads at most 8000 chars
+# Every extraction worker process OCRs its pages in parallel, so split the cores
+# between them (same EXTRACTION_WORKERS default as executor.py)
+_CPUS = os.cpu_count() or 1
+_EXTRACTION_WORKERS = max(1, int(os.getenv("EXTRACTION_WORKERS", str(min(4, _CPUS)))))
+OCR_THREADS = int(os.getenv("OCR_THREADS", str(max(1, _CPUS // _EXTRACTION_WORKERS))))
+
+# Each pytesseract call runs its own tesseract process; keep each one single-threaded
+# so parallel pages don't oversubscribe the cores
+os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+
+def open_source(source):
+    # Bytes get wrapped in a file object; paths are handed to the library as-is
+    return io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else source
+
+def extract_text_with_pypdf2(source):
+    # Text-layer only fallback for when PyMuPDF is missing or can't open the file
+    try:
+        reader = PdfReader(open_source(source))
+        text = ""
+        for page in reader.pages:
+            text += (page.extract_text() or "") + "\n"
+        return text
+    except Exception as e:
+        print(f"Error reading PDF: {e}")
+        return ""
+
+def extract_text_from_docx(source):
+    try:
+        doc = Document(open_source(source))
+        text = ""
+        for para in doc.paragraphs:
+            text += para.text + "\n"
+        return text
+    except Exception as e:
+        print(f"Error reading DOCX: {e}")
+        return ""
+
+def extract_text_from_image(source):
+    """
+    Extract text from image using OCR (Tesseract).
+    Supports JPG, PNG, TIFF, BMP, and other common image formats.
+    """
+    if not OCR_AVAILABLE:
+        print("OCR not available - pytesseract/pillow not installed")
+        return ""
+    
+    try:
+        # Open image from bytes or path
+        image = Image.open(open_source(source))
+        
+        # Convert to RGB if necessary (for PNG with transparency)
+        if image.mode in ('RGBA', 'P'):
+            image = image.convert('RGB')
+        
+        return ocr_image(image)
+    except Exception as e:
+        print(f"Error performing OCR on image: {e}")
+        return ""
+
+def ocr_image(image):
+    """OCR a decoded PIL image."""
+    # Pre-process image for better OCR results
+    # Convert to grayscale
+    if image.mode != 'L':
+        image = image.convert('L')
+    
+    # Use Tesseract to extract text
+    # Config options for better resume parsing:
+    # --psm 1: Automatic page segmentation with OSD
+    # --oem 3: Default, based on what is available
+    custom_config = r'--oem 3 --psm 1'
+    text = pytesseract.image_to_string(image, config=custom_config)
+    
+    return text.strip()
+
+def record_timing(timings, stage, started):
+    if timings is not None:
+        timings.setdefault(stage, []).append(time.perf_counter() - started)
+
+def ocr_image_timed(source, timings):
+    started = time.perf_counter()
+    try:
+        return extract_text_from_image(source)
+    finally:
+        record_timing(timings, "ocr_page", started)
+
+def ocr_page_timed(image, timings):
+    started = time.perf_counter()
+    try:
+        return ocr_image(image)
+    except Exception as e:
+        print(f"Error performing OCR on PDF page: {e}")
+        return ""
+    finally:
+        record_timing(timings, "ocr_page", started)
+
+def render_page_image(page):
+    """
+    Render a PDF page straight into a grayscale PIL image for OCR. The pixmap
+    is already in the mode tesseract wants, so there is no PNG encode/decode
+    in between and the page costs width x height bytes (about 2 MB for Letter).
+    """
+    # 2x zoom for better OCR quality
+    pix = page.get_pixmap(matrix=fitz.Matrix(2, 2), colorspace=fitz.csGRAY, alpha=False)
+    return Image.frombytes("L", (pix.width, pix.height), pix.samples)
+
+def ocr_pdf_pages(pdf_document, page_numbers, timings=None):
+    """
+    OCR pages of an open PDF in parallel and return {page_num: text}.
+
+    Pages are rendered on this thread (PyMuPDF documents are not thread-safe)
+    and handed to a thread pool; tesseract runs as a subprocess, so pages OCR
+    concurrently across cores. Results are consumed in page order and no new
+    pages are started once OCR_TARGET_CHARS of text has been recovered.
+    """
+    results = {}
+    pending = {}
+    to_render = iter(page_numbers)
+    pool = ThreadPoolExecutor(max_workers=max(OCR_THREADS, 1))
+
+    def submit_next():
+        page_num = next(to_render, None)
+        if page_num is not None:
+            pending[page_num] = pool.submit(ocr_page_timed, render_page_image(pdf_document[page_num]), timings)
+
+    try:
+        for _ in range(max(OCR_THREADS, 1)):
+            submit_next()
+
+        collected = 0
+        for page_num in page_numbers:
+            if page_num not in pending:
+                break
+            results[page_num] = pending.pop(page_num).result()
+            collected += len(results[page_num].strip())
+            if collected >= OCR_TARGET_CHARS:
+                print(f"OCR early stop after page {page_num + 1} ({collected} chars)")
+                break
+            submit_next()
+    finally:
+        # Pages already being OCR'd finish in the background; queued ones are dropped
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    return results
+
+def classify_pdf_page(page, text):
+    """
+    Classify a page as "text" (usable text layer), "mixed" (usable text layer
+    plus embedded images) or "image" (no usable text - scanned or image-only).
+    """
+    if len(text.strip()) < PAGE_MIN_TEXT_CHARS:
+        return "image"
+    return "mixed" if page.get_images(full=False) else "text"
+
+def open_pdf(source):
+    # A path opens file-backed: MuPDF reads objects from disk as pages need them
+    if isinstance(source, (bytes, bytearray)):
+        return fitz.open(stream=source, filetype="pdf")
+    return fitz.open(source, filetype="pdf")
+
+def extract_pdf(source, timings=None):
+    """
+    Single-pass PDF extraction: open the document once, read each page's text
+    layer and OCR only the pages without usable text.
+    Returns (text, extraction_method) where the method is "text", "ocr" or "mixed".
+    """
+    if not FITZ_AVAILABLE:
+        return extract_text_with_pypdf2(source), "text"
+
+    try:
+        pdf_document = open_pdf(source)
+    except Exception as e:
+        print(f"fitz could not open PDF, falling back to PyPDF2: {e}")
+        return extract_text_with_pypdf2(source), "text"
+
+    try:
+        page_texts = [page.get_text() for page in pdf_document]
+        kinds = [classify_pdf_page(pdf_document[n], text) for n, text in enumerate(page_texts)]
+        scanned = [n for n, kind in enumerate(kinds) if kind == "image"]
+        print(
+            f"PDF pages: {kinds.count('text')} text, {kinds.count('mixed')} mixed, {len(scanned)} image-only"
+        )
+
+        ocr_count = 0
+        if scanned and not OCR_AVAILABLE:
+            print("Image-only PDF pages found but OCR not available")
+        elif scanned:
+            if len(scanned) > OCR_MAX_PAGES:
+                print(f"{len(scanned)} image-only pages, OCRing the first {OCR_MAX_PAGES}")
+                scanned = scanned[:OCR_MAX_PAGES]
+            try:
+                for page_num, ocr_text in ocr_pdf_pages(pdf_document, scanned, timings).items():
+                    if len(ocr_text.strip()) > len(page_texts[page_num].strip()):
+                        page_texts[page_num] = ocr_text
+                        ocr_count += 1
+            except Exception as e:
+                print(f"Error OCRing scanned PDF pages: {e}")
+    except Exception as e:
+        print(f"fitz extraction failed, falling back to PyPDF2: {e}")
+        return extract_text_with_pypdf2(source), "text"
+    finally:
+        pdf_document.close()
+
+    text = "".join(page_text + "\n" for page_text in page_texts)
+    if ocr_count == 0:
+        method = "text"
+    elif ocr_count == len(page_texts):
+        method = "ocr"
+    else:
+        method = "mixed"
+    return text, method
+
+
+def extract_text(source, ext, timings=None):
+    """
+    Extract text from an uploaded resume (bytes or a file path) based on its file extension.
+    Returns (text, extraction_method). Per-page OCR durations are appended to
+    timings["ocr_page"] when a timings dict is passed.
+    """
+    if ext == "pdf":
+        # Text layer per page, OCR only for pages without one
+        return extract_pdf(source, timings)
+    if ext in ["docx", "doc"]:
+        return extract_text_from_docx(source), "text"
+    # Image-based resume - use OCR
+    text = ocr_image_timed(source, timings)
+    print(f"OCR extracted {len(text)} characters from image")
+    return text, "ocr"
+
+
+def extract_text_timed(source, ext):
+    """
+    extract_text for the extraction pool: returns (text, extraction_method,
+    timings) where timings maps stage -> [seconds, ...] ("extract_text" for
+    the whole call, "ocr_page" per OCR'd page).
+    """
+    timings = {}
+    started = time.perf_counter()
+    text, method = extract_text(source, ext, timings)
+    record_timing(timings, "extract_text", started)
+    return text, method, timings
@@ -0,0 +1,144 @@
+"""
+Offline fallback embedder
+
+Feature-hashing embedder used when Ollama is unavailable. Word unigrams, word
+bigrams and character 3-5-grams are hashed into a fixed number of buckets with
+a signed hash, weighted with sublinear term frequency (stopwords damped) and
+L2-normalized, so texts sharing vocabulary get a real cosine similarity.
+
+All hashing is done with NumPy over the UTF-8 bytes of the text: a polynomial
+prefix hash gives the hash of any byte span in O(1), so every n-gram of the
+document is hashed in a handful of vector operations.
+
+Note: these vectors live in their own space - they are comparable with each
+other, not with vectors produced by the Ollama embedding model.
+"""
+
+import os
+import re
+
+import numpy as np
+
+EMBED_DIM = int(os.getenv("EMBED_DIM", "1536"))  # matches candidates.embedding vector(1536)
+
+_P = 0x100000001B3  # odd, so it has an inverse modulo 2**64
+_MASK = (1 << 64) - 1
+_P_INV = pow(_P, -1, 1 << 64)
+
+# Relative weight of each feature kind; the salt keeps kinds in separate hash spaces
+_WORD, _BIGRAM, _CHAR3, _CHAR4, _CHAR5 = range(5)
+_KIND_WEIGHTS = np.array([1.0, 0.5, 0.25, 0.25, 0.25], dtype=np.float64)
+_KIND_SALTS = [np.uint64((kind + 1) * 0x9E3779B97F4A7C15 & _MASK) for kind in range(5)]
+_STOPWORD_WEIGHT = 0.1
+
+_STOPWORDS = (
+    "a an and are as at be by for from has have in is it its of on or that the "
+    "to was were will with i me my we our you your he she they them this these "
+    "those am been being do does did not no but if so than then there their"
+).split()
+
+_NON_WORD = re.compile(r"[^\w+#]+")
+
+
+def _span_hash(word: str) -> int:
+    """Same polynomial hash as the vectorized path, for a single token."""
+    h = 0
+    for byte in word.encode("utf-8"):
+        h = (h * _P + byte) & _MASK
+    return h
+
+
+def _mix(h: np.ndarray, salt: np.uint64) -> np.ndarray:
+    """splitmix64 finalizer - spreads polynomial hashes over all 64 bits."""
+    z = h + salt
+    z ^= z >> np.uint64(30)
+    z *= np.uint64(0xBF58476D1CE4E5B9)
+    z ^= z >> np.uint64(27)
+    z *= np.uint64(0x94D049BB133111EB)
+    z ^= z >> np.uint64(31)
+    return z
+
+
+class HashingEmbedder:
+    """Deterministic, dependency-free text embedder (NumPy only)."""
+
+    def __init__(self, dim: int = EMBED_DIM):
+        self.dim = dim
+        self._pow = np.ones(1, dtype=np.uint64)
+        self._inv_pow = np.ones(1, dtype=np.uint64)
+        self._stop_hashes = np.array(sorted(_span_hash(w) for w in _STOPWORDS), dtype=np.uint64)
+
+    def _powers(self, n: int):
+        # Powers of P and P^-1 are cached and grown on demand
+        if len(self._pow) < n:
+            size = max(n, 2 * len(self._pow))
+            pw = np.empty(size, dtype=np.uint64)
+            inv = np.empty(size, dtype=np.uint64)
+            pw[0] = inv[0] = 1
+            pw[1:] = np.cumprod(np.full(size - 1, _P, dtype=np.uint64))
+            inv[1:] = np.cumprod(np.full(size - 1, _P_INV, dtype=np.uint64))
+            self._pow, self._inv_pow = pw, inv
+        return self._pow, self._inv_pow
+
+    def embed(self, text: str) -> np.ndarray:
+        """Return an L2-normalized float32 vector of length `dim`."""
+        norm = _NON_WORD.sub(" ", text.lower()).strip()
+        vec = np.zeros(self.dim, dtype=np.float64)
+        if not norm:
+            vec[0] = 1.0
+            return vec.astype(np.float32)
+
+        data = np.frombuffer((" " + norm + " ").encode("utf-8"), dtype=np.uint8).astype(np.uint64)
+        length = len(data)
+        pw, inv = self._powers(length + 1)
+
+        # prefix[k] = sum(data[j] * P^-j for j < k); hash(a, b) = P^(b-1) * (prefix[b] - prefix[a])
+        prefix = np.zeros(length + 1, dtype=np.uint64)
+        np.cumsum(data * inv[:length], out=prefix[1:])
+
+        def span_hashes(starts, ends):
+            return pw[ends - 1] * (prefix[ends] - prefix[starts])
+
+        spaces = np.flatnonzero(data == 32)
+        word_starts, word_ends = spaces[:-1] + 1, spaces[1:]
+        word_hashes = span_hashes(word_starts, word_ends)
+
+        hashes = [_mix(word_hashes, _KIND_SALTS[_WORD])]
+        weights = [np.where(
+            np.isin(word_hashes, self._stop_hashes),
+            _STOPWORD_WEIGHT,
+            _KIND_WEIGHTS[_WORD],
+        )]
+
+        if len(word_starts) > 1:
+            bigrams = span_hashes(word_starts[:-1], word_ends[1:])
+            hashes.append(_mix(bigrams, _KIND_SALTS[_BIGRAM]))
+            weights.append(np.full(len(bigrams), _KIND_WEIGHTS[_BIGRAM]))
+
+        for kind, n in ((_CHAR3, 3), (_CHAR4, 4), (_CHAR5, 5)):
+            if length < n:
+                continue
+            starts = np.arange(0, length - n + 1)
+            grams = span_hashes(starts, starts + n)
+            hashes.append(_mix(grams, _KIND_SALTS[kind]))
+            weights.append(np.full(len(grams), _KIND_WEIGHTS[kind]))
+
+        all_hashes = np.concatenate(hashes)
+        all_weights = np.concatenate(weights)
+
+        # Sublinear TF: each distinct feature contributes weight * (1 + log(count))
+        unique, first, counts = np.unique(all_hashes, return_index=True, return_counts=True)
+        feature_weights = all_weights[first] * (1.0 + np.log(counts))
+
+        buckets = (unique % np.uint64(self.dim)).astype(np.int64)
+        signs = 1.0 - 2.0 * (unique >> np.uint64(63)).astype(np.float64)
+        vec = np.bincount(buckets, weights=signs * feature_weights, minlength=self.dim)
+
+        magnitude = np.linalg.norm(vec)
+        if magnitude == 0:
+            vec[0] = 1.0
+            return vec.astype(np.float32)
+        return (vec / magnitude).astype(np.float32)
+
+
+hashing_embedder = HashingEmbedder()
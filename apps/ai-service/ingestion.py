@@ -0,0 +1,486 @@
+"""
+Bulk resume ingestion
+
+Jobs of many resumes (individual uploads and/or ZIP archives) parsed in the
+background. Each job lives in its own directory under INGEST_DIR:
+
+    <job id>/manifest.json     files in the job, written once when the job is created
+    <job id>/events.jsonl      append-only per-file status changes
+    <job id>/files/            the uploaded documents
+    <job id>/results/<i>.json  parsed resume for file i
+
+so a restart replays the event log and re-queues every file that had not
+finished - nothing is lost and finished files are not parsed again.
+
+Files flow through a two-stage pipeline: INGEST_EXTRACT_WORKERS tasks run
+text extraction/OCR (in the extraction process pool) and hand the text to
+INGEST_LLM_WORKERS tasks for LLM extraction through a bounded queue, so one
+file's OCR overlaps another's LLM call and extraction can't run arbitrarily
+far ahead of the LLM. LLM calls are made at bulk priority.
+"""
+
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import time
+import uuid
+import zipfile
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from executor import ExtractionQueueFull
+from extraction import OCR_AVAILABLE, SUPPORTED_EXTENSIONS, SUPPORTED_IMAGES
+from metrics import Counter
+from scheduler import BULK, LLMOverloaded, llm_priority
+
+QUEUED = "queued"
+EXTRACTING = "extracting"
+EXTRACTED = "extracted"    # text ready, waiting for an LLM worker
+ENRICHING = "enriching"
+DONE = "done"
+FAILED = "failed"
+FINISHED = (DONE, FAILED)
+STATUSES = (QUEUED, EXTRACTING, EXTRACTED, ENRICHING, DONE, FAILED)
+
+ingested_files = Counter(
+    "ingest_files_total",
+    "Files finished by bulk ingestion jobs, by outcome (done, failed) and source (parsed, cache).",
+    ["outcome", "source"],
+)
+
+
+class IngestLimitExceeded(Exception):
+    """The submitted files exceed the per-job limits."""
+
+
+class IngestFile:
+    __slots__ = ("index", "name", "ext", "size", "stored", "status", "error", "extraction_method",
+                 "llm_used", "cached", "finished_at")
+
+    def __init__(self, index: int, name: str, ext: str, size: int, stored: Optional[str]):
+        self.index = index
+        self.name = name
+        self.ext = ext
+        self.size = size
+        self.stored = stored  # path relative to the job directory; None for files rejected up front
+        self.status = QUEUED
+        self.error: Optional[str] = None
+        self.extraction_method: Optional[str] = None
+        self.llm_used: Optional[bool] = None
+        self.cached = False
+        self.finished_at: Optional[float] = None
+
+    def manifest(self) -> dict:
+        return {"index": self.index, "name": self.name, "ext": self.ext, "size": self.size, "stored": self.stored}
+
+    def apply(self, event: dict):
+        self.status = event["status"]
+        self.error = event.get("error")
+        self.extraction_method = event.get("extractionMethod", self.extraction_method)
+        self.llm_used = event.get("llmUsed", self.llm_used)
+        self.cached = event.get("cached", self.cached)
+        if self.status in FINISHED:
+            self.finished_at = event.get("at")
+
+    def summary(self) -> dict:
+        return {
+            "index": self.index,
+            "name": self.name,
+            "size": self.size,
+            "status": self.status,
+            "error": self.error,
+            "extractionMethod": self.extraction_method,
+            "llmUsed": self.llm_used,
+            "cached": self.cached,
+        }
+
+
+class IngestJob:
+    def __init__(self, job_id: str, directory: str, created_at: float, files: List[IngestFile]):
+        self.id = job_id
+        self.directory = directory
+        self.created_at = created_at
+        self.files = files
+        self.cancelled = False
+
+    @property
+    def finished(self) -> bool:
+        return all(f.status in FINISHED for f in self.files)
+
+    def counts(self) -> Dict[str, int]:
+        counts = {status: 0 for status in STATUSES}
+        for f in self.files:
+            counts[f.status] += 1
+        return counts
+
+    def summary(self) -> dict:
+        counts = self.counts()
+        finished = counts[DONE] + counts[FAILED]
+        started = any(f.status != QUEUED for f in self.files)
+        finished_times = [f.finished_at for f in self.files if f.finished_at]
+        return {
+            "jobId": self.id,
+            "status": "completed" if self.finished else ("running" if started else "queued"),
+            "createdAt": self.created_at,
+            "finishedAt": max(finished_times) if self.finished and finished_times else None,
+            "total": len(self.files),
+            "counts": counts,
+            "progress": round(finished / len(self.files), 4) if self.files else 1.0,
+        }
+
+
+class IngestionManager:
+    """
+    extract(path, ext) -> (text, method) runs text extraction (may raise
+    ExtractionQueueFull); lookup(path, ext) -> (cache key, cached parse or
+    None); enrich(text, cache key) -> (parsed resume dict, llm_used) runs LLM
+    extraction and stores the result in the parse cache.
+    """
+
+    def __init__(
+        self,
+        extract: Callable[[str, str], Awaitable[Tuple[str, str]]],
+        lookup: Callable[[str, str], Awaitable[Tuple[str, Optional[dict]]]],
+        enrich: Callable[[str, str], Awaitable[Tuple[dict, bool]]],
+        directory: Optional[str] = None,
+    ):
+        self.extract = extract
+        self.lookup = lookup
+        self.enrich = enrich
+        self.directory = directory or os.getenv("INGEST_DIR") or os.path.join(tempfile.gettempdir(), "talentx-ai-ingest")
+        self.extract_workers = int(os.getenv("INGEST_EXTRACT_WORKERS", "2"))
+        self.llm_workers = int(os.getenv("INGEST_LLM_WORKERS", "2"))
+        self.max_files = int(os.getenv("INGEST_MAX_FILES", "1000"))
+        self.max_file_bytes = int(os.getenv("INGEST_MAX_FILE_BYTES", str(20 * 1024 * 1024)))
+        self.max_job_bytes = int(os.getenv("INGEST_MAX_JOB_BYTES", str(1024 * 1024 * 1024)))
+        self.retention = float(os.getenv("INGEST_RETENTION_HOURS", "168")) * 3600
+        self.jobs: Dict[str, IngestJob] = {}
+        self._extract_queue: Optional[asyncio.Queue] = None
+        self._llm_queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    # Lifecycle
+
+    async def start(self):
+        """Load jobs from disk, re-queue unfinished files and start the workers."""
+        os.makedirs(self.directory, exist_ok=True)
+        self._extract_queue = asyncio.Queue()
+        # Extracted text waiting for the LLM - bounds how far extraction runs ahead
+        self._llm_queue = asyncio.Queue(maxsize=max(1, self.llm_workers) * 2)
+        resumed = 0
+        for job in sorted(await asyncio.to_thread(self._load_jobs), key=lambda j: j.created_at):
+            self.jobs[job.id] = job
+            resumed += self._enqueue(job)
+        self._tasks = [asyncio.create_task(self._extract_worker()) for _ in range(max(1, self.extract_workers))]
+        self._tasks += [asyncio.create_task(self._llm_worker()) for _ in range(max(1, self.llm_workers))]
+        print(f"Ingestion ready ({len(self.jobs)} jobs, {resumed} files re-queued)")
+
+    async def stop(self):
+        # In-progress files keep their last logged status and are re-queued on the next start
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def _enqueue(self, job: IngestJob) -> int:
+        queued = 0
+        for f in job.files:
+            if f.status not in FINISHED:
+                f.status = QUEUED
+                self._extract_queue.put_nowait((job, f))
+                queued += 1
+        return queued
+
+    # Job creation
+
+    def new_job_directory(self) -> Tuple[str, str]:
+        job_id = uuid.uuid4().hex
+        directory = os.path.join(self.directory, job_id)
+        os.makedirs(os.path.join(directory, "files"))
+        os.makedirs(os.path.join(directory, "results"))
+        return job_id, directory
+
+    def save_upload(self, source, directory: str, name: str, stored: str) -> int:
+        """
+        Copy an uploaded file to `stored` in the job directory and return its
+        size. Blocking - run in a thread. Plain files stop at max_file_bytes,
+        like ZIP members (stage_files then marks them failed); a ZIP archive
+        past max_job_bytes fails the whole job.
+        """
+        archive = name.lower().endswith(".zip")
+        limit = self.max_job_bytes if archive else self.max_file_bytes
+        size = self._copy(source, os.path.join(directory, stored), limit)
+        if archive and size > limit:
+            raise IngestLimitExceeded(f"Job larger than {self.max_job_bytes} bytes.")
+        return size
+
+    def stage_files(self, directory: str, uploads: List[Tuple[str, str, int]]) -> List[IngestFile]:
+        """
+        Build the job's file list from uploads saved by save_upload, as
+        (original name, stored path, size) triples, expanding ZIP archives.
+        Blocking - run in a thread. Unsupported or oversized files are
+        recorded as failed.
+        """
+        files: List[IngestFile] = []
+        total_bytes = 0
+
+        def add(name, stored, size):
+            nonlocal total_bytes
+            if len(files) >= self.max_files:
+                raise IngestLimitExceeded(f"Too many files. Maximum is {self.max_files} per job.")
+            ext = name.lower().rsplit(".", 1)[-1] if "." in name else ""
+            entry = IngestFile(len(files), name, ext, size, stored)
+            if ext not in SUPPORTED_EXTENSIONS:
+                entry.status, entry.error = FAILED, "Unsupported file type"
+            elif ext in SUPPORTED_IMAGES and not OCR_AVAILABLE:
+                entry.status, entry.error = FAILED, "OCR not available for image files"
+            elif size > self.max_file_bytes:
+                entry.status, entry.error = FAILED, f"File larger than {self.max_file_bytes} bytes"
+            else:
+                total_bytes += size
+                if total_bytes > self.max_job_bytes:
+                    raise IngestLimitExceeded(f"Job larger than {self.max_job_bytes} bytes.")
+            if entry.status == FAILED:
+                entry.stored = None
+                entry.finished_at = time.time()
+                if stored:
+                    os.remove(os.path.join(directory, stored))
+            files.append(entry)
+
+        for name, stored, size in uploads:
+            path = os.path.join(directory, stored)
+            if not name.lower().endswith(".zip"):
+                add(name, stored, size)
+                continue
+            try:
+                with zipfile.ZipFile(path) as archive:
+                    for member in archive.infolist():
+                        base = os.path.basename(member.filename)
+                        if member.is_dir() or not base or base.startswith(".") or member.filename.startswith("__MACOSX/"):
+                            continue
+                        # Sizes come from the archive directory; the copy below enforces them too
+                        # in case the header lies (zip bombs)
+                        if member.file_size > self.max_file_bytes:
+                            add(f"{name}/{member.filename}", None, member.file_size)
+                            continue
+                        member_stored = os.path.join("files", f"{len(files):05d}{os.path.splitext(base)[1].lower()}")
+                        with archive.open(member) as source:
+                            member_size = self._copy(source, os.path.join(directory, member_stored), self.max_file_bytes)
+                        add(f"{name}/{member.filename}", member_stored, member_size)
+            except zipfile.BadZipFile:
+                files.append(IngestFile(len(files), name, "zip", os.path.getsize(path), None))
+                files[-1].status, files[-1].error, files[-1].finished_at = FAILED, "Invalid ZIP archive", time.time()
+            os.remove(path)
+        return files
+
+    @staticmethod
+    def _copy(source, target: str, limit: int) -> int:
+        """Copy up to `limit` bytes; returns the bytes read, which exceed `limit` if the copy stopped early."""
+        size = 0
+        with open(target, "wb") as out:
+            while True:
+                chunk = source.read(1024 * 1024)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > limit:
+                    # Stop copying - add() marks the file failed and removes the partial copy
+                    break
+                out.write(chunk)
+        return size
+
+    def create_job(self, job_id: str, directory: str, files: List[IngestFile]) -> IngestJob:
+        job = IngestJob(job_id, directory, time.time(), files)
+        manifest = {"id": job_id, "createdAt": job.created_at, "files": [f.manifest() for f in files]}
+        self._write_json(os.path.join(directory, "manifest.json"), manifest)
+        for f in files:
+            if f.status == FAILED:
+                self._log(job, f, at=f.finished_at)
+        self.jobs[job_id] = job
+        self._enqueue(job)
+        ingested_files.inc(sum(f.status == FAILED for f in files), outcome=FAILED, source="parsed")
+        return job
+
+    def discard_directory(self, directory: str):
+        shutil.rmtree(directory, ignore_errors=True)
+
+    # Queries
+
+    def get(self, job_id: str) -> Optional[IngestJob]:
+        return self.jobs.get(job_id)
+
+    def file_page(self, job: IngestJob, offset: int, limit: int, status: Optional[str] = None) -> Tuple[int, List[dict]]:
+        """(matching file count, page of file summaries with "result" for parsed files)."""
+        matching = [f for f in job.files if status is None or f.status == status]
+        page = []
+        for f in matching[offset:offset + limit]:
+            item = f.summary()
+            item["result"] = self._read_result(job, f) if f.status == DONE else None
+            page.append(item)
+        return len(matching), page
+
+    async def cancel(self, job_id: str) -> bool:
+        # jobs is only changed on the event loop - stats() and listings iterate it there
+        job = self.jobs.pop(job_id, None)
+        if job is None:
+            return False
+        # Workers skip files of cancelled jobs; files in flight finish and are dropped
+        job.cancelled = True
+        await asyncio.to_thread(self.discard_directory, job.directory)
+        return True
+
+    async def remove_expired(self):
+        if self.retention <= 0:
+            return
+        cutoff = time.time() - self.retention
+        for job in list(self.jobs.values()):
+            finished_at = job.summary()["finishedAt"]
+            if job.finished and finished_at and finished_at < cutoff:
+                await self.cancel(job.id)
+
+    def stats(self) -> dict:
+        counts = {status: 0 for status in STATUSES}
+        for job in self.jobs.values():
+            for status, count in job.counts().items():
+                counts[status] += count
+        return {
+            "jobs": len(self.jobs),
+            "activeJobs": sum(not job.finished for job in self.jobs.values()),
+            "files": counts,
+            "extractQueue": self._extract_queue.qsize() if self._extract_queue else 0,
+            "llmQueue": self._llm_queue.qsize() if self._llm_queue else 0,
+        }
+
+    # Workers
+
+    async def _extract_worker(self):
+        while True:
+            job, f = await self._extract_queue.get()
+            if job.cancelled:
+                continue
+            try:
+                path = self._file_path(job, f)
+                cache_key, cached = await self.lookup(path, f.ext)
+                if cached is not None:
+                    await self._finish(job, f, DONE, result=cached, llmUsed=True, cached=True)
+                    continue
+                self._set(job, f, EXTRACTING)
+                text, method = await self._extract_with_retry(path, f.ext)
+                if not (text or "").strip():
+                    await self._finish(job, f, FAILED, error="Could not extract text from file.", extractionMethod=method)
+                    continue
+                self._set(job, f, EXTRACTED, extractionMethod=method)
+                await self._llm_queue.put((job, f, text, cache_key))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Ingestion extraction error ({job.id} #{f.index} {f.name}): {e}")
+                await self._finish(job, f, FAILED, error=str(e) or type(e).__name__)
+
+    async def _extract_with_retry(self, path: str, ext: str):
+        while True:
+            try:
+                return await self.extract(path, ext)
+            except ExtractionQueueFull:
+                # Interactive uploads are using the pool - wait for room
+                await asyncio.sleep(1.0)
+
+    async def _llm_worker(self):
+        # This task's LLM calls queue behind interactive requests
+        llm_priority.set(BULK)
+        while True:
+            job, f, text, cache_key = await self._llm_queue.get()
+            if job.cancelled:
+                continue
+            try:
+                self._set(job, f, ENRICHING)
+                while True:
+                    try:
+                        parsed, llm_used = await self.enrich(text, cache_key)
+                        break
+                    except LLMOverloaded as e:
+                        await asyncio.sleep(e.retry_after)
+                await self._finish(job, f, DONE, result=parsed, llmUsed=llm_used)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Ingestion LLM error ({job.id} #{f.index} {f.name}): {e}")
+                await self._finish(job, f, FAILED, error=str(e) or type(e).__name__)
+
+    # Persistence
+
+    def _set(self, job: IngestJob, f: IngestFile, status: str, **fields):
+        # In-progress states are not logged: after a restart the file starts over from extraction
+        f.apply({"status": status, **fields})
+
+    async def _finish(self, job: IngestJob, f: IngestFile, status: str, result: Optional[dict] = None, **fields):
+        if job.cancelled:
+            return
+        if result is not None:
+            await asyncio.to_thread(self._write_json, self._result_path(job, f), result)
+        f.apply({"status": status, "at": time.time(), **fields})
+        self._log(job, f, at=f.finished_at)
+        ingested_files.inc(outcome=status, source="cache" if f.cached else "parsed")
+
+    def _log(self, job: IngestJob, f: IngestFile, at: Optional[float] = None):
+        event = {"i": f.index, "status": f.status, "at": at or time.time()}
+        for key, value in (("error", f.error), ("extractionMethod", f.extraction_method),
+                           ("llmUsed", f.llm_used), ("cached", f.cached or None)):
+            if value is not None:
+                event[key] = value
+        try:
+            with open(os.path.join(job.directory, "events.jsonl"), "a") as log:
+                log.write(json.dumps(event) + "\n")
+        except OSError as e:
+            if not job.cancelled:
+                print(f"Ingestion log write failed ({job.id}): {e}")
+
+    def _load_jobs(self) -> List[IngestJob]:
+        jobs = []
+        for job_id in os.listdir(self.directory):
+            directory = os.path.join(self.directory, job_id)
+            manifest_path = os.path.join(directory, "manifest.json")
+            if not os.path.isdir(directory):
+                continue
+            if not os.path.exists(manifest_path):
+                # Staging was interrupted before the job was created
+                self.discard_directory(directory)
+                continue
+            try:
+                with open(manifest_path) as mf:
+                    manifest = json.load(mf)
+                files = [IngestFile(m["index"], m["name"], m["ext"], m["size"], m["stored"]) for m in manifest["files"]]
+                events_path = os.path.join(directory, "events.jsonl")
+                if os.path.exists(events_path):
+                    with open(events_path) as log:
+                        for line in log:
+                            try:
+                                event = json.loads(line)
+                            except json.JSONDecodeError:
+                                continue  # torn last line from a crash
+                            files[event["i"]].apply(event)
+                jobs.append(IngestJob(manifest["id"], directory, manifest["createdAt"], files))
+            except Exception as e:
+                print(f"Skipping unreadable ingestion job {job_id}: {e}")
+        return jobs
+
+    def _file_path(self, job: IngestJob, f: IngestFile) -> str:
+        return os.path.join(job.directory, f.stored)
+
+    def _result_path(self, job: IngestJob, f: IngestFile) -> str:
+        return os.path.join(job.directory, "results", f"{f.index}.json")
+
+    def _read_result(self, job: IngestJob, f: IngestFile) -> Optional[dict]:
+        try:
+            with open(self._result_path(job, f)) as source:
+                return json.load(source)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    @staticmethod
+    def _write_json(path: str, data):
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as out:
+            json.dump(data, out)
+        os.replace(tmp, path)
@@ -0,0 +1,227 @@
+"""
+LLM output decoding
+
+One tolerant decoder for the JSON the model returns, shared by every
+endpoint. It skips markdown fences and leading prose, stops at the end of the
+first complete JSON value (ignoring trailing prose), unwraps JSON that was
+returned as a quoted string, and repairs output cut off mid-generation by
+closing open strings and containers - dropping the last incomplete member if
+needed. A truncated generation then still yields every field that made it
+out, instead of the whole multi-second call being thrown away.
+
+JSONStreamDecoder consumes streamed chunks incrementally (each character is
+scanned once) and reports as soon as the first value is complete.
+"""
+
+import json
+import re
+from typing import Any, Dict, List, Optional, Type
+
+from pydantic import BaseModel, ValidationError
+
+from metrics import llm_json_decodes, stage_seconds
+
+# How many cut points to try, newest first, when repairing truncated output
+_MAX_REPAIR_ATTEMPTS = 8
+
+_CLOSERS = {"{": "}", "[": "]"}
+_OPENER = re.compile(r"[{\[]")
+_STRING_SPECIAL = re.compile(r'["\\]')
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+
+
+class LLMOutputError(ValueError):
+    """The model output holds no usable JSON, or it does not fit the expected model."""
+
+
+class JSONStreamDecoder:
+    """
+    Incremental scanner for the first JSON object/array in a stream of text.
+
+        decoder = JSONStreamDecoder()
+        for chunk in chunks:
+            if decoder.feed(chunk):
+                break          # first value complete - the rest can be skipped
+        value = decoder.result()   # repaired if the stream ended early
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.start = -1         # index of the opening bracket of the first value
+        self.end = -1           # index just past its closing bracket
+        self._pos = 0
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        # (cut index, open containers at that point) - places the text can be cut and closed
+        self._cut_points: List[tuple] = []
+        self.repaired = False
+
+    @property
+    def complete(self) -> bool:
+        return self.end >= 0
+
+    def feed(self, chunk: str) -> bool:
+        """Add text; returns True once the first JSON value is complete."""
+        if self.complete:
+            return True
+        self.buffer += chunk
+        buf = self.buffer
+        i = self._pos
+        while i < len(buf):
+            if self.start < 0:
+                match = _OPENER.search(buf, i)
+                if match is None:
+                    break
+                i = match.start()
+                self.start = i
+                self._stack.append(buf[i])
+                self._cut_points.append((i + 1, buf[i]))
+                i += 1
+                continue
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                    i += 1
+                    continue
+                # Jump to the next quote or backslash instead of stepping through the string
+                match = _STRING_SPECIAL.search(buf, i)
+                if match is None:
+                    break
+                i = match.start()
+                if buf[i] == "\\":
+                    self._escape = True
+                else:
+                    self._in_string = False
+                i += 1
+                continue
+            ch = buf[i]
+            if ch == '"':
+                self._in_string = True
+            elif ch in _CLOSERS:
+                self._stack.append(ch)
+                self._cut_points.append((i + 1, "".join(self._stack)))
+            elif ch in "}]":
+                if self._stack:
+                    self._stack.pop()
+                if not self._stack:
+                    self.end = i + 1
+                    self._pos = i + 1
+                    return True
+                # A closed container is a complete member of its parent
+                self._cut_points.append((i + 1, "".join(self._stack)))
+            elif ch == ",":
+                self._cut_points.append((i, "".join(self._stack)))
+            i += 1
+        self._pos = len(buf)
+        return False
+
+    def text(self) -> str:
+        """The first JSON value as text (possibly incomplete)."""
+        if self.start < 0:
+            return ""
+        return self.buffer[self.start:self.end if self.complete else len(self.buffer)]
+
+    def _repairs(self):
+        """Candidate completions of a truncated value, most complete first."""
+        text = self.buffer[self.start:]
+        if self._in_string:
+            # Close the open string; a dangling escape would swallow the quote
+            tail = text[:-1] if self._escape else text
+            yield tail + '"' + "".join(_CLOSERS[c] for c in reversed(self._stack))
+        else:
+            yield text.rstrip().rstrip(",") + "".join(_CLOSERS[c] for c in reversed(self._stack))
+        for cut, stack in reversed(self._cut_points[-_MAX_REPAIR_ATTEMPTS:]):
+            yield self.buffer[self.start:cut] + "".join(_CLOSERS[c] for c in reversed(stack))
+
+    def result(self) -> Any:
+        """Decode the first value, repairing truncation. Raises LLMOutputError."""
+        if self.start < 0:
+            raise LLMOutputError("No JSON object in model output")
+        if self.complete:
+            text = self.text()
+            try:
+                return json.loads(text)
+            except json.JSONDecodeError as e:
+                error = e
+            try:
+                # Trailing commas ({"a": 1,}) are the usual culprit
+                value = json.loads(_TRAILING_COMMA.sub(r"\1", text))
+            except json.JSONDecodeError:
+                raise LLMOutputError(f"Malformed JSON in model output: {error}") from None
+            self.repaired = True
+            return value
+        for candidate in self._repairs():
+            try:
+                value = json.loads(candidate)
+            except json.JSONDecodeError:
+                continue
+            self.repaired = True
+            return value
+        raise LLMOutputError("Truncated JSON in model output could not be repaired")
+
+
+def _strip_fences(content: str) -> str:
+    return content.replace("```json", "").replace("```", "").strip()
+
+
+def decode_llm_json(content: str, _depth: int = 0) -> Any:
+    """Decode model output to a JSON value (see module docstring). Raises LLMOutputError."""
+    content = _strip_fences(content or "")
+    if content.startswith('"') and _depth < 2:
+        # The whole object returned as a JSON string literal
+        try:
+            inner = json.loads(content)
+        except json.JSONDecodeError:
+            inner = None
+        if isinstance(inner, str):
+            return decode_llm_json(inner, _depth + 1)
+    decoder = JSONStreamDecoder()
+    try:
+        with stage_seconds.time(stage="json_decode"):
+            decoder.feed(content)
+            value = decoder.result()
+    except LLMOutputError:
+        llm_json_decodes.inc(outcome="failed")
+        raise
+    llm_json_decodes.inc(outcome="repaired" if decoder.repaired else "ok")
+    return value
+
+
+def decode_llm_object(content: str) -> Dict[str, Any]:
+    """decode_llm_json, requiring a JSON object."""
+    value = decode_llm_json(content)
+    if not isinstance(value, dict):
+        raise LLMOutputError(f"Expected a JSON object, got {type(value).__name__}")
+    return value
+
+
+def validate_llm_output(data: Dict[str, Any], model: Type[BaseModel], defaults: Optional[Dict[str, Any]] = None) -> BaseModel:
+    """
+    Validate decoded model output against `model`. Fields the model left out
+    (or set to null) take their value from `defaults`.
+    """
+    fields = dict(defaults or {})
+    fields.update({key: value for key, value in data.items() if value is not None})
+    try:
+        return model.model_validate(fields)
+    except ValidationError as e:
+        raise LLMOutputError(f"Model output does not match {model.__name__}: {e.error_count()} errors") from None
+
+
+def parse_llm_output(content: str, model: Type[BaseModel], defaults: Optional[Dict[str, Any]] = None) -> BaseModel:
+    """Decode model output and validate it against `model` (see validate_llm_output)."""
+    return validate_llm_output(decode_llm_object(content), model, defaults)
+
+
+def validate_items(items: Any, model: Type[BaseModel]) -> List[dict]:
+    """Valid entries of a list from model output, as dicts; malformed entries are dropped."""
+    if not isinstance(items, list):
+        return []
+    valid = []
+    for item in items:
+        try:
+            valid.append(model.model_validate(item).model_dump())
+        except ValidationError:
+            continue
+    return valid
@@ -3,25 +3,89 @@ TalentX AI Service
 Resume parsing, embeddings, and AI-powered features
 """
 
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, UploadFile, File, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional
+import asyncio
 import os
 import json
-import httpx
-import io
 import re
-try:
-    import fitz # PyMuPDF
-    FITZ_AVAILABLE = True
-except ImportError:
-    FITZ_AVAILABLE = False
+import time
+
+import numpy as np
+
+from bias import bias_lexicon, locate_terms
+from cache import TieredCache, content_key, float32_codec, make_backend
+from chunking import POOLING_MODES, ChunkedEmbedding, combine, split_text
+from executor import ClientDisconnected, ExtractionQueueFull, extraction_executor
+from extraction import OCR_AVAILABLE, SUPPORTED_EXTENSIONS, SUPPORTED_IMAGES, extract_text_timed
+from hashing_embedder import hashing_embedder
+from ingestion import IngestLimitExceeded, IngestionManager
+from llm_json import (
+    JSONStreamDecoder,
+    LLMOutputError,
+    decode_llm_object,
+    parse_llm_output,
+    validate_items,
+    validate_llm_output,
+)
+from metrics import (
+    CONTENT_TYPE as METRICS_CONTENT_TYPE,
+    REGISTRY as metrics_registry,
+    fallbacks,
+    http_in_flight,
+    http_request_seconds,
+    http_requests,
+    observe_timings,
+    stage_seconds,
+    vector_search_seconds,
+)
+from matching import (
+    cosine_similarities,
+    fast_match_score,
+    prefilter_scores,
+    requirement_keywords,
+    skill_overlap_matrix,
+)
+from ollama_client import ollama
+from scheduler import BULK, PRIORITIES, LLMOverloaded, llm_priority, llm_scheduler
+from skills import skill_matcher
+from uploads import UPLOAD_MAX_BYTES, UploadTooLarge, file_sha256, spool_upload
+from vector_codec import block_headers, encode_block, media_type, negotiate
+from vector_index import VectorIndex
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One pooled Ollama client for the whole process
+    await ollama.start()
+    app.state.ollama = ollama
+    extraction_executor.start()
+    await ingestion.start()
+    await vector_index.start()
+    try:
+        yield
+    finally:
+        for task in list(match_refinements.values()):
+            task.cancel()
+        await vector_index.stop()
+        await ingestion.stop()
+        extraction_executor.shutdown()
+        await ollama.close()
+        await embedding_cache.close()
+        await parse_cache.close()
+        await match_cache.close()
+        await generation_cache.close()
+
 
 app = FastAPI(
     title="TalentX AI Service",
     description="AI-powered features for the TalentX ATS",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 # CORS Configuration
@@ -47,10 +111,87 @@ app.add_middleware(
     allow_origins=cors_origins,
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-    allow_headers=["Authorization", "Content-Type", "X-Requested-With"],
+    allow_headers=["Authorization", "Content-Type", "X-Requested-With", "X-LLM-Priority"],
 )
 
 
+# Reject uploads whose Content-Length is already over the limit before the
+# multipart body is read; chunked bodies are still capped while spooling
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+def upload_limit(path):
+    if path == "/parse-resume":
+        return UPLOAD_MAX_BYTES
+    if path == "/ingest":
+        return ingestion.max_job_bytes
+    return None
+
+
+@app.middleware("http")
+async def reject_oversized_uploads(request: Request, call_next):
+    limit = upload_limit(request.url.path) if request.method == "POST" else None
+    length = request.headers.get("content-length", "")
+    if limit is not None and length.isdigit() and int(length) > limit + MULTIPART_OVERHEAD:
+        return JSONResponse(
+            status_code=413,
+            content={"detail": f"Upload larger than {limit} bytes"},
+        )
+    return await call_next(request)
+
+
+# LLM priority: bulk endpoints default to the bulk queue; callers can override
+# per request with X-LLM-Priority: interactive | bulk
+BULK_PATHS = {"/match/rank", "/embeddings/batch"}
+
+
+@app.middleware("http")
+async def set_llm_priority(request: Request, call_next):
+    priority = request.headers.get("x-llm-priority", "").lower()
+    if priority not in PRIORITIES:
+        priority = BULK if request.url.path in BULK_PATHS else llm_priority.get()
+    token = llm_priority.set(priority)
+    try:
+        return await call_next(request)
+    finally:
+        llm_priority.reset(token)
+
+
+def metric_path(path):
+    # Label by route template (/ingest/{job_id}, not the raw URL); anything
+    # unrouted (404s, scanners) is folded into "unmatched" to keep label sets bounded
+    for route in app.routes:
+        regex = getattr(route, "path_regex", None)
+        if regex is not None and regex.match(path):
+            return route.path
+    return "unmatched"
+
+
+@app.middleware("http")
+async def record_http_metrics(request: Request, call_next):
+    path = metric_path(request.url.path)
+    status = 500
+    started = time.perf_counter()
+    http_in_flight.inc(path=path)
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        http_in_flight.dec(path=path)
+        http_request_seconds.observe(time.perf_counter() - started, path=path)
+        http_requests.inc(path=path, method=request.method, status=str(status))
+
+
+@app.exception_handler(LLMOverloaded)
+async def llm_overloaded_handler(request: Request, exc: LLMOverloaded):
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": f"AI service is busy ({exc}). Retry later."},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
 # Models
 class ParsedResume(BaseModel):
     firstName: Optional[str] = None
@@ -81,6 +222,13 @@ class JDGenerateResponse(BaseModel):
 
 class BiasCheckRequest(BaseModel):
     text: str
+    useLlm: bool = True  # False: lexicon only - instant spans for highlighting
+
+
+class LLMBiasIssue(BaseModel):
+    term: str
+    type: str = "Other"
+    suggestion: str = ""
 
 
 class BiasCheckResponse(BaseModel):
@@ -92,6 +240,8 @@ class BiasCheckResponse(BaseModel):
 class MatchRequest(BaseModel):
     resumeText: str
     jobDescription: str
+    # fast: deterministic only | llm: LLM, fast score if it fails | hybrid: fast now, LLM refines in the background
+    mode: Optional[str] = None
 
 
 class MatchResponse(BaseModel):
@@ -99,14 +249,78 @@ class MatchResponse(BaseModel):
     matchedSkills: list[str]
     missingSkills: list[str]
     summary: str
+    source: str = "llm"  # which scorer produced this result: "llm" or "fast"
+    refining: bool = False  # hybrid: an LLM score is being computed; ask again later
+
+
+class RankResume(BaseModel):
+    id: str
+    text: str
+
+
+class MatchRankRequest(BaseModel):
+    jobDescription: str
+    resumes: List[RankResume]
+    topK: int = 20  # how many of the best prefiltered candidates get an LLM score
+
+
+class RankedCandidate(BaseModel):
+    id: str
+    rank: int
+    score: float  # 0-100: LLM score when available, otherwise the prefilter score
+    prefilterScore: float
+    similarity: float
+    skillOverlap: float  # share of the job's skills found in the resume
+    matchedSkills: List[str]
+    missingSkills: List[str]
+    llmScore: Optional[float] = None
+    summary: Optional[str] = None
+
+
+class MatchRankResponse(BaseModel):
+    jobSkills: List[str]
+    embeddingModel: str
+    llmScored: int
+    candidates: List[RankedCandidate]
 
 
 class EmbeddingRequest(BaseModel):
     text: str
+    # Embed the whole text as overlapping chunks instead of truncating it
+    chunking: bool = False
+    pooling: Optional[str] = None  # mean (default), max, or chunks for per-chunk vectors
+
+
+class EmbeddingChunk(BaseModel):
+    start: int  # character offsets into the whitespace-normalized text
+    end: int
+    tokens: int  # estimated
+    embedding: List[float]
 
 
 class EmbeddingResponse(BaseModel):
     embedding: List[float]
+    truncated: bool = False
+    chunks: Optional[List[EmbeddingChunk]] = None  # pooling=chunks only
+
+
+class BatchEmbeddingRequest(BaseModel):
+    texts: List[str]
+    chunking: bool = False
+    pooling: Optional[str] = None
+
+
+class BatchEmbeddingItem(BaseModel):
+    index: int
+    embedding: Optional[List[float]] = None
+    truncated: bool = False
+    chunks: Optional[List[EmbeddingChunk]] = None
+    error: Optional[str] = None
+
+
+class BatchEmbeddingResponse(BaseModel):
+    model: str
+    embeddings: List[BatchEmbeddingItem]
 
 
 # Health check
@@ -115,19 +329,165 @@ async def health_check():
     return {"status": "ok", "service": "talentx-ai"}
 
 
+# Embedding cache - keyed by (model, normalized text). Vectors are kept as float32 arrays.
+embedding_cache = TieredCache(
+    "embeddings",
+    max_entries=int(os.getenv("EMBED_CACHE_MAX_ENTRIES", "5000")),
+    ttl=float(os.getenv("EMBED_CACHE_TTL", str(7 * 24 * 3600))),
+    backend=make_backend(
+        os.getenv("EMBED_CACHE_BACKEND", "redis" if os.getenv("REDIS_URL") else "memory"),
+        "embeddings",
+        redis_url=os.getenv("REDIS_URL"),
+    ),
+    codec=float32_codec,
+)
+
+
+# Unchunked inputs are cut here to stay inside the model's context
+EMBED_MAX_CHARS = 8000
+
+
+def normalize_embedding_text(text, max_chars=EMBED_MAX_CHARS):
+    # Collapse whitespace so re-saved text with different spacing hits the cache,
+    # and limit length to avoid issues with LLM context (None: no limit, for chunking)
+    return " ".join((text or "").split())[:max_chars]
+
+
+def embedding_pooling(pooling):
+    pooling = (pooling or "mean").lower()
+    if pooling not in POOLING_MODES:
+        raise HTTPException(status_code=400, detail=f"Unknown pooling '{pooling}'. Use one of: {', '.join(POOLING_MODES)}")
+    return pooling
+
+
+def chunk_models(result: ChunkedEmbedding):
+    return [
+        EmbeddingChunk(start=chunk.start, end=chunk.end, tokens=chunk.tokens, embedding=vector.tolist())
+        for chunk, vector in zip(result.chunks, result.chunk_vectors)
+    ]
+
+
+@app.get("/llm/queue")
+async def llm_queue_stats():
+    """LLM scheduler state: active calls and queue depth per model, admissions and waits per priority."""
+    return llm_scheduler.stats()
+
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return {
+        "embeddings": embedding_cache.stats(),
+        "parseResume": parse_cache.stats(),
+        "match": match_cache.stats(),
+        "generation": generation_cache.stats(),
+        "ollama": ollama.stats(),
+    }
+
+
+def service_metrics():
+    """Scrape-time gauges and counters from the scheduler, caches, extraction pool and Ollama client."""
+    scheduler = llm_scheduler.stats()
+    models = scheduler["models"]
+    priorities = scheduler["priorities"]
+    yield ("llm_active_calls", "LLM calls holding a scheduler slot, by model.", "gauge",
+           [({"model": model}, queue["active"]) for model, queue in models.items()])
+    yield ("llm_queued_calls", "LLM calls waiting for a scheduler slot, by model and priority.", "gauge",
+           [({"model": model, "priority": priority}, count)
+            for model, queue in models.items() for priority, count in queue["queued"].items()])
+    yield ("llm_rejected_total", "LLM calls rejected by admission control, by priority and reason.", "counter",
+           [({"priority": priority, "reason": "queue_full"}, stats["rejected"]) for priority, stats in priorities.items()]
+           + [({"priority": priority, "reason": "wait_limit"}, stats["timedOut"]) for priority, stats in priorities.items()])
+
+    caches = {
+        "embeddings": embedding_cache,
+        "parse_resume": parse_cache,
+        "match": match_cache,
+        "generation": generation_cache,
+    }
+    cache_stats = {name: cache.stats() for name, cache in caches.items()}
+    yield ("cache_lookups_total", "Cache lookups by cache and result (memory_hit, backend_hit, miss).", "counter",
+           [({"cache": name, "result": result}, stats[field])
+            for name, stats in cache_stats.items()
+            for result, field in (("memory_hit", "memoryHits"), ("backend_hit", "backendHits"), ("miss", "misses"))])
+    yield ("cache_entries", "Entries in the in-memory cache tier.", "gauge",
+           [({"cache": name}, stats["entries"]) for name, stats in cache_stats.items()])
+
+    extraction = extraction_executor.stats()
+    yield ("extraction_jobs_pending", "Extraction jobs queued or running in the process pool.", "gauge",
+           [({}, extraction["pending"])])
+    yield ("extraction_jobs_rejected_total", "Extraction jobs rejected because the queue was full.", "counter",
+           [({}, extraction["rejected"])])
+
+    ingest = ingestion.stats()
+    yield ("ingest_files", "Files in bulk ingestion jobs, by status.", "gauge",
+           [({"status": status}, count) for status, count in ingest["files"].items()])
+    yield ("ingest_active_jobs", "Bulk ingestion jobs with unfinished files.", "gauge", [({}, ingest["activeJobs"])])
+
+    vectors = vector_index.stats()
+    yield ("vector_index_tenants", "Tenant partitions in the vector index.", "gauge", [({}, vectors["tenants"])])
+    yield ("vector_index_vectors", "Vectors in the vector index, all tenants.", "gauge", [({}, vectors["vectors"])])
+
+    yield ("ollama_coalesced_total", "Ollama calls served by joining an identical in-flight call.", "counter",
+           [({}, ollama.stats()["coalesced"])])
+
+
+metrics_registry.add_collector(service_metrics)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics: stage latency histograms, fallbacks, in-flight gauges and Ollama token stats."""
+    return PlainTextResponse(metrics_registry.render(), media_type=METRICS_CONTENT_TYPE)
+
+
+def embedding_block_response(dtype, vectors, model_name, present=None):
+    """
+    Binary form of an embeddings response (see vector_codec) - 4x smaller
+    for float32 than JSON and no per-float formatting. Rows whose present
+    flag is 0 carry zeros; the JSON form has their error messages.
+    """
+    dim = next((len(vector) for vector in vectors if vector is not None), 0)
+    matrix = np.zeros((len(vectors), dim), dtype=np.float32)
+    for row, vector in enumerate(vectors):
+        if vector is not None:
+            matrix[row] = vector
+    if present is None:
+        present = [vector is not None for vector in vectors]
+    return Response(
+        content=encode_block(matrix, dtype, np.asarray(present, dtype=np.uint8)),
+        media_type=media_type(dtype),
+        headers={**block_headers(dtype, len(vectors), dim), "X-Embedding-Model": model_name},
+    )
+
+
 @app.post("/embeddings", response_model=EmbeddingResponse)
-async def get_embeddings(request: EmbeddingRequest):
+async def get_embeddings(request: EmbeddingRequest, http_request: Request):
     """
     Generate embeddings for text using Ollama or a fallback method.
+    Send Accept: application/x-embedding-float32 (or float16, int8) for a
+    binary body instead of JSON.
     """
+    binary = negotiate(http_request.headers.get("accept"))
     if not request.text:
         raise HTTPException(status_code=400, detail="No text provided")
 
-    # Limit text length to avoid issues with LLM context
-    text = request.text[:8000]
-    
+    if request.chunking:
+        return await get_chunked_embedding(request, binary)
+
+    text = normalize_embedding_text(request.text)
+    if not text:
+        raise HTTPException(status_code=400, detail="No text provided")
+    truncated = len(text) == EMBED_MAX_CHARS and len(normalize_embedding_text(request.text, None)) > EMBED_MAX_CHARS
+
     model_name = os.getenv("OLLAMA_EMBED_MODEL", "nomic-embed-text")
-    
+
+    cache_key = content_key("emb", model_name, text)
+    cached = await embedding_cache.get(cache_key)
+    if cached is not None:
+        if binary:
+            return embedding_block_response(binary, [cached], model_name)
+        return EmbeddingResponse(embedding=cached.tolist(), truncated=truncated)
+
     payload = {
         "model": model_name,
         "prompt": text
@@ -135,165 +495,223 @@ async def get_embeddings(request: EmbeddingRequest):
     
     try:
         # Attempt to use Ollama's embeddings API
-        async with httpx.AsyncClient() as client:
-            resp = await client.post(
-                "http://localhost:11434/api/embeddings",
-                json=payload,
-                timeout=15.0
-            )
-            resp.raise_for_status()
-            resp_json = resp.json()
-            
+        resp_json = await ollama.embeddings(payload)
+
         embedding = resp_json.get("embedding", [])
         if not embedding:
              # Some Ollama versions might return it differently or if the model isn't an embedding model
              raise ValueError("No embedding returned from Ollama")
-             
-        return EmbeddingResponse(embedding=embedding)
+
+        # Only model output is cached - fallback vectors are recomputed so recovery is picked up
+        vector = np.asarray(embedding, dtype=np.float32)
+        await embedding_cache.set(cache_key, vector)
+        if binary:
+            return embedding_block_response(binary, [vector], model_name)
+        return EmbeddingResponse(embedding=embedding, truncated=truncated)
         
+    except LLMOverloaded:
+        raise
     except Exception as e:
         print(f"Embedding Error (using fallback): {e}")
-        # Fallback: Generate a deterministic "pseudo-embedding" 
-        # based on character counts/hashes if AI service is totally down.
-        import hashlib
-        
-        # Create a 1536-dimension pseudo-embedding
-        pseudo_vec = []
-        for i in range(1536):
-            h = hashlib.md5((text + str(i)).encode()).hexdigest()
-            pseudo_vec.append(int(h, 16) / (16**32))
-            
-        return EmbeddingResponse(embedding=pseudo_vec)
+        fallbacks.inc(endpoint="embeddings")
+        # Fallback: offline feature-hashing embedder (same 1536 dims as the pgvector column)
+        vector = hashing_embedder.embed(text)
+        if binary:
+            return embedding_block_response(binary, [vector], "hashing")
+        return EmbeddingResponse(embedding=vector.tolist(), truncated=truncated)
 
 
-import re
-import io
-from PyPDF2 import PdfReader
-from docx import Document
-
-# OCR Support - optional dependencies
-try:
-    from PIL import Image
-    import pytesseract
-    OCR_AVAILABLE = True
-except ImportError:
-    OCR_AVAILABLE = False
-    print("Warning: OCR dependencies not installed. Install with: pip install pillow pytesseract")
-
-# ... (imports)
-
-# Helper functions
-def extract_text_from_pdf(file_content):
-    try:
-        # Try PyMuPDF (fitz) first as it's faster and more accurate
-        if FITZ_AVAILABLE:
+# Batch embeddings - inputs per Ollama /api/embed call, and how many calls run at once
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "32"))
+EMBED_BATCH_CONCURRENCY = int(os.getenv("EMBED_BATCH_CONCURRENCY", "4"))
+EMBED_BATCH_MAX_TEXTS = int(os.getenv("EMBED_BATCH_MAX_TEXTS", "2048"))
+
+
+async def embed_texts_with_ollama(texts, model_name, spread=False):
+    """
+    Embed unique texts with Ollama's multi-input API.
+    spread splits the texts evenly over as many calls as the scheduler runs
+    at once, instead of filling EMBED_BATCH_SIZE-input calls first - lower
+    latency for the chunks of one long document, at the cost of more calls.
+    Returns (vectors, errors): dicts keyed by text.
+    """
+    vectors = {}
+    errors = {}
+    batch_size = EMBED_BATCH_SIZE
+    if spread:
+        parallel = min(EMBED_BATCH_CONCURRENCY, llm_scheduler.max_concurrency)
+        batch_size = min(batch_size, max(1, -(-len(texts) // parallel)))
+    chunks = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+    semaphore = asyncio.Semaphore(EMBED_BATCH_CONCURRENCY)
+
+    async def embed_chunk(chunk):
+        async with semaphore:
             try:
-                doc = fitz.open(stream=file_content, filetype="pdf")
-                text = ""
-                for page in doc:
-                    text += page.get_text() + "\n"
-                doc.close()
-                if text.strip():
-                    return text
+                resp_json = await ollama.embed({"model": model_name, "input": chunk})
+                chunk_vectors = resp_json.get("embeddings", [])
+                if len(chunk_vectors) != len(chunk):
+                    raise ValueError(f"Expected {len(chunk)} embeddings, got {len(chunk_vectors)}")
+                for text, vector in zip(chunk, chunk_vectors):
+                    vectors[text] = vector
+            except LLMOverloaded:
+                raise
             except Exception as e:
-                print(f"fitz extraction failed: {e}")
-            
-        # Fallback to PyPDF2
-        reader = PdfReader(io.BytesIO(file_content))
-        text = ""
-        for page in reader.pages:
-            text += (page.extract_text() or "") + "\n"
-        return text
-    except Exception as e:
-        print(f"Error reading PDF: {e}")
-        return ""
+                print(f"Batch Embedding Error ({len(chunk)} texts): {e}")
+                for text in chunk:
+                    errors[text] = str(e) or type(e).__name__
+
+    await asyncio.gather(*(embed_chunk(chunk) for chunk in chunks))
+    return vectors, errors
 
-def extract_text_from_docx(file_content):
-    try:
-        doc = Document(io.BytesIO(file_content))
-        text = ""
-        for para in doc.paragraphs:
-            text += para.text + "\n"
-        return text
-    except Exception as e:
-        print(f"Error reading DOCX: {e}")
-        return ""
 
-def extract_text_from_image(file_content):
+async def embed_texts_cached(texts, model_name, spread=False):
     """
-    Extract text from image using OCR (Tesseract).
-    Supports JPG, PNG, TIFF, BMP, and other common image formats.
+    Embed unique, normalized texts - cache first, Ollama for the rest.
+    Returns (vectors, errors): dicts keyed by text, vectors as float32 arrays.
     """
-    if not OCR_AVAILABLE:
-        print("OCR not available - pytesseract/pillow not installed")
-        return ""
-    
-    try:
-        # Open image from bytes
-        image = Image.open(io.BytesIO(file_content))
-        
-        # Convert to RGB if necessary (for PNG with transparency)
-        if image.mode in ('RGBA', 'P'):
-            image = image.convert('RGB')
-        
-        # Pre-process image for better OCR results
-        # Convert to grayscale
-        image = image.convert('L')
-        
-        # Use Tesseract to extract text
-        # Config options for better resume parsing:
-        # --psm 1: Automatic page segmentation with OSD
-        # --oem 3: Default, based on what is available
-        custom_config = r'--oem 3 --psm 1'
-        text = pytesseract.image_to_string(image, config=custom_config)
-        
-        return text.strip()
-    except Exception as e:
-        print(f"Error performing OCR on image: {e}")
-        return ""
+    keys = {text: content_key("emb", model_name, text) for text in texts}
+    cached = await embedding_cache.get_many(keys.values())
+    vectors = {text: cached[key] for text, key in keys.items() if key in cached}
 
-def extract_text_from_scanned_pdf(file_content):
+    misses = [text for text in texts if text not in vectors]
+    fresh, errors = await embed_texts_with_ollama(misses, model_name, spread)
+    fresh = {text: np.asarray(vector, dtype=np.float32) for text, vector in fresh.items()}
+    await embedding_cache.set_many({keys[text]: vector for text, vector in fresh.items()})
+
+    vectors.update(fresh)
+    return vectors, errors
+
+
+async def embed_texts_chunked(texts, model_name, pooling="mean"):
     """
-    Extract text from scanned PDF using OCR.
-    First attempts regular text extraction, falls back to OCR if empty.
+    Embed whole texts as overlapping token-budgeted chunks (see chunking.py)
+    and pool each text's chunk vectors. Chunks of all texts are embedded
+    together and spread over concurrent Ollama calls, so a long document
+    costs about one call's latency. Chunks are cached individually.
+    Returns (results, errors): dicts keyed by text, results as ChunkedEmbedding.
     """
-    # Try regular extraction first
-    text = extract_text_from_pdf(file_content)
-    
-    # If text is very short or empty, it might be a scanned PDF
-    if len(text.strip()) < 100:
-        if not OCR_AVAILABLE:
-            print("Scanned PDF detected but OCR not available")
-            return text
-        
-        try:
-            # Convert PDF pages to images and OCR them
-            import fitz  # PyMuPDF
-            
-            pdf_document = fitz.open(stream=file_content, filetype="pdf")
-            ocr_text = ""
-            
-            for page_num in range(len(pdf_document)):
-                page = pdf_document[page_num]
-                # Render page to image
-                mat = fitz.Matrix(2, 2)  # 2x zoom for better quality
-                pix = page.get_pixmap(matrix=mat)
-                img_data = pix.tobytes("png")
-                
-                # OCR the image
-                page_text = extract_text_from_image(img_data)
-                ocr_text += page_text + "\n"
-            
-            pdf_document.close()
-            
-            if len(ocr_text.strip()) > len(text.strip()):
-                return ocr_text
-        except ImportError:
-            print("PyMuPDF not available for scanned PDF OCR")
-        except Exception as e:
-            print(f"Error OCRing scanned PDF: {e}")
-    
-    return text
+    splits = {}
+    for text in texts:
+        normalized = normalize_embedding_text(text, None)
+        if normalized:
+            splits[text] = split_text(normalized)
+    chunk_texts = list(dict.fromkeys(chunk.text for chunks, _ in splits.values() for chunk in chunks))
+    vectors, chunk_errors = await embed_texts_cached(chunk_texts, model_name, spread=True)
+
+    results, errors = {}, {}
+    for text in texts:
+        if text not in splits:
+            errors[text] = "No text provided"
+            continue
+        chunks, truncated = splits[text]
+        failed = next((chunk.text for chunk in chunks if chunk.text not in vectors), None)
+        if failed is not None:
+            # A vector for part of the document would silently misrepresent it
+            errors[text] = chunk_errors.get(failed, "Embedding failed")
+            continue
+        dims = {len(vectors[chunk.text]) for chunk in chunks}
+        if len(dims) > 1:
+            errors[text] = "Chunk embeddings have different dimensions"
+            continue
+        results[text] = combine(chunks, np.stack([vectors[chunk.text] for chunk in chunks]), truncated, pooling)
+    return results, errors
+
+
+async def get_chunked_embedding(request: EmbeddingRequest, binary: Optional[str]):
+    """/embeddings with chunking=true; falls back to the hashing embedder like the unchunked path."""
+    pooling = embedding_pooling(request.pooling)
+    model_name = os.getenv("OLLAMA_EMBED_MODEL", "nomic-embed-text")
+    results, errors = await embed_texts_chunked([request.text], model_name, pooling)
+    result = results.get(request.text)
+    if result is None:
+        text = normalize_embedding_text(request.text, None)
+        if not text:
+            raise HTTPException(status_code=400, detail="No text provided")
+        print(f"Embedding Error (using fallback): {errors.get(request.text)}")
+        fallbacks.inc(endpoint="embeddings")
+        chunks, truncated = split_text(text)
+        chunk_vectors = await asyncio.to_thread(lambda: np.stack([hashing_embedder.embed(chunk.text) for chunk in chunks]))
+        result, model_name = combine(chunks, chunk_vectors, truncated, pooling), "hashing"
+
+    if binary:
+        return embedding_block_response(binary, [result.vector], model_name)
+    return EmbeddingResponse(
+        embedding=result.vector.tolist(),
+        truncated=result.truncated,
+        chunks=chunk_models(result) if pooling == "chunks" else None,
+    )
+
+
+@app.post("/embeddings/batch", response_model=BatchEmbeddingResponse)
+async def get_embeddings_batch(request: BatchEmbeddingRequest, http_request: Request):
+    """
+    Generate embeddings for many texts in one request.
+    Identical inputs are embedded once; results come back in input order with per-item errors.
+    Accept: application/x-embedding-<dtype> returns one binary matrix instead.
+    chunking=true embeds whole texts as pooled chunks (per-chunk vectors are JSON only).
+    """
+    if not request.texts:
+        raise HTTPException(status_code=400, detail="No texts provided")
+    if len(request.texts) > EMBED_BATCH_MAX_TEXTS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many texts ({len(request.texts)}). Maximum is {EMBED_BATCH_MAX_TEXTS} per request."
+        )
+
+    model_name = os.getenv("OLLAMA_EMBED_MODEL", "nomic-embed-text")
+    binary = negotiate(http_request.headers.get("accept"))
+    if request.chunking:
+        return await get_chunked_embeddings_batch(request, model_name, binary)
+
+    # Same normalization and length limit as the single-text endpoint
+    texts = [normalize_embedding_text(text) for text in request.texts]
+    unique_texts = list(dict.fromkeys(t for t in texts if t))
+
+    vectors, errors = await embed_texts_cached(unique_texts, model_name)
+
+    if binary:
+        print(f"Batch embeddings: {len(texts)} texts, {len(unique_texts)} unique, {len(errors)} failed ({binary})")
+        return embedding_block_response(binary, [vectors.get(text) if text else None for text in texts], model_name)
+
+    items = []
+    for index, text in enumerate(texts):
+        if not text:
+            items.append(BatchEmbeddingItem(index=index, error="No text provided"))
+        elif text in vectors:
+            items.append(BatchEmbeddingItem(index=index, embedding=vectors[text].tolist()))
+        else:
+            items.append(BatchEmbeddingItem(index=index, error=errors.get(text, "Embedding failed")))
+
+    print(f"Batch embeddings: {len(texts)} texts, {len(unique_texts)} unique, {len(errors)} failed")
+    return BatchEmbeddingResponse(model=model_name, embeddings=items)
+
+
+async def get_chunked_embeddings_batch(request: BatchEmbeddingRequest, model_name: str, binary: Optional[str]):
+    pooling = embedding_pooling(request.pooling)
+    unique_texts = list(dict.fromkeys(request.texts))
+    results, errors = await embed_texts_chunked(unique_texts, model_name, pooling)
+    chunk_count = sum(len(result.chunks) for result in results.values())
+    print(f"Batch embeddings: {len(request.texts)} texts, {chunk_count} chunks, {len(errors)} failed (chunked)")
+
+    if binary:
+        return embedding_block_response(
+            binary, [results[text].vector if text in results else None for text in request.texts], model_name
+        )
+
+    items = []
+    for index, text in enumerate(request.texts):
+        result = results.get(text)
+        if result is None:
+            items.append(BatchEmbeddingItem(index=index, error=errors.get(text, "Embedding failed")))
+            continue
+        items.append(BatchEmbeddingItem(
+            index=index,
+            embedding=result.vector.tolist(),
+            truncated=result.truncated,
+            chunks=chunk_models(result) if pooling == "chunks" else None,
+        ))
+    return BatchEmbeddingResponse(model=model_name, embeddings=items)
+
 
 def extract_email(text):
     email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
@@ -315,19 +733,8 @@ def extract_name(text):
     return None
 
 def extract_skills(text):
-    # Simple keyword matching against a common list
-    common_skills = [
-        "Python", "Java", "JavaScript", "TypeScript", "React", "Angular", "Vue",
-        "Node.js", "HTML", "CSS", "SQL", "NoSQL", "PostgreSQL", "MongoDB",
-        "AWS", "Azure", "GCP", "Docker", "Kubernetes", "Git", "CI/CD",
-        "Agile", "Scrum", "Communication", "Leadership", "Management"
-    ]
-    found_skills = []
-    text_lower = text.lower()
-    for skill in common_skills:
-        if re.search(r'\b' + re.escape(skill.lower()) + r'\b', text_lower):
-            found_skills.append(skill)
-    return found_skills
+    # Single scan against the compiled skill taxonomy (see skills.py)
+    return skill_matcher.extract(text)
 
 async def extract_all_from_resume_llm(text):
     """
@@ -365,95 +772,77 @@ async def extract_all_from_resume_llm(text):
     }
     
     try:
-        async with httpx.AsyncClient() as client:
-            resp = await client.post(
-                "http://localhost:11434/api/chat",
-                json=payload,
-                timeout=60.0
-            )
-            resp.raise_for_status()
-            resp_json = resp.json()
+        resp_json = await ollama.chat(payload, endpoint="parse_resume")
             
         content = resp_json.get("message", {}).get("content", "")
-        content = content.replace("```json", "").replace("```", "").strip()
-        parsed = json.loads(content)
-        return parsed
+        return decode_llm_object(content)
+    except LLMOverloaded:
+        raise
     except Exception as e:
         print(f"LLM Combined Extraction Error: {e}")
+        fallbacks.inc(endpoint="parse_resume")
         return {}
 
-# Resume parsing
-@app.post("/parse-resume", response_model=ParsedResume)
-async def parse_resume(file: UploadFile = File(...)):
-    """
-    Parse a resume file (PDF, DOCX, or image) and extract structured data.
-    Supports OCR for image-based resumes (JPG, PNG, TIFF, BMP) and scanned PDFs.
-    """
-    if not file.filename:
-        raise HTTPException(status_code=400, detail="No file provided")
-    
-    ext = file.filename.lower().split(".")[-1]
-    supported_docs = ["pdf", "docx", "doc"]
-    supported_images = ["jpg", "jpeg", "png", "tiff", "tif", "bmp", "webp"]
-    
-    if ext not in supported_docs + supported_images:
-        raise HTTPException(
-            status_code=400, 
-            detail=f"Unsupported file type. Use PDF, DOCX, or image formats ({', '.join(supported_images)})."
-        )
-    
-    content = await file.read()
-    
-    text = ""
-    extraction_method = "text"
-    
-    if ext == "pdf":
-        # Try scanned PDF extraction (which includes OCR fallback)
-        text = extract_text_from_scanned_pdf(content)
-        if len(text.strip()) < 100:
-            extraction_method = "ocr"
-    elif ext in ["docx", "doc"]:
-        text = extract_text_from_docx(content)
-    elif ext in supported_images:
-        # Image-based resume - use OCR
-        if not OCR_AVAILABLE:
-            raise HTTPException(
-                status_code=400, 
-                detail="OCR not available. Please install pytesseract and pillow for image support."
-            )
-        text = extract_text_from_image(content)
-        extraction_method = "ocr"
-        print(f"OCR extracted {len(text)} characters from image")
-    
-    if not text:
-        raise HTTPException(status_code=400, detail="Could not extract text from file.")
+# Bump when text extraction or field merging changes so stale cached parses are ignored
+PARSER_VERSION = "3"
+
+# Parsed resumes keyed by SHA-256 of the uploaded bytes + extraction model/version.
+# PARSE_CACHE_BACKEND: memory | redis | disk
+parse_cache = TieredCache(
+    "parse-resume",
+    max_entries=int(os.getenv("PARSE_CACHE_MAX_ENTRIES", "500")),
+    ttl=float(os.getenv("PARSE_CACHE_TTL", str(30 * 24 * 3600))),
+    backend=make_backend(
+        os.getenv("PARSE_CACHE_BACKEND", "redis" if os.getenv("REDIS_URL") else "memory"),
+        "parse-resume",
+        redis_url=os.getenv("REDIS_URL"),
+        directory=os.getenv("PARSE_CACHE_DIR"),
+        max_bytes=int(os.getenv("PARSE_CACHE_DISK_MAX_BYTES", str(512 * 1024 * 1024))),
+        ttl=float(os.getenv("PARSE_CACHE_TTL", str(30 * 24 * 3600))),
+    ),
+)
 
-    # Combined LLM Extraction for speed and accuracy
-    print("Attempting combined LLM extraction...")
-    llm_data = await extract_all_from_resume_llm(text)
-    
-    # Merge LLM results with basic extractions
+
+def parse_cache_key(sha256, ext):
+    model_name = os.getenv("OLLAMA_MODEL", "llama3.2")
+    return content_key("parse", sha256, ext, model_name, PARSER_VERSION)
+
+
+def split_name(name_line):
+    if not name_line:
+        return "", ""
+    parts = name_line.split()
+    if len(parts) >= 2:
+        return parts[0], " ".join(parts[1:])
+    return name_line, ""
+
+def extract_basic_fields(text):
+    """Regex-only contact fields and skills - available as soon as text extraction finishes."""
+    first_name, last_name = split_name(extract_name(text))
+    return {
+        "firstName": first_name,
+        "lastName": last_name,
+        "email": extract_email(text),
+        "phone": extract_phone(text),
+        "skills": extract_skills(text),
+    }
+
+def merge_resume_fields(text, basic, llm_data):
+    """Merge LLM results over the regex extractions."""
     first_name = llm_data.get("firstName") or ""
     last_name = llm_data.get("lastName") or ""
     
     # Fallback to basic name extraction if LLM fails
     if not first_name and not last_name:
-        name_line = extract_name(text)
-        if name_line:
-            parts = name_line.split()
-            if len(parts) >= 2:
-                first_name = parts[0]
-                last_name = " ".join(parts[1:])
-            else:
-                first_name = name_line
+        first_name, last_name = basic["firstName"], basic["lastName"]
 
     # Contact details with regex fallbacks
-    email = llm_data.get("email") or extract_email(text)
-    phone = llm_data.get("phone") or extract_phone(text)
+    email = llm_data.get("email") or basic["email"]
+    phone = llm_data.get("phone") or basic["phone"]
     summary = llm_data.get("summary") or (text[:500].strip() + "..." if len(text) > 500 else text)
 
     # Skills merge
-    regex_skills = extract_skills(text)
+    regex_skills = basic["skills"]
     llm_skills = llm_data.get("skills", [])
     
     # Merge while maintaining uniqueness
@@ -461,7 +850,11 @@ async def parse_resume(file: UploadFile = File(...)):
     final_skills = list(regex_skills)
     
     for s in llm_skills:
-        if isinstance(s, str) and s.lower() not in all_skills_set:
+        if not isinstance(s, str):
+            continue
+        # Map LLM spellings ("React.js") onto the taxonomy's canonical names
+        s = skill_matcher.canonical(s) or s
+        if s.lower() not in all_skills_set:
             final_skills.append(s)
             all_skills_set.add(s.lower())
 
@@ -482,14 +875,609 @@ async def parse_resume(file: UploadFile = File(...)):
         rawText=text
     )
 
+async def extract_text_or_raise(request, filename, path, ext):
+    # PDF/DOCX/OCR work runs in the extraction process pool, off the event loop;
+    # the worker opens the spooled file itself, so no bytes cross the process boundary
+    try:
+        text, extraction_method, timings = await extraction_executor.run(
+            extract_text_timed, path, ext, request=request
+        )
+    except ExtractionQueueFull:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many resumes are being parsed right now. Please retry shortly.",
+            headers={"Retry-After": "5"},
+        )
+    except ClientDisconnected:
+        print(f"Client disconnected while parsing {filename}")
+        raise HTTPException(status_code=499, detail="Client disconnected")
 
-# JD Generation
-@app.post("/generate-jd", response_model=JDGenerateResponse)
-async def generate_job_description(request: JDGenerateRequest):
-    """Generate a job description using a local open-source LLM via Ollama."""
+    observe_timings(timings)
+    if not text:
+        raise HTTPException(status_code=400, detail="Could not extract text from file.")
+    return text, extraction_method
+
+async def enrich_resume(text, cache_key):
+    """Combined LLM extraction merged over the regex fields. Returns (ParsedResume, llm_used)."""
+    print("Attempting combined LLM extraction...")
+    llm_data = await extract_all_from_resume_llm(text)
+    parsed = merge_resume_fields(text, extract_basic_fields(text), llm_data)
+
+    # Don't pin a regex-only result when the LLM was unavailable
+    if llm_data:
+        await parse_cache.set(cache_key, parsed.model_dump())
+    return parsed, bool(llm_data)
+
+def ndjson_event(event, data, **extra):
+    return json.dumps({"event": event, "data": data, **extra}) + "\n"
+
+async def stream_parse_stages(text, extraction_method, cache_key):
+    """
+    Progressive /parse-resume results as NDJSON events:
+    text -> basic (regex contact fields + skills) -> result (LLM-enriched resume).
+    """
+    yield ndjson_event("text", {"rawText": text, "extractionMethod": extraction_method})
+
+    basic = extract_basic_fields(text)
+    yield ndjson_event("basic", basic)
+
+    print("Attempting combined LLM extraction...")
+    try:
+        llm_data = await extract_all_from_resume_llm(text)
+    except LLMOverloaded as e:
+        # Headers are already sent - finish with the regex-only result and a retry hint
+        parsed = merge_resume_fields(text, basic, {})
+        yield ndjson_event("result", parsed.model_dump(), cached=False, llmUsed=False, retryAfter=e.retry_after)
+        return
+    parsed = merge_resume_fields(text, basic, llm_data)
+    if llm_data:
+        await parse_cache.set(cache_key, parsed.model_dump())
+    yield ndjson_event("result", parsed.model_dump(), cached=False, llmUsed=bool(llm_data))
+
+
+# Resume parsing
+@app.post("/parse-resume", response_model=ParsedResume)
+async def parse_resume(
+    request: Request,
+    response: Response,
+    file: UploadFile = File(...),
+    refresh: bool = Query(False, description="Ignore any cached result and re-parse the file"),
+    stream: bool = Query(False, description="Stream progressive results as NDJSON events"),
+):
+    """
+    Parse a resume file (PDF, DOCX, or image) and extract structured data.
+    Supports OCR for image-based resumes (JPG, PNG, TIFF, BMP) and scanned PDFs.
+    Results are cached by file content; pass refresh=true to force a re-parse.
+    Files larger than UPLOAD_MAX_BYTES (20 MB by default) are rejected with 413.
+
+    With stream=true the response is application/x-ndjson with one event per
+    stage: "text" (raw text), "basic" (regex contact fields and skills) and
+    "result" (the full ParsedResume once LLM extraction finishes).
+    """
+    if not file.filename:
+        raise HTTPException(status_code=400, detail="No file provided")
+    
+    ext = file.filename.lower().split(".")[-1]
+    
+    if ext not in SUPPORTED_EXTENSIONS:
+        raise HTTPException(
+            status_code=400, 
+            detail=f"Unsupported file type. Use PDF, DOCX, or image formats ({', '.join(SUPPORTED_IMAGES)})."
+        )
+    
+    try:
+        with stage_seconds.time(stage="upload_read"):
+            upload = await asyncio.to_thread(spool_upload, file.file, f".{ext}")
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    finally:
+        await file.close()
+
+    with upload:
+        return await parse_spooled_resume(request, response, file.filename, upload, ext, refresh, stream)
+
+
+async def parse_spooled_resume(request, response, filename, upload, ext, refresh, stream):
+    # The spooled file is removed by parse_resume once this returns
+    cache_key = parse_cache_key(upload.sha256, ext)
+    if not refresh:
+        cached = await parse_cache.get(cache_key)
+        if cached is not None:
+            print(f"Parse cache hit for {filename}")
+            if stream:
+                return StreamingResponse(
+                    iter([ndjson_event("result", cached, cached=True, llmUsed=True)]),
+                    media_type="application/x-ndjson",
+                    headers={"X-Cache": "HIT"},
+                )
+            response.headers["X-Cache"] = "HIT"
+            return ParsedResume(**cached)
+    cache_status = "REFRESH" if refresh else "MISS"
+
+    if ext in SUPPORTED_IMAGES and not OCR_AVAILABLE:
+        raise HTTPException(
+            status_code=400, 
+            detail="OCR not available. Please install pytesseract and pillow for image support."
+        )
+
+    text, extraction_method = await extract_text_or_raise(request, filename, upload.path, ext)
+
+    if stream:
+        return StreamingResponse(
+            stream_parse_stages(text, extraction_method, cache_key),
+            media_type="application/x-ndjson",
+            headers={"X-Cache": cache_status},
+        )
+
+    parsed, _ = await enrich_resume(text, cache_key)
+    response.headers["X-Cache"] = cache_status
+    return parsed
+
+
+# Bulk ingestion - jobs of many resumes parsed in the background (see ingestion.py)
+async def ingest_extract(path, ext):
+    text, extraction_method, timings = await extraction_executor.run(extract_text_timed, path, ext)
+    observe_timings(timings)
+    return text, extraction_method
+
+
+async def ingest_lookup(path, ext):
+    cache_key = parse_cache_key(await asyncio.to_thread(file_sha256, path), ext)
+    return cache_key, await parse_cache.get(cache_key)
+
+
+async def ingest_enrich(text, cache_key):
+    parsed, llm_used = await enrich_resume(text, cache_key)
+    return parsed.model_dump(), llm_used
+
+
+ingestion = IngestionManager(extract=ingest_extract, lookup=ingest_lookup, enrich=ingest_enrich)
+
+
+class IngestJobResponse(BaseModel):
+    jobId: str
+    status: str  # queued | running | completed
+    createdAt: float
+    finishedAt: Optional[float] = None
+    total: int
+    counts: dict  # files per status: queued, extracting, extracted, enriching, done, failed
+    progress: float  # finished files / total
+
+
+class IngestFileResult(BaseModel):
+    index: int
+    name: str
+    size: int
+    status: str
+    error: Optional[str] = None
+    extractionMethod: Optional[str] = None
+    llmUsed: Optional[bool] = None
+    cached: bool = False
+    result: Optional[ParsedResume] = None
+
+
+class IngestFilesResponse(BaseModel):
+    jobId: str
+    total: int  # files matching the status filter
+    offset: int
+    limit: int
+    files: List[IngestFileResult]
+
+
+@app.post("/ingest", response_model=IngestJobResponse, status_code=202)
+async def create_ingest_job(files: List[UploadFile] = File(...)):
+    """
+    Queue many resumes (PDF, DOCX, images and/or ZIP archives of them) for
+    background parsing. Returns the job at once; poll GET /ingest/{jobId} for
+    progress and page through parsed resumes with GET /ingest/{jobId}/files.
+    Jobs survive a service restart and continue where they stopped.
+    """
+    job_id, directory = await asyncio.to_thread(ingestion.new_job_directory)
+    try:
+        uploads = []
+        for n, upload in enumerate(files):
+            name = upload.filename or f"file-{n}"
+            stored = os.path.join("files", f"upload-{n:05d}")
+            size = await asyncio.to_thread(ingestion.save_upload, upload.file, directory, name, stored)
+            uploads.append((name, stored, size))
+        staged = await asyncio.to_thread(ingestion.stage_files, directory, uploads)
+    except IngestLimitExceeded as e:
+        await asyncio.to_thread(ingestion.discard_directory, directory)
+        raise HTTPException(status_code=413, detail=str(e))
+    except Exception:
+        await asyncio.to_thread(ingestion.discard_directory, directory)
+        raise
+
+    if not staged:
+        await asyncio.to_thread(ingestion.discard_directory, directory)
+        raise HTTPException(status_code=400, detail="No files provided")
+
+    job = ingestion.create_job(job_id, directory, staged)
+    print(f"Ingestion job {job.id}: {len(staged)} files")
+    await ingestion.remove_expired()
+    return job.summary()
+
+
+@app.get("/ingest", response_model=List[IngestJobResponse])
+async def list_ingest_jobs():
+    return [job.summary() for job in sorted(ingestion.jobs.values(), key=lambda j: j.created_at, reverse=True)]
+
+
+def get_ingest_job_or_404(job_id):
+    job = ingestion.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Ingestion job not found")
+    return job
+
+
+@app.get("/ingest/{job_id}", response_model=IngestJobResponse)
+async def get_ingest_job(job_id: str):
+    return get_ingest_job_or_404(job_id).summary()
 
+
+@app.get("/ingest/{job_id}/files", response_model=IngestFilesResponse)
+async def get_ingest_files(
+    job_id: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+    status: Optional[str] = Query(None, description="Only files with this status, e.g. done or failed"),
+):
+    """Per-file status and errors, with the parsed resume for finished files."""
+    job = get_ingest_job_or_404(job_id)
+    total, page = await asyncio.to_thread(ingestion.file_page, job, offset, limit, status)
+    return IngestFilesResponse(jobId=job.id, total=total, offset=offset, limit=limit, files=page)
+
+
+@app.delete("/ingest/{job_id}")
+async def delete_ingest_job(job_id: str):
+    """Cancel a job (if still running) and delete its files and results."""
+    get_ingest_job_or_404(job_id)
+    await ingestion.cancel(job_id)
+    return {"jobId": job_id, "deleted": True}
+
+
+# Candidate vector index - per-tenant ANN search (see vector_index.py)
+vector_index = VectorIndex()
+
+VECTOR_UPSERT_MAX_ITEMS = int(os.getenv("VECTOR_UPSERT_MAX_ITEMS", "2048"))
+
+
+class VectorItem(BaseModel):
+    id: str
+    vector: Optional[List[float]] = None  # or text, embedded here with the embedding model
+    text: Optional[str] = None
+    metadata: Optional[dict] = None  # filterable fields, e.g. {"skills": [...], "location": "..."}
+
+
+class VectorUpsertRequest(BaseModel):
+    items: List[VectorItem]
+
+
+class VectorItemError(BaseModel):
+    id: str
+    error: str
+
+
+class VectorUpsertResponse(BaseModel):
+    tenantId: str
+    upserted: int
+    errors: List[VectorItemError] = []
+
+
+class VectorDeleteRequest(BaseModel):
+    ids: List[str]
+
+
+class VectorSearchRequest(BaseModel):
+    vector: Optional[List[float]] = None  # or text
+    text: Optional[str] = None
+    k: int = 20
+    minScore: float = 0.0
+    excludeIds: List[str] = []
+    filters: Optional[dict] = None  # metadata filters, e.g. {"skills": ["React"], "location": "Berlin"}
+    nprobe: Optional[int] = None  # IVF lists to probe; higher = better recall, slower
+
+
+class VectorSearchHit(BaseModel):
+    id: str
+    score: float
+    metadata: Optional[dict] = None
+
+
+class VectorSearchResponse(BaseModel):
+    tenantId: str
+    hits: List[VectorSearchHit]
+    exact: bool  # false when the search only probed the nearest IVF lists
+    tookMs: float
+
+
+async def embed_for_index(texts):
+    """
+    Model embeddings for index items and queries: whole texts, mean-pooled
+    over chunks - the same vectors /embeddings gives with chunking=true. No
+    hashing fallback: its vectors live in a different space and would poison
+    the index.
+    """
+    model_name = os.getenv("OLLAMA_EMBED_MODEL", "nomic-embed-text")
+    results, errors = await embed_texts_chunked(list(dict.fromkeys(texts)), model_name)
+    return {text: result.vector for text, result in results.items()}, errors
+
+
+@app.post("/vectors/{tenant_id}/upsert", response_model=VectorUpsertResponse)
+async def upsert_vectors(tenant_id: str, request: VectorUpsertRequest):
+    """
+    Add or replace candidate vectors in a tenant's index. Each item carries
+    either a vector or text to embed; items that fail are reported per id.
+    """
+    if not request.items:
+        raise HTTPException(status_code=400, detail="No items provided")
+    if len(request.items) > VECTOR_UPSERT_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many items ({len(request.items)}). Maximum is {VECTOR_UPSERT_MAX_ITEMS} per request."
+        )
+
+    errors = []
+    texts = [item.text for item in request.items if item.vector is None and item.text]
+    embedded, embed_errors = await embed_for_index(texts) if texts else ({}, {})
+
+    ids, vectors, metadata = [], [], []
+    for item in request.items:
+        vector = item.vector if item.vector is not None else embedded.get(item.text) if item.text else None
+        if vector is None:
+            errors.append(VectorItemError(id=item.id, error=embed_errors.get(item.text, "No vector or text provided")))
+            continue
+        ids.append(item.id)
+        vectors.append(vector)
+        metadata.append(item.metadata)
+
+    if ids:
+        try:
+            await vector_index.upsert(tenant_id, ids, np.asarray(vectors, dtype=np.float32), metadata)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    return VectorUpsertResponse(tenantId=tenant_id, upserted=len(ids), errors=errors)
+
+
+@app.post("/vectors/{tenant_id}/delete")
+async def delete_vectors(tenant_id: str, request: VectorDeleteRequest):
+    deleted = await vector_index.delete(tenant_id, request.ids)
+    return {"tenantId": tenant_id, "deleted": deleted}
+
+
+@app.post("/vectors/{tenant_id}/search", response_model=VectorSearchResponse)
+async def search_vectors(tenant_id: str, request: VectorSearchRequest):
+    """
+    Top-k most similar vectors in a tenant's index (cosine similarity), after
+    excludeIds and metadata filters. Query by vector or by text.
+    """
+    if request.k < 1 or request.k > 1000:
+        raise HTTPException(status_code=400, detail="k must be between 1 and 1000")
+    query = request.vector
+    if query is None:
+        if not request.text:
+            raise HTTPException(status_code=400, detail="Provide a vector or text")
+        embedded, errors = await embed_for_index([request.text])
+        if request.text not in embedded:
+            fallbacks.inc(endpoint="vectors_search")
+            raise HTTPException(status_code=503, detail=f"Could not embed query: {errors.get(request.text)}")
+        query = embedded[request.text]
+
+    started = time.perf_counter()
+    try:
+        hits, exact = await vector_index.search(
+            tenant_id, query, request.k,
+            min_score=request.minScore, exclude=request.excludeIds, filters=request.filters, nprobe=request.nprobe,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    took = time.perf_counter() - started
+    vector_search_seconds.observe(took, mode="exact" if exact else "ivf")
+    return VectorSearchResponse(
+        tenantId=tenant_id,
+        hits=[VectorSearchHit(id=item_id, score=score, metadata=metadata) for item_id, score, metadata in hits],
+        exact=exact,
+        tookMs=round(took * 1000, 3),
+    )
+
+
+@app.get("/vectors/{tenant_id}")
+async def get_vector_partition(tenant_id: str):
+    index = vector_index.partitions.get(tenant_id)
+    if index is None:
+        raise HTTPException(status_code=404, detail="No vectors indexed for this tenant")
+    return vector_index.partition_stats(index)
+
+
+@app.delete("/vectors/{tenant_id}")
+async def drop_vector_partition(tenant_id: str):
+    """Drop a tenant's whole partition, e.g. before a full re-sync."""
+    return {"tenantId": tenant_id, "deleted": await vector_index.drop(tenant_id)}
+
+
+class SkillExtractRequest(BaseModel):
+    text: str
+
+
+class SkillExtractResponse(BaseModel):
+    skills: List[str]
+    matches: List[dict]
+
+
+@app.post("/extract-skills", response_model=SkillExtractResponse)
+async def extract_skills_endpoint(request: SkillExtractRequest):
+    """
+    Find taxonomy skills in text. Returns canonical skill names plus every
+    mention with its character offsets (for highlighting).
+    """
+    matches = skill_matcher.find(request.text)
+    return SkillExtractResponse(
+        skills=list(dict.fromkeys(m.skill for m in matches)),
+        matches=[{"skill": m.skill, "start": m.start, "end": m.end, "text": m.text} for m in matches],
+    )
+
+
+# Generated content (JDs, rewrites, SEO tips, subject lines) keyed by endpoint,
+# model and the normalized request. GENERATION_CACHE_BACKEND: memory | redis | disk
+GENERATION_CACHE_TTLS = {
+    "generate_jd": 24 * 3600,
+    "optimize_jd": 24 * 3600,
+    "suggest_seo": 24 * 3600,
+    "subject_lines": 7 * 24 * 3600,
+}
+
+generation_cache = TieredCache(
+    "generation",
+    max_entries=int(os.getenv("GENERATION_CACHE_MAX_ENTRIES", "1000")),
+    backend=make_backend(
+        os.getenv("GENERATION_CACHE_BACKEND", "redis" if os.getenv("REDIS_URL") else "memory"),
+        "generation",
+        redis_url=os.getenv("REDIS_URL"),
+        directory=os.getenv("GENERATION_CACHE_DIR"),
+        ttl=float(os.getenv("GENERATION_CACHE_DISK_TTL", str(7 * 24 * 3600))),
+    ),
+)
+
+
+def generation_ttl(endpoint):
+    # e.g. GENERATION_CACHE_TTL_SUBJECT_LINES=3600; 0 disables caching for that endpoint
+    return float(os.getenv(f"GENERATION_CACHE_TTL_{endpoint.upper()}", str(GENERATION_CACHE_TTLS[endpoint])))
+
+
+def normalize_request_fields(value):
+    if isinstance(value, str):
+        return " ".join(value.split())
+    if isinstance(value, list):
+        return [normalize_request_fields(item) for item in value]
+    if isinstance(value, dict):
+        return {key: normalize_request_fields(item) for key, item in value.items()}
+    return value
+
+
+def generation_cache_key(endpoint, request):
     model_name = os.getenv("OLLAMA_MODEL", "llama3.2")
+    fields = json.dumps(normalize_request_fields(request.model_dump()), sort_keys=True)
+    return content_key("gen", endpoint, model_name, fields)
+
+
+async def cached_generation(cache_key, response, refresh):
+    """Cached response for the key (unless refresh), setting the X-Cache header either way."""
+    if refresh:
+        response.headers["X-Cache"] = "REFRESH"
+        return None
+    cached = await generation_cache.get(cache_key)
+    response.headers["X-Cache"] = "HIT" if cached is not None else "MISS"
+    return cached
+
+
+async def store_generation(endpoint, cache_key, result):
+    # Only LLM output is stored - fallbacks are retried on the next request
+    ttl = generation_ttl(endpoint)
+    if ttl > 0:
+        await generation_cache.set(cache_key, result.model_dump(), ttl)
+
+
+# Server-sent events for the generative endpoints
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
 
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class ClosingStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse that closes its async generators however the response
+    ends - including a client that is gone before Starlette starts iterating
+    the body, where the body's own finally never runs.
+    """
+
+    def __init__(self, content, *generators, **kwargs):
+        super().__init__(content, **kwargs)
+        self.generators = (content, *generators)
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            # Shielded so a cancelled request still finishes closing (and frees its LLM slot)
+            await asyncio.shield(self.close())
+
+    async def close(self):
+        # Body first: closing it while it awaits a generator closes that generator too
+        for generator in self.generators:
+            await generator.aclose()
+
+
+def cached_sse(cached, response):
+    return StreamingResponse(
+        iter([sse_event("result", {**cached, "cached": True})]),
+        media_type="text/event-stream",
+        headers={**SSE_HEADERS, "X-Cache": response.headers["X-Cache"]},
+    )
+
+
+async def stream_generation(endpoint, payload, parse, fallback, cache_key, response):
+    """
+    Stream an LLM generation as server-sent events: a "token" event per
+    content delta, then one "result" event with the parsed response - the
+    same shape the JSON endpoint returns. If generation fails midway an
+    "error" event is followed by the fallback result ("fallback": true).
+
+    The first chunk is awaited before the response starts, so an overloaded
+    queue still gets a 429/503. That holds an LLM slot, so the chunk stream is
+    closed whenever the response ends - a client disconnect closes the Ollama
+    connection and stops the generation, even before the body is sent.
+    """
+    chunks = ollama.chat_stream(payload, endpoint)
+    first_error = None
+    try:
+        first = await anext(chunks, None)
+    except LLMOverloaded:
+        await chunks.aclose()
+        raise
+    except Exception as e:
+        first, first_error = None, e
+
+    async def events():
+        decoder = JSONStreamDecoder()
+        try:
+            if first_error is not None:
+                raise first_error
+            chunk = first
+            while chunk is not None:
+                delta = chunk.get("message", {}).get("content", "")
+                if delta:
+                    yield sse_event("token", {"content": delta})
+                    if decoder.feed(delta):
+                        # The JSON object is complete - anything after it is not needed
+                        break
+                chunk = await anext(chunks, None)
+            result = parse(decoder.buffer)
+            await store_generation(endpoint, cache_key, result)
+            yield sse_event("result", {**result.model_dump(), "cached": False})
+        except Exception as e:
+            print(f"Streaming {endpoint} error: {e}")
+            fallbacks.inc(endpoint=endpoint)
+            yield sse_event("error", {"detail": str(e) or type(e).__name__})
+            yield sse_event("result", {**fallback().model_dump(), "cached": False, "fallback": True})
+        finally:
+            await chunks.aclose()
+
+    try:
+        return ClosingStreamingResponse(
+            events(),
+            chunks,
+            media_type="text/event-stream",
+            headers={**SSE_HEADERS, "X-Cache": response.headers["X-Cache"]},
+        )
+    except BaseException:
+        await chunks.aclose()
+        raise
+
+
+# JD Generation
+def jd_prompt_fields(request):
     skills_str = ", ".join(request.skills) if request.skills else "(any relevant technologies and tools)"
     
     experience_str = request.experience or "3+ years of relevant experience"
@@ -498,6 +1486,12 @@ async def generate_job_description(request: JDGenerateRequest):
         experience_str = f"{experience_str} years"
 
     department_str = request.department or "Engineering"
+    return skills_str, experience_str, department_str
+
+
+def job_description_payload(request):
+    model_name = os.getenv("OLLAMA_MODEL", "llama3.2")
+    skills_str, experience_str, department_str = jd_prompt_fields(request)
 
     system_prompt = (
         "You are an expert HR and hiring manager assistant. "
@@ -529,88 +1523,108 @@ async def generate_job_description(request: JDGenerateRequest):
             {"role": "user", "content": user_prompt},
         ],
     }
+    return payload
 
+
+def parse_job_description(content):
+    """Turn the model's JSON output into a JDGenerateResponse, tolerating the usual quirks."""
     try:
-        async with httpx.AsyncClient() as client:
-            resp = await client.post(
-                "http://localhost:11434/api/chat",
-                json=payload,
-                timeout=60.0
-            )
-            resp.raise_for_status()
-            resp_json = resp.json()
+        parsed = decode_llm_object(content)
+    except LLMOutputError:
+        # No JSON at all - keep the generated prose as the description
+        return JDGenerateResponse(
+            description=(content or "").strip(),
+            requirements="",
+            responsibilities="",
+            skills=[]
+        )
 
-        message = resp_json.get("message", {})
-        content = message.get("content", "")
+    # Handle the double-encoding case where the whole object comes back as a string in 'description'
+    description = parsed.get("description", "")
+    if isinstance(description, str) and description.strip().startswith('{') and "requirements" in description:
+        try:
+            parsed = decode_llm_object(description)
+        except LLMOutputError:
+            pass
+
+    return validate_llm_output(
+        parsed,
+        JDGenerateResponse,
+        defaults={"description": "", "requirements": "", "responsibilities": "", "skills": []},
+    )
 
-        # Clean markdown code blocks if present (just in case)
-        content = content.replace("```json", "").replace("```", "").strip()
 
-        # Parse JSON
-        try:
-            parsed = json.loads(content)
-        except json.JSONDecodeError:
-            # Try to rescue if it's just wrapped in quotes
-            try:
-                if content.startswith('"') and content.endswith('"'):
-                     parsed = json.loads(json.loads(content))
-                else:
-                     raise
-            except:
-                return JDGenerateResponse(
-                    description=content or "",
-                    requirements="",
-                    responsibilities="",
-                    skills=[]
-                )
+async def write_job_description(request):
+    """Generate a job description with the LLM. Raises if Ollama is unavailable."""
+    resp_json = await ollama.chat(job_description_payload(request), endpoint="generate_jd")
+    content = resp_json.get("message", {}).get("content", "")
+    return parse_job_description(content)
 
-        # Handle simplified/nested cases where LLM might just return one big string in 'description'
-        description = parsed.get("description", "")
-        # Check if description itself is a JSON string (double encoding issue)
-        if isinstance(description, str) and description.strip().startswith('{') and "requirements" in description:
-             try:
-                 inner = json.loads(description)
-                 return JDGenerateResponse(
-                     description=inner.get("description", ""),
-                     requirements=inner.get("requirements", ""),
-                     responsibilities=inner.get("responsibilities", ""),
-                     skills=inner.get("skills", [])
-                 )
-             except:
-                 pass
 
-        return JDGenerateResponse(
-            description=description,
-            requirements=parsed.get("requirements", ""),
-            responsibilities=parsed.get("responsibilities", ""),
-            skills=parsed.get("skills", [])
+def fallback_job_description(request):
+    # If the local LLM is unavailable, fall back to a simple deterministic template
+    skills_str, experience_str, _ = jd_prompt_fields(request)
+    fallback_description = (
+        f"We are hiring a {request.title} to join our team. "
+        f"You will work with {skills_str} and partners across the business "
+        f"to deliver high-quality outcomes."
+    )
+    fallback_requirements = (
+        f"- {experience_str}\n"
+        f"- Hands-on experience with {skills_str}\n"
+        "- Strong communication and collaboration skills"
+    )
+    fallback_responsibilities = (
+        f"- Own key initiatives as a {request.title}\n"
+        "- Collaborate with cross-functional teams\n"
+        "- Continuously improve processes and quality"
+    )
+
+    return JDGenerateResponse(
+        description=fallback_description,
+        requirements=fallback_requirements,
+        responsibilities=fallback_responsibilities,
+        skills=request.skills
+    )
+
+
+@app.post("/generate-jd", response_model=JDGenerateResponse)
+async def generate_job_description(
+    request: JDGenerateRequest,
+    response: Response,
+    refresh: bool = Query(False, description="Ignore any cached result and generate a new one"),
+    stream: bool = Query(False, description="Stream tokens as server-sent events"),
+):
+    """
+    Generate a job description using a local open-source LLM via Ollama.
+    With stream=true the response is text/event-stream (see stream_generation).
+    """
+    cache_key = generation_cache_key("generate_jd", request)
+    cached = await cached_generation(cache_key, response, refresh)
+    if cached is not None:
+        return cached_sse(cached, response) if stream else JDGenerateResponse(**cached)
+
+    if stream:
+        return await stream_generation(
+            "generate_jd",
+            job_description_payload(request),
+            parse_job_description,
+            lambda: fallback_job_description(request),
+            cache_key,
+            response,
         )
 
+    try:
+        result = await write_job_description(request)
+    except LLMOverloaded:
+        raise
     except Exception as e:
         print(f"Ollama Error: {e}")
-        # If the local LLM is unavailable, fall back to a simple deterministic template
-        fallback_description = (
-            f"We are hiring a {request.title} to join our team. "
-            f"You will work with {skills_str} and partners across the business "
-            f"to deliver high-quality outcomes."
-        )
-        fallback_requirements = (
-            f"- {experience_str}\n"
-            f"- Hands-on experience with {skills_str}\n"
-            "- Strong communication and collaboration skills"
-        )
-        fallback_responsibilities = (
-            f"- Own key initiatives as a {request.title}\n"
-            "- Collaborate with cross-functional teams\n"
-            "- Continuously improve processes and quality"
-        )
+        fallbacks.inc(endpoint="generate_jd")
+        return fallback_job_description(request)
 
-        return JDGenerateResponse(
-            description=fallback_description,
-            requirements=fallback_requirements,
-            responsibilities=fallback_responsibilities,
-            skills=request.skills
-        )
+    await store_generation("generate_jd", cache_key, result)
+    return result
 
 
 # Bias detection
@@ -619,130 +1633,75 @@ async def check_bias(request: BiasCheckRequest):
     """
     Analyze text for potentially biased or non-inclusive language using LLM.
     """
-    issues = []
     suggestions = []
-    
-    # Expanded list of problematic terms for fallback/fast checking
-    # Format: term -> (Issue Type, Replacement Suggestion)
-    problematic_terms = {
-        # Gender-coded (Masculine)
-        "ninja": ("Gender-coded (Masculine)", "specialist"),
-        "rockstar": ("Gender-coded (Masculine)", "high performer"),
-        "guru": ("Gender-coded (Masculine)", "expert"),
-        "hacker": ("Gender-coded (Masculine)", "engineer"),
-        "superhero": ("Gender-coded (Masculine)", "problem solver"),
-        "manpower": ("Gender-coded (Masculine)", "workforce"),
-        "mankind": ("Gender-coded (Masculine)", "humanity"),
-        "chairman": ("Gender-coded (Masculine)", "chairperson"),
-        "brotherhood": ("Gender-coded (Masculine)", "community"),
-        "guys": ("Gender-coded (Masculine)", "everyone/team"),
-        "salesman": ("Gender-coded (Masculine)", "salesperson"),
-        "he": ("Gender-specific pronoun", "they"),
-        "him": ("Gender-specific pronoun", "them"),
-        "his": ("Gender-specific pronoun", "their"),
-        
-        # Gender-coded (Feminine) - context dependent, but often flagged
-        "nurture": ("Gender-coded (Feminine)", "mentor/develop"),
-        "supportive": ("Gender-coded (Feminine)", "helpful"),
-        
-        # Ageism
-        "young": ("Possible Ageism", "energetic/early-career"),
-        "digital native": ("Ageism", "tech-savvy"),
-        "recent graduate": ("Possible Ageism", "entry-level"),
-        "fresh graduate": ("Possible Ageism", "entry-level"),
-        "energetic": ("Possible Ageism", "motivated"),
-        
-        # Ableism
-        "blind to": ("Ableism", "unaware of"),
-        "turn a blind eye": ("Ableism", "ignore"),
-        "cripple": ("Ableism", "impair/hinder"),
-        "sanity check": ("Ableism", "completeness check"),
-        "dummy": ("Ableism", "sample/placeholder"),
-        
-        # Exclusivity / Other
-        "native english": ("Exclusivity", "fluent in English"),
-        "master": ("Non-inclusive", "primary/expert"),
-        "slave": ("Non-inclusive", "secondary/replica"),
-        "blacklist": ("Non-inclusive", "blocklist"),
-        "whitelist": ("Non-inclusive", "allowlist"),
-        "tribe": ("Cultural appropriation", "team/squad"),
-        "pow wow": ("Cultural appropriation", "meeting"),
-        "spirit animal": ("Cultural appropriation", "favorite"),
-    }
-    
-    text_lower = request.text.lower()
-    
-    # Use regex to find whole words only
-    for term, (issue_type, suggestion) in problematic_terms.items():
-        # Escape the term for regex, but allow for simple variations if needed
-        # Using word boundaries \b
-        pattern = r'\b' + re.escape(term) + r'\b'
-        if re.search(pattern, text_lower):
-             issues.append({
-                "term": term,
-                "type": issue_type,
-                "suggestion": suggestion
-            })
-    
+
+    # Deterministic pass: every lexicon occurrence with its character offsets
+    issues = bias_lexicon.scan(request.text)
+
     # Use LLM for deeper analysis if available
     llm_was_used = False
-    try:
-        print("Attempting LLM bias check...")
-        model_name = os.getenv("OLLAMA_MODEL", "llama3.2")
+    # useLlm=False: lexicon only, for instant highlighting
+    if request.useLlm:
+        try:
+            print("Attempting LLM bias check...")
+            model_name = os.getenv("OLLAMA_MODEL", "llama3.2")
         
-        system_prompt = (
-            "You are an expert Diversity, Equity, and Inclusion (DEI) consultant. "
-            "Analyze the provided job description text for biased, non-inclusive, gender-coded, or ageist language. "
-            "Return ONLY a JSON object with a key 'issues' which is a list of objects. "
-            "Each object in 'issues' must have: 'term' (the problematic word/phrase found), "
-            "'type' (e.g., 'Gender-coded', 'Ageism', 'Ableism', 'Exclusive'), and "
-            "'suggestion' (a better alternative). "
-            "Also include a 'score' (0-100, where 100 is perfectly inclusive) and 'suggestions' (list of general strings). "
-            "If no issues are found, return empty lists."
-        )
+            system_prompt = (
+                "You are an expert Diversity, Equity, and Inclusion (DEI) consultant. "
+                "Analyze the provided job description text for biased, non-inclusive, gender-coded, or ageist language. "
+                "Return ONLY a JSON object with a key 'issues' which is a list of objects. "
+                "Each object in 'issues' must have: 'term' (the problematic word/phrase found), "
+                "'type' (e.g., 'Gender-coded', 'Ageism', 'Ableism', 'Exclusive'), and "
+                "'suggestion' (a better alternative). "
+                "Also include a 'score' (0-100, where 100 is perfectly inclusive) and 'suggestions' (list of general strings). "
+                "If no issues are found, return empty lists."
+            )
         
-        user_prompt = f"Text to analyze:\n{request.text[:4000]}\n\nReturn JSON."
+            user_prompt = f"Text to analyze:\n{request.text[:4000]}\n\nReturn JSON."
         
-        payload = {
-            "model": model_name,
-            "stream": False,
-            "format": "json",
-            "messages": [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
-            ],
-        }
+            payload = {
+                "model": model_name,
+                "stream": False,
+                "format": "json",
+                "messages": [
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt},
+                ],
+            }
     
-        async with httpx.AsyncClient() as client:
-            resp = await client.post(
-                "http://localhost:11434/api/chat",
-                json=payload,
-                timeout=30.0
-            )
-            resp.raise_for_status()
-            resp_json = resp.json()
+            resp_json = await ollama.chat(payload, endpoint="check_bias")
             
-        content = resp_json.get("message", {}).get("content", "")
-        content = content.replace("```json", "").replace("```", "").strip()
-        parsed = json.loads(content)
+            content = resp_json.get("message", {}).get("content", "")
+            parsed = decode_llm_object(content)
         
-        llm_issues = parsed.get("issues", [])
+            # Malformed entries are dropped instead of failing the whole LLM pass
+            llm_issues = validate_items(parsed.get("issues", []), LLMBiasIssue)
         
-        # Merge LLM issues with hardcoded ones
-        for issue in llm_issues:
-            if not any(i['term'].lower() == issue['term'].lower() for i in issues):
-                issues.append(issue)
+            # Merge LLM issues with lexicon ones, locating the new terms in the text
+            known_terms = {i['term'].lower() for i in issues}
+            new_issues = []
+            for issue in llm_issues:
+                if issue['term'].lower() not in known_terms:
+                    known_terms.add(issue['term'].lower())
+                    new_issues.append(issue)
+            spans = locate_terms(request.text, [issue['term'] for issue in new_issues])
+            for issue in new_issues:
+                occurrences = spans.get(issue['term'], [])
+                issues.append({**issue, "count": len(occurrences), "occurrences": occurrences})
                 
-        llm_suggestions = parsed.get("suggestions", [])
-        for sugg in llm_suggestions:
-            if sugg not in suggestions:
-                suggestions.append(sugg)
+            llm_suggestions = parsed.get("suggestions", [])
+            if not isinstance(llm_suggestions, list):
+                llm_suggestions = []
+            for sugg in filter(lambda item: isinstance(item, str), llm_suggestions):
+                if sugg not in suggestions:
+                    suggestions.append(sugg)
         
-        llm_score = float(parsed.get("score", 100))
-        llm_was_used = True
+            llm_score = float(parsed.get("score", 100))
+            llm_was_used = True
         
-    except Exception as e:
-        print(f"LLM Bias Check Error (using fallback): {e}")
+        except Exception as e:
+            print(f"LLM Bias Check Error (using fallback): {e}")
+            fallbacks.inc(endpoint="check_bias")
     
     # Generate suggestions for hardcoded issues if LLM didn't provide them or for mixed results
     for issue in issues:
@@ -766,16 +1725,13 @@ async def check_bias(request: BiasCheckRequest):
 
 
 # Candidate-Job matching
-@app.post("/match", response_model=MatchResponse)
-async def match_candidate_to_job(request: MatchRequest):
-    """
-    Calculate match score between a resume and job description using LLM.
-    """
+async def llm_match(resume_text, jd_text):
+    """Score one resume against one job description with the LLM. Raises on failure."""
     model_name = os.getenv("OLLAMA_MODEL", "llama3.2")
     
     # Truncate to avoid context limits
-    resume_text = request.resumeText[:4000]
-    jd_text = request.jobDescription[:4000]
+    resume_text = resume_text[:4000]
+    jd_text = jd_text[:4000]
     
     system_prompt = (
         "You are an expert technical recruiter and hiring manager. "
@@ -798,38 +1754,249 @@ async def match_candidate_to_job(request: MatchRequest):
         ],
     }
     
+    resp_json = await ollama.chat(payload, endpoint="match")
+        
+    content = resp_json.get("message", {}).get("content", "")
+    result = parse_llm_output(
+        content,
+        MatchResponse,
+        defaults={"score": 0.0, "matchedSkills": [], "missingSkills": [], "summary": "Analysis failed."},
+    )
+    result.source, result.refining = "llm", False
+    return result
+
+
+MATCH_MODES = ("fast", "llm", "hybrid")
+MATCH_DEFAULT_MODE = os.getenv("MATCH_DEFAULT_MODE", "llm")
+
+# LLM match results keyed by (model, job description, resume); hybrid mode fills it in the background
+match_cache = TieredCache(
+    "match",
+    max_entries=int(os.getenv("MATCH_CACHE_MAX_ENTRIES", "2000")),
+    ttl=float(os.getenv("MATCH_CACHE_TTL", str(7 * 24 * 3600))),
+    backend=make_backend(
+        os.getenv("MATCH_CACHE_BACKEND", "redis" if os.getenv("REDIS_URL") else "memory"),
+        "match",
+        redis_url=os.getenv("REDIS_URL"),
+    ),
+)
+match_refinements = {}  # cache key -> in-flight background LLM task
+# Hybrid requests past this many in-flight refinements get the fast score only
+MATCH_MAX_REFINEMENTS = int(os.getenv("MATCH_MAX_REFINEMENTS", "64"))
+
+
+def match_cache_key(resume_text, jd_text):
+    model_name = os.getenv("OLLAMA_MODEL", "llama3.2")
+    return content_key("match", model_name, jd_text[:4000], resume_text[:4000])
+
+
+def fast_match(resume_text, jd_text):
+    """Deterministic match in a few milliseconds: skills, requirement keywords, hashed-embedding similarity."""
+    job_skills = skill_matcher.extract(jd_text)
+    resume_skills = skill_matcher.extract(resume_text)
+    keywords = requirement_keywords(jd_text)
+    # Hashing embedder: no network round-trip, and both vectors come out L2-normalized
+    similarity = float(hashing_embedder.embed(jd_text[:8000]) @ hashing_embedder.embed(resume_text[:8000]))
+    result = fast_match_score(job_skills, resume_skills, keywords, resume_text, similarity)
+
+    if job_skills:
+        summary = f"Matches {len(result['matchedSkills'])} of {len(job_skills)} key skills"
+    else:
+        summary = "No recognizable skills in the job description"
+    summary += f"; covers {result['keywordCoverage']:.0%} of the job's requirement keywords."
+    if result["missingSkills"]:
+        summary += f" Missing: {', '.join(result['missingSkills'][:5])}."
+
+    return MatchResponse(
+        score=result["score"],
+        matchedSkills=result["matchedSkills"],
+        missingSkills=result["missingSkills"],
+        summary=summary,
+        source="fast",
+    )
+
+
+async def refine_match(cache_key, resume_text, jd_text):
+    # Runs in its own task (own context copy) - never compete with interactive calls
+    llm_priority.set(BULK)
     try:
-        async with httpx.AsyncClient() as client:
-            resp = await client.post(
-                "http://localhost:11434/api/chat",
-                json=payload,
-                timeout=60.0
+        result = await llm_match(resume_text, jd_text)
+        await match_cache.set(cache_key, result.model_dump())
+    except Exception as e:
+        print(f"Match refinement failed: {e}")
+        fallbacks.inc(endpoint="match")
+    finally:
+        match_refinements.pop(cache_key, None)
+
+
+@app.post("/match", response_model=MatchResponse)
+async def match_candidate_to_job(request: MatchRequest):
+    """
+    Calculate match score between a resume and job description.
+    mode=fast never calls the LLM; mode=llm falls back to the fast score when
+    the LLM is unavailable; mode=hybrid returns the fast score at once and
+    refines it with the LLM in the background (later calls get the LLM result,
+    and a mode=llm call joins a refinement still in flight).
+    """
+    mode = (request.mode or MATCH_DEFAULT_MODE).lower()
+    if mode not in MATCH_MODES:
+        raise HTTPException(status_code=400, detail=f"Unknown mode '{request.mode}'. Use one of: {', '.join(MATCH_MODES)}")
+
+    if mode == "fast":
+        return fast_match(request.resumeText, request.jobDescription)
+
+    cache_key = match_cache_key(request.resumeText, request.jobDescription)
+    cached = await match_cache.get(cache_key)
+    if cached is not None:
+        return MatchResponse(**cached)
+
+    if mode == "hybrid":
+        result = fast_match(request.resumeText, request.jobDescription)
+        if cache_key not in match_refinements:
+            if len(match_refinements) >= MATCH_MAX_REFINEMENTS:
+                return result
+            match_refinements[cache_key] = asyncio.create_task(
+                refine_match(cache_key, request.resumeText, request.jobDescription)
             )
-            resp.raise_for_status()
-            resp_json = resp.json()
-            
-        content = resp_json.get("message", {}).get("content", "")
-        # Clean markdown if present
-        content = content.replace("```json", "").replace("```", "").strip()
-        parsed = json.loads(content)
-        
-        return MatchResponse(
-            score=float(parsed.get("score", 0)),
-            matchedSkills=parsed.get("matchedSkills", []),
-            missingSkills=parsed.get("missingSkills", []),
-            summary=parsed.get("summary", "Analysis failed.")
-        )
+        result.refining = True
+        return result
+
+    refinement = match_refinements.get(cache_key)
+    if refinement is not None:
+        # Shielded: this caller going away mustn't cancel the shared task
+        await asyncio.shield(refinement)
+        cached = await match_cache.get(cache_key)
+        if cached is not None:
+            return MatchResponse(**cached)
+
+    try:
+        result = await llm_match(request.resumeText, request.jobDescription)
+        await match_cache.set(cache_key, result.model_dump())
+        return result
         
     except Exception as e:
-        print(f"Match Error: {e}")
-        # Fallback Mock
-        return MatchResponse(
-            score=0.0,
-            matchedSkills=[],
-            missingSkills=[],
-            summary="AI Service unavailable. Could not calculate match."
+        print(f"Match Error (using fast score): {e}")
+        fallbacks.inc(endpoint="match")
+        # A deterministic score instead of 0, so an outage doesn't sink candidates in rankings
+        return fast_match(request.resumeText, request.jobDescription)
+
+
+# Bulk ranking - how many resumes per request, and how many top candidates get an LLM pass
+MATCH_RANK_MAX_RESUMES = int(os.getenv("MATCH_RANK_MAX_RESUMES", "5000"))
+MATCH_RANK_MAX_LLM = int(os.getenv("MATCH_RANK_MAX_LLM", "50"))
+MATCH_RANK_LLM_CONCURRENCY = int(os.getenv("MATCH_RANK_LLM_CONCURRENCY", "4"))
+
+
+async def embed_for_ranking(texts):
+    """
+    Embedding matrix (one row per text) for ranking. Vectors must share one
+    space, so if Ollama fails for any text all rows come from the hashing
+    embedder instead. Empty texts get a zero row.
+    Returns (matrix, model name).
+    """
+    model_name = os.getenv("OLLAMA_EMBED_MODEL", "nomic-embed-text")
+    texts = [normalize_embedding_text(text) for text in texts]
+    unique_texts = list(dict.fromkeys(t for t in texts if t))
+
+    vectors, errors = await embed_texts_cached(unique_texts, model_name)
+    dims = {len(vector) for vector in vectors.values()}
+    if not errors and len(vectors) == len(unique_texts) and len(dims) <= 1:
+        dim = dims.pop() if dims else hashing_embedder.dim
+        matrix = np.zeros((len(texts), dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            if text:
+                matrix[i] = vectors[text]
+        return matrix, model_name
+
+    print(f"Ranking embeddings: {len(errors)} of {len(unique_texts)} failed, using hashing embedder")
+    fallbacks.inc(endpoint="match_rank_embeddings")
+
+    def hash_all():
+        matrix = np.zeros((len(texts), hashing_embedder.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            if text:
+                matrix[i] = hashing_embedder.embed(text)
+        return matrix
+
+    return await asyncio.to_thread(hash_all), "hashing"
+
+
+@app.post("/match/rank", response_model=MatchRankResponse)
+async def rank_candidates(request: MatchRankRequest):
+    """
+    Rank many resumes against one job description.
+    Every resume gets a fast embedding + skill-overlap score in one vectorized
+    pass; only the top `topK` are re-scored by the LLM, a few at a time.
+    """
+    if not request.jobDescription.strip():
+        raise HTTPException(status_code=400, detail="No job description provided")
+    if not request.resumes:
+        raise HTTPException(status_code=400, detail="No resumes provided")
+    if len(request.resumes) > MATCH_RANK_MAX_RESUMES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many resumes ({len(request.resumes)}). Maximum is {MATCH_RANK_MAX_RESUMES} per request."
         )
 
+    resume_texts = [resume.text for resume in request.resumes]
+    job_skills = skill_matcher.extract(request.jobDescription)
+
+    # Skill extraction (CPU) and embeddings (Ollama) run side by side
+    resume_skills, (matrix, embedding_model) = await asyncio.gather(
+        asyncio.to_thread(lambda: [skill_matcher.extract(text) for text in resume_texts]),
+        embed_for_ranking([request.jobDescription] + resume_texts),
+    )
+
+    similarities = cosine_similarities(matrix[0], matrix[1:])
+    overlap = skill_overlap_matrix(job_skills, resume_skills)
+    scores, coverage = prefilter_scores(similarities, overlap)
+
+    order = np.argsort(-scores, kind="stable")
+    top_k = max(0, min(request.topK, MATCH_RANK_MAX_LLM, len(order)))
+    semaphore = asyncio.Semaphore(MATCH_RANK_LLM_CONCURRENCY)
+    llm_results = {}
+
+    async def score_with_llm(index):
+        async with semaphore:
+            try:
+                llm_results[index] = await llm_match(resume_texts[index], request.jobDescription)
+            except Exception as e:
+                print(f"Rank LLM Error ({request.resumes[index].id}): {e}")
+                fallbacks.inc(endpoint="match_rank")
+
+    await asyncio.gather(*(score_with_llm(int(index)) for index in order[:top_k]))
+
+    candidates = []
+    for index in map(int, order):
+        matched = [skill for skill, hit in zip(job_skills, overlap[index]) if hit]
+        missing = [skill for skill, hit in zip(job_skills, overlap[index]) if not hit]
+        llm_result = llm_results.get(index)
+        candidates.append(RankedCandidate(
+            id=request.resumes[index].id,
+            rank=0,
+            score=round(llm_result.score if llm_result else float(scores[index]), 2),
+            prefilterScore=round(float(scores[index]), 2),
+            similarity=round(float(similarities[index]), 4),
+            skillOverlap=round(float(coverage[index]), 4),
+            matchedSkills=llm_result.matchedSkills if llm_result else matched,
+            missingSkills=llm_result.missingSkills if llm_result else missing,
+            llmScore=llm_result.score if llm_result else None,
+            summary=llm_result.summary if llm_result else None,
+        ))
+
+    # LLM-scored candidates (the prefilter's best) first, ordered by the LLM; the rest keep prefilter order
+    candidates.sort(key=lambda c: (c.llmScore is None, -(c.llmScore or 0.0)))
+    for rank, candidate in enumerate(candidates, start=1):
+        candidate.rank = rank
+
+    print(f"Ranked {len(candidates)} resumes, {len(llm_results)} re-scored by LLM")
+    return MatchRankResponse(
+        jobSkills=job_skills,
+        embeddingModel=embedding_model,
+        llmScored=len(llm_results),
+        candidates=candidates,
+    )
+
 
 # Optimization
 class OptimizeRequest(BaseModel):
@@ -840,11 +2007,7 @@ class OptimizeResponse(BaseModel):
     optimizedText: str
     changes: str
 
-@app.post("/optimize-jd", response_model=OptimizeResponse)
-async def optimize_jd(request: OptimizeRequest):
-    """
-    Rewrite job description text to match a specific tone.
-    """
+def optimization_payload(request):
     model_name = os.getenv("OLLAMA_MODEL", "llama3.2")
     
     system_prompt = (
@@ -865,35 +2028,63 @@ async def optimize_jd(request: OptimizeRequest):
             {"role": "user", "content": user_prompt},
         ],
     }
-    
+    return payload
+
+
+def parse_optimization(content, request):
+    return parse_llm_output(
+        content,
+        OptimizeResponse,
+        defaults={"optimizedText": request.text, "changes": "Optimized for tone."},
+    )
+
+
+def fallback_optimization(request):
+    # Fallback: return original
+    return OptimizeResponse(
+        optimizedText=request.text,
+        changes="Failed to optimize due to service error."
+    )
+
+
+@app.post("/optimize-jd", response_model=OptimizeResponse)
+async def optimize_jd(
+    request: OptimizeRequest,
+    response: Response,
+    refresh: bool = Query(False, description="Ignore any cached result and generate a new one"),
+    stream: bool = Query(False, description="Stream tokens as server-sent events"),
+):
+    """
+    Rewrite job description text to match a specific tone.
+    With stream=true the response is text/event-stream (see stream_generation).
+    """
+    cache_key = generation_cache_key("optimize_jd", request)
+    cached = await cached_generation(cache_key, response, refresh)
+    if cached is not None:
+        return cached_sse(cached, response) if stream else OptimizeResponse(**cached)
+
+    if stream:
+        return await stream_generation(
+            "optimize_jd",
+            optimization_payload(request),
+            lambda content: parse_optimization(content, request),
+            lambda: fallback_optimization(request),
+            cache_key,
+            response,
+        )
+
     try:
-        async with httpx.AsyncClient() as client:
-            resp = await client.post(
-                "http://localhost:11434/api/chat",
-                json=payload,
-                timeout=60.0
-            )
-            resp.raise_for_status()
-            resp_json = resp.json()
-            
+        resp_json = await ollama.chat(optimization_payload(request), endpoint="optimize_jd")
         content = resp_json.get("message", {}).get("content", "")
-        
-        # Clean markdown if present
-        content = content.replace("```json", "").replace("```", "").strip()
-        
-        parsed = json.loads(content)
-        
-        return OptimizeResponse(
-            optimizedText=parsed.get("optimizedText", request.text),
-            changes=parsed.get("changes", "Optimized for tone.")
-        )
+        result = parse_optimization(content, request)
+        await store_generation("optimize_jd", cache_key, result)
+        return result
+    except LLMOverloaded:
+        raise
     except Exception as e:
         print(f"Optimization Error: {e}")
-        # Fallback: return original
-        return OptimizeResponse(
-            optimizedText=request.text,
-            changes="Failed to optimize due to service error."
-        )
+        fallbacks.inc(endpoint="optimize_jd")
+        return fallback_optimization(request)
 
 # SEO Suggestions
 class SeoRequest(BaseModel):
@@ -906,10 +2097,19 @@ class SeoResponse(BaseModel):
     suggestions: List[str]
 
 @app.post("/suggest-seo", response_model=SeoResponse)
-async def suggest_seo(request: SeoRequest):
+async def suggest_seo(
+    request: SeoRequest,
+    response: Response,
+    refresh: bool = Query(False, description="Ignore any cached result and generate a new one"),
+):
     """
     Analyze job description for SEO and suggest keywords.
     """
+    cache_key = generation_cache_key("suggest_seo", request)
+    cached = await cached_generation(cache_key, response, refresh)
+    if cached is not None:
+        return SeoResponse(**cached)
+
     model_name = os.getenv("OLLAMA_MODEL", "llama3.2")
     
     system_prompt = (
@@ -933,29 +2133,21 @@ async def suggest_seo(request: SeoRequest):
     }
     
     try:
-        async with httpx.AsyncClient() as client:
-            resp = await client.post(
-                "http://localhost:11434/api/chat",
-                json=payload,
-                timeout=60.0
-            )
-            resp.raise_for_status()
-            resp_json = resp.json()
+        resp_json = await ollama.chat(payload, endpoint="suggest_seo")
             
         content = resp_json.get("message", {}).get("content", "")
-        
-        # Clean markdown if present
-        content = content.replace("```json", "").replace("```", "").strip()
-        
-        parsed = json.loads(content)
-        
-        return SeoResponse(
-            keywords=parsed.get("keywords", []),
-            score=parsed.get("score", 70.0),
-            suggestions=parsed.get("suggestions", [])
+        result = parse_llm_output(
+            content,
+            SeoResponse,
+            defaults={"keywords": [], "score": 70.0, "suggestions": []},
         )
+        await store_generation("suggest_seo", cache_key, result)
+        return result
+    except LLMOverloaded:
+        raise
     except Exception as e:
         print(f"SEO Error: {e}")
+        fallbacks.inc(endpoint="suggest_seo")
         return SeoResponse(
             keywords=[],
             score=0.0,
@@ -973,10 +2165,19 @@ class SubjectLineResponse(BaseModel):
     suggestions: List[str]
 
 @app.post("/generate-subject-lines", response_model=SubjectLineResponse)
-async def generate_subject_lines(request: SubjectLineRequest):
+async def generate_subject_lines(
+    request: SubjectLineRequest,
+    response: Response,
+    refresh: bool = Query(False, description="Ignore any cached result and generate a new one"),
+):
     """
     Generate AI-powered email subject line suggestions.
     """
+    cache_key = generation_cache_key("subject_lines", request)
+    cached = await cached_generation(cache_key, response, refresh)
+    if cached is not None:
+        return SubjectLineResponse(**cached)
+
     model_name = os.getenv("OLLAMA_MODEL", "llama3.2")
     
     system_prompt = (
@@ -1007,24 +2208,18 @@ async def generate_subject_lines(request: SubjectLineRequest):
     }
     
     try:
-        async with httpx.AsyncClient() as client:
-            resp = await client.post(
-                "http://localhost:11434/api/chat",
-                json=payload,
-                timeout=30.0
-            )
-            resp.raise_for_status()
-            resp_json = resp.json()
+        resp_json = await ollama.chat(payload, endpoint="subject_lines")
             
         content = resp_json.get("message", {}).get("content", "")
-        content = content.replace("```json", "").replace("```", "").strip()
-        parsed = json.loads(content)
-        
-        return SubjectLineResponse(
-            suggestions=parsed.get("suggestions", [])[:5]
-        )
+        result = parse_llm_output(content, SubjectLineResponse, defaults={"suggestions": []})
+        result.suggestions = result.suggestions[:5]
+        await store_generation("subject_lines", cache_key, result)
+        return result
+    except LLMOverloaded:
+        raise
     except Exception as e:
         print(f"Subject Line Generation Error: {e}")
+        fallbacks.inc(endpoint="subject_lines")
         # Fallback suggestions based on context
         fallback = {
             "interview": [
@@ -0,0 +1,125 @@
+"""
+Candidate ranking
+
+Vectorized first-pass scoring of many resumes against one job description:
+cosine similarity of embeddings plus the share of the job's skills each resume
+covers, computed for all candidates at once with NumPy. Only the best
+candidates from this pass go on to the (slow) LLM scorer.
+
+Also holds the deterministic single-pair scorer behind /match mode=fast,
+which adds coverage of the job's requirement keywords to the same signals.
+"""
+
+import os
+import re
+from collections import Counter
+from typing import List, Tuple
+
+import numpy as np
+
+RANK_SIMILARITY_WEIGHT = float(os.getenv("RANK_SIMILARITY_WEIGHT", "0.6"))
+RANK_SKILL_WEIGHT = float(os.getenv("RANK_SKILL_WEIGHT", "0.4"))
+
+
+def cosine_similarities(job_vector: np.ndarray, resume_vectors: np.ndarray) -> np.ndarray:
+    """Cosine similarity of every row of resume_vectors with job_vector (zero rows score 0)."""
+    job_norm = np.linalg.norm(job_vector)
+    row_norms = np.linalg.norm(resume_vectors, axis=1)
+    denom = row_norms * job_norm
+    dots = resume_vectors @ job_vector
+    return np.divide(dots, denom, out=np.zeros_like(dots), where=denom > 0)
+
+
+def skill_overlap_matrix(job_skills: List[str], resume_skills: List[List[str]]) -> np.ndarray:
+    """Boolean (resumes x job skills) matrix: does resume i mention job skill j."""
+    columns = {skill: j for j, skill in enumerate(job_skills)}
+    matrix = np.zeros((len(resume_skills), len(job_skills)), dtype=bool)
+    for i, skills in enumerate(resume_skills):
+        hits = [columns[skill] for skill in skills if skill in columns]
+        matrix[i, hits] = True
+    return matrix
+
+
+def prefilter_scores(similarities: np.ndarray, overlap: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Combine similarity and skill coverage into 0-100 scores.
+    Returns (scores, coverage) where coverage is the share of job skills matched.
+    """
+    similarity = np.clip(similarities, 0.0, 1.0)
+    if overlap.shape[1] == 0:
+        # No recognizable skills in the job description - similarity alone
+        return similarity * 100.0, np.zeros(len(similarity))
+    coverage = overlap.mean(axis=1)
+    total_weight = RANK_SIMILARITY_WEIGHT + RANK_SKILL_WEIGHT
+    scores = (RANK_SIMILARITY_WEIGHT * similarity + RANK_SKILL_WEIGHT * coverage) / total_weight
+    return scores * 100.0, coverage
+
+
+# Deterministic single-pair scorer (/match mode=fast)
+MATCH_SKILL_WEIGHT = float(os.getenv("MATCH_SKILL_WEIGHT", "0.5"))
+MATCH_KEYWORD_WEIGHT = float(os.getenv("MATCH_KEYWORD_WEIGHT", "0.25"))
+MATCH_SIMILARITY_WEIGHT = float(os.getenv("MATCH_SIMILARITY_WEIGHT", "0.25"))
+MATCH_MAX_KEYWORDS = 40
+
+# Common words and job-ad boilerplate that say nothing about the requirements
+_KEYWORD_STOPWORDS = frozenset((
+    "the and for with you your our are will have has this that from who what when where "
+    "which how all any can able ability must should would could may also well into about "
+    "other more most such than then them they their there these those been being were was "
+    "not but its it's per etc including include includes within across using use used "
+    "work working works team teams role roles job position company candidate candidates "
+    "experience experienced years year strong excellent good great knowledge skills skill "
+    "required requirements require requires preferred plus bonus nice responsibilities "
+    "responsible qualifications ideal looking join help new opportunity environment "
+    "understanding proven solid familiarity familiar least minimum degree related field"
+).split())
+
+_KEYWORD_TOKEN = re.compile(r"[a-z][a-z0-9+#.\-]*[a-z0-9+#]")
+
+
+def keyword_tokens(text: str) -> List[str]:
+    return [
+        token for token in _KEYWORD_TOKEN.findall(text.lower())
+        if len(token) > 2 and token not in _KEYWORD_STOPWORDS
+    ]
+
+
+def requirement_keywords(job_text: str, limit: int = MATCH_MAX_KEYWORDS) -> List[str]:
+    """The job description's most frequent content words, most frequent first."""
+    counts = Counter(keyword_tokens(job_text))
+    return [token for token, _ in counts.most_common(limit)]
+
+
+def fast_match_score(
+    job_skills: List[str],
+    resume_skills: List[str],
+    keywords: List[str],
+    resume_text: str,
+    similarity: float,
+) -> dict:
+    """
+    Blend skill coverage, requirement-keyword coverage and embedding similarity
+    into a 0-100 score. Components without signal (e.g. a job description with
+    no recognizable skills) drop out and the remaining weights are rescaled.
+    """
+    resume_skill_set = set(resume_skills)
+    matched = [skill for skill in job_skills if skill in resume_skill_set]
+    missing = [skill for skill in job_skills if skill not in resume_skill_set]
+    resume_tokens = set(keyword_tokens(resume_text))
+    found_keywords = [keyword for keyword in keywords if keyword in resume_tokens]
+
+    components = [(MATCH_SIMILARITY_WEIGHT, min(max(similarity, 0.0), 1.0))]
+    if job_skills:
+        components.append((MATCH_SKILL_WEIGHT, len(matched) / len(job_skills)))
+    if keywords:
+        components.append((MATCH_KEYWORD_WEIGHT, len(found_keywords) / len(keywords)))
+    total_weight = sum(weight for weight, _ in components)
+    score = 100.0 * sum(weight * value for weight, value in components) / total_weight if total_weight else 0.0
+
+    return {
+        "score": round(score, 2),
+        "matchedSkills": matched,
+        "missingSkills": missing,
+        "keywordCoverage": len(found_keywords) / len(keywords) if keywords else 0.0,
+        "similarity": similarity,
+    }
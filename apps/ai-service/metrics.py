@@ -0,0 +1,297 @@
+"""
+Prometheus metrics
+
+A small in-process registry served as Prometheus text by GET /metrics:
+counters, gauges and histograms with labels, plus collectors that turn the
+existing stats() dicts (scheduler, caches, extraction pool) into gauges at
+scrape time. Kept dependency-free - each container runs one service process,
+and extraction workers hand their timings back to it with the result.
+
+Stage latencies share one histogram (talentx_ai_stage_duration_seconds) so a
+slow /parse-resume can be attributed to upload read, text extraction, OCR,
+LLM queueing, the LLM call itself or JSON decoding.
+"""
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+PREFIX = "talentx_ai_"
+
+# Seconds - from regex/JSON work (milliseconds) up to long LLM generations
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+TOKEN_RATE_BUCKETS = (1.0, 2.0, 5.0, 10.0, 20.0, 30.0, 50.0, 75.0, 100.0, 150.0, 250.0)
+# Vector index searches are expected to be sub-10ms
+SEARCH_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5)
+
+# (name, help, type, [(labels, value), ...]) - what a collector returns
+Family = Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _sample_line(name: str, labels: Dict[str, str], value: float) -> str:
+    if labels:
+        body = ",".join(f'{key}="{_escape(str(val))}"' for key, val in labels.items())
+        return f"{name}{{{body}}} {_format_value(value)}"
+    return f"{name} {_format_value(value)}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List["_Metric"] = []
+        self._collectors: List[Callable[[], Iterable[Family]]] = []
+
+    def register(self, metric: "_Metric"):
+        self._metrics.append(metric)
+
+    def add_collector(self, collector: Callable[[], Iterable[Family]]):
+        """Register a callable producing gauge/counter families at scrape time."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(_sample_line(name, labels, value) for name, labels, value in metric.samples())
+        for collector in self._collectors:
+            try:
+                families = list(collector())
+            except Exception as e:
+                print(f"Metrics collector failed: {e}")
+                continue
+            for name, documentation, kind, samples in families:
+                lines.append(f"# HELP {PREFIX}{name} {documentation}")
+                lines.append(f"# TYPE {PREFIX}{name} {kind}")
+                lines.extend(_sample_line(PREFIX + name, labels, value) for labels, value in samples)
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), registry: Registry = REGISTRY):
+        self.name = PREFIX + name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[tuple, object] = {}
+        # Extraction OCR threads and the event loop both record metrics
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def _key(self, labels: Dict[str, str]) -> tuple:
+        if len(labels) != len(self.labelnames) or any(name not in labels for name in self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: tuple) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self):
+        with self._lock:
+            snapshot = sorted(self._values.items())
+        for key, value in snapshot:
+            yield self.name, self._labels(key), value
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    @contextmanager
+    def track(self, **labels):
+        """Count the enclosed block as in progress."""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def samples(self):
+        with self._lock:
+            snapshot = sorted(self._values.items())
+        for key, value in snapshot:
+            yield self.name, self._labels(key), value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS, registry: Registry = REGISTRY):
+        super().__init__(name, documentation, labelnames, registry)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [per-bucket counts (+Inf last), sum, count]
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            index = len(self.buckets)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    index = i
+                    break
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the enclosed block, in seconds."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self):
+        with self._lock:
+            snapshot = [(key, list(state[0]), state[1], state[2]) for key, state in sorted(self._values.items())]
+        for key, counts, total, count in snapshot:
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                yield f"{self.name}_bucket", {**labels, "le": _format_value(bound)}, cumulative
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, count
+
+
+# Stage latencies: upload_read, extract_text, ocr_page, llm_queue_wait, llm_call,
+# embedding_call, json_decode
+stage_seconds = Histogram(
+    "stage_duration_seconds",
+    "Latency of each processing stage in seconds.",
+    ["stage"],
+)
+
+http_requests = Counter(
+    "http_requests_total",
+    "HTTP requests by route, method and status code.",
+    ["path", "method", "status"],
+)
+http_request_seconds = Histogram(
+    "http_request_duration_seconds",
+    "Time until response headers are sent (streaming bodies excluded), by route.",
+    ["path"],
+)
+http_in_flight = Gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being handled, by route.",
+    ["path"],
+)
+
+fallbacks = Counter(
+    "fallbacks_total",
+    "Responses served from a non-LLM fallback because the LLM path failed, by endpoint.",
+    ["endpoint"],
+)
+
+ollama_requests = Counter(
+    "ollama_requests_total",
+    "Upstream Ollama calls by endpoint, model and outcome (ok, error).",
+    ["endpoint", "model", "outcome"],
+)
+ollama_in_flight = Gauge(
+    "ollama_requests_in_flight",
+    "Upstream Ollama calls currently running, by model.",
+    ["model"],
+)
+ollama_prompt_tokens = Counter(
+    "ollama_prompt_tokens_total",
+    "Prompt tokens evaluated by Ollama (prompt_eval_count).",
+    ["endpoint", "model"],
+)
+ollama_eval_tokens = Counter(
+    "ollama_eval_tokens_total",
+    "Tokens generated by Ollama (eval_count).",
+    ["endpoint", "model"],
+)
+ollama_eval_seconds = Counter(
+    "ollama_eval_seconds_total",
+    "Time Ollama spent generating tokens (eval_duration), in seconds.",
+    ["endpoint", "model"],
+)
+ollama_tokens_per_second = Histogram(
+    "ollama_tokens_per_second",
+    "Generation speed per Ollama call (eval_count / eval_duration).",
+    ["endpoint", "model"],
+    buckets=TOKEN_RATE_BUCKETS,
+)
+
+llm_json_decodes = Counter(
+    "llm_json_decodes_total",
+    "LLM output JSON decodes by outcome (ok, repaired, failed).",
+    ["outcome"],
+)
+
+vector_search_seconds = Histogram(
+    "vector_search_duration_seconds",
+    "Vector index search latency in seconds, by whether the search was exact or IVF.",
+    ["mode"],
+    buckets=SEARCH_BUCKETS,
+)
+
+
+def record_ollama_usage(endpoint: str, model: str, body: dict):
+    """Token counters from an Ollama response body (or the final streamed chunk)."""
+    prompt_tokens = body.get("prompt_eval_count")
+    if prompt_tokens:
+        ollama_prompt_tokens.inc(prompt_tokens, endpoint=endpoint, model=model)
+    eval_tokens = body.get("eval_count")
+    eval_ns = body.get("eval_duration")
+    if eval_tokens:
+        ollama_eval_tokens.inc(eval_tokens, endpoint=endpoint, model=model)
+    if eval_tokens and eval_ns:
+        seconds = eval_ns / 1e9
+        ollama_eval_seconds.inc(seconds, endpoint=endpoint, model=model)
+        ollama_tokens_per_second.observe(eval_tokens / seconds, endpoint=endpoint, model=model)
+
+
+def observe_timings(timings: Dict[str, List[float]]):
+    """Record stage timings gathered elsewhere (e.g. in an extraction worker process)."""
+    for stage, durations in timings.items():
+        for seconds in durations:
+            stage_seconds.observe(seconds, stage=stage)
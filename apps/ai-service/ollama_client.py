@@ -0,0 +1,225 @@
+"""
+Shared Ollama client
+
+One pooled httpx.AsyncClient per process, created in the FastAPI lifespan hook
+and reused by every endpoint so calls get keep-alive connections instead of a
+fresh TCP handshake each time.
+
+Identical requests that are in flight at the same time (same path and payload)
+are coalesced: one upstream call runs and every caller receives its result or
+its error. The call is cancelled only when the last caller goes away.
+
+Calls go through the LLM scheduler (scheduler.py), which bounds concurrency
+per model and queues interactive work ahead of bulk work. Call latency,
+outcomes and Ollama's token counts are recorded in metrics.py.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+from typing import AsyncIterator, Dict, Optional
+
+import httpx
+
+from metrics import ollama_in_flight, ollama_requests, record_ollama_usage, stage_seconds
+from scheduler import llm_scheduler
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    try:
+        return float(value) if value else default
+    except ValueError:
+        print(f"Invalid value for {name}: {value!r}, using {default}")
+        return default
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    try:
+        return int(value) if value else default
+    except ValueError:
+        print(f"Invalid value for {name}: {value!r}, using {default}")
+        return default
+
+
+# Read timeouts (seconds) per endpoint. Override any of them with
+# OLLAMA_TIMEOUT_<ENDPOINT>, e.g. OLLAMA_TIMEOUT_MATCH=90.
+DEFAULT_TIMEOUTS = {
+    "embeddings": 15.0,
+    "parse_resume": 60.0,
+    "generate_jd": 60.0,
+    "check_bias": 30.0,
+    "match": 60.0,
+    "optimize_jd": 60.0,
+    "suggest_seo": 60.0,
+    "subject_lines": 30.0,
+}
+
+
+class _Flight:
+    """One upstream call and the number of callers waiting on it."""
+
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class OllamaClient:
+    """App-scoped client for the local Ollama server."""
+
+    def __init__(self, base_url: Optional[str] = None):
+        self.base_url = (base_url or os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")).rstrip("/")
+        self.connect_timeout = _env_float("OLLAMA_CONNECT_TIMEOUT", 5.0)
+        self.limits = httpx.Limits(
+            max_connections=_env_int("OLLAMA_MAX_CONNECTIONS", 20),
+            max_keepalive_connections=_env_int("OLLAMA_MAX_KEEPALIVE_CONNECTIONS", 10),
+            keepalive_expiry=_env_float("OLLAMA_KEEPALIVE_EXPIRY", 30.0),
+        )
+        self.timeouts = {
+            endpoint: _env_float(f"OLLAMA_TIMEOUT_{endpoint.upper()}", default)
+            for endpoint, default in DEFAULT_TIMEOUTS.items()
+        }
+        self.coalesce = os.getenv("OLLAMA_COALESCE", "true").lower() not in ("0", "false", "no")
+        self.coalesced = 0
+        self._client: Optional[httpx.AsyncClient] = None
+        self._in_flight: Dict[str, _Flight] = {}
+
+    def _new_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            base_url=self.base_url,
+            limits=self.limits,
+            timeout=httpx.Timeout(60.0, connect=self.connect_timeout),
+        )
+
+    async def start(self):
+        if self._client is None:
+            self._client = self._new_client()
+            print(f"Ollama client ready ({self.base_url})")
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            # Used outside the lifespan (scripts, tests) - create on demand
+            self._client = self._new_client()
+        return self._client
+
+    def timeout_for(self, endpoint: str) -> httpx.Timeout:
+        read = self.timeouts.get(endpoint, 60.0)
+        return httpx.Timeout(read, connect=self.connect_timeout)
+
+    async def _post(self, path: str, payload: dict, endpoint: str) -> dict:
+        model = payload.get("model", "")
+        stage = "llm_call" if path == "/api/chat" else "embedding_call"
+        # Wait for a slot on this model - may raise LLMOverloaded
+        async with llm_scheduler.slot(model):
+            try:
+                with ollama_in_flight.track(model=model), stage_seconds.time(stage=stage):
+                    resp = await self.client.post(path, json=payload, timeout=self.timeout_for(endpoint))
+                resp.raise_for_status()
+                body = resp.json()
+            except Exception:
+                ollama_requests.inc(endpoint=endpoint, model=model, outcome="error")
+                raise
+        ollama_requests.inc(endpoint=endpoint, model=model, outcome="ok")
+        record_ollama_usage(endpoint, model, body)
+        return body
+
+    @staticmethod
+    def fingerprint(path: str, payload: dict) -> str:
+        body = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(f"{path}\x00{body}".encode("utf-8")).hexdigest()
+
+    async def post(self, path: str, payload: dict, endpoint: str) -> dict:
+        """
+        POST to Ollama and return the decoded body. Concurrent identical calls
+        share one request, so the returned dict may be shared - treat it as read-only.
+        """
+        if not self.coalesce:
+            return await self._post(path, payload, endpoint)
+
+        key = self.fingerprint(path, payload)
+        flight = self._in_flight.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.create_task(self._post(path, payload, endpoint)))
+            self._in_flight[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+        else:
+            self.coalesced += 1
+
+        flight.waiters += 1
+        try:
+            # shield: one caller being cancelled must not cancel the others' call
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # Last caller went away - stop the upstream call, and make sure
+                # a new caller doesn't attach to the cancelled task
+                flight.task.cancel()
+                self._forget(key, flight)
+
+    def _forget(self, key: str, flight: _Flight):
+        if self._in_flight.get(key) is flight:
+            del self._in_flight[key]
+
+    def stats(self) -> dict:
+        return {
+            "coalesce": self.coalesce,
+            "inFlight": len(self._in_flight),
+            "coalesced": self.coalesced,
+        }
+
+    async def chat(self, payload: dict, endpoint: str) -> dict:
+        """POST /api/chat and return the decoded response body."""
+        return await self.post("/api/chat", payload, endpoint)
+
+    async def chat_stream(self, payload: dict, endpoint: str) -> AsyncIterator[dict]:
+        """
+        POST /api/chat with streaming on and yield each decoded chunk
+        ({"message": {"content": "..."}, "done": false} ...). Not coalesced.
+        Closing the generator (e.g. the client disconnected) closes the
+        connection, which stops the generation in Ollama.
+        """
+        model = payload.get("model", "")
+        async with llm_scheduler.slot(model):
+            try:
+                with ollama_in_flight.track(model=model), stage_seconds.time(stage="llm_call"):
+                    async with self.client.stream(
+                        "POST", "/api/chat", json={**payload, "stream": True}, timeout=self.timeout_for(endpoint)
+                    ) as resp:
+                        resp.raise_for_status()
+                        async for line in resp.aiter_lines():
+                            if not line.strip():
+                                continue
+                            chunk = json.loads(line)
+                            if chunk.get("error"):
+                                raise RuntimeError(f"Ollama error: {chunk['error']}")
+                            if chunk.get("done"):
+                                ollama_requests.inc(endpoint=endpoint, model=model, outcome="ok")
+                                record_ollama_usage(endpoint, model, chunk)
+                            yield chunk
+                            if chunk.get("done"):
+                                return
+            except Exception:
+                ollama_requests.inc(endpoint=endpoint, model=model, outcome="error")
+                raise
+
+    async def embeddings(self, payload: dict, endpoint: str = "embeddings") -> dict:
+        """POST /api/embeddings (single prompt) and return the decoded response body."""
+        return await self.post("/api/embeddings", payload, endpoint)
+
+    async def embed(self, payload: dict, endpoint: str = "embeddings") -> dict:
+        """POST /api/embed (list of inputs) and return the decoded response body."""
+        return await self.post("/api/embed", payload, endpoint)
+
+
+ollama = OllamaClient()
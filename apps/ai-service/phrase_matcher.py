@@ -0,0 +1,124 @@
+"""
+Phrase matching
+
+Compiles a large phrase list into one trie-shaped regular expression so text
+is scanned once, whatever the number of phrases. Shared phrase prefixes are
+factored out ("java", "javascript" -> "java(?:script)?"), matching is
+case-insensitive, prefers the longest phrase at a position and reports
+character offsets into the original text.
+
+The text is lowercased once and scanned with a case-sensitive pattern, which
+is about twice as fast as re.IGNORECASE. U+0130 (dotted capital I) is the
+one character whose lowercase is longer than itself; it is mapped to "i"
+first, as IGNORECASE would, so offsets still line up with the input.
+"""
+
+import re
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+# Phrase boundaries: not glued to a letter/digit or to the +/# of names like C++ or C#
+_BOUNDARY_BEFORE = r"(?<![\w+#])"
+_BOUNDARY_AFTER = r"(?![\w+#])"
+
+
+class PhraseMatch(NamedTuple):
+    start: int
+    end: int
+    text: str      # the matched text as it appears in the input
+    phrase: str    # the normalized phrase that matched
+    value: Any     # the payload registered for that phrase
+
+
+def normalize_phrase(phrase: str) -> str:
+    return " ".join(phrase.lower().split())
+
+
+def _trie_regex(phrases: Iterable[str]) -> str:
+    trie: Dict[str, dict] = {}
+    for phrase in phrases:
+        node = trie
+        for ch in phrase:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        branches = []
+        for ch in sorted(k for k in node if k):
+            # Any run of whitespace matches a space, so phrases survive line wraps
+            token = r"\s+" if ch == " " else re.escape(ch)
+            branches.append(token + build(node[ch]))
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if "" in node:
+            # A phrase ends here but longer ones continue - greedy, so longest wins
+            body = "(?:" + body + ")?"
+        return body
+
+    return build(trie)
+
+
+class PhraseMatcher:
+    """Single-pass, case-insensitive matcher for a fixed phrase -> value map."""
+
+    def __init__(self, phrases: Dict[str, Any]):
+        self._values: Dict[str, Any] = {}
+        for phrase, value in phrases.items():
+            key = normalize_phrase(phrase)
+            if key:
+                self._values.setdefault(key, value)
+        self._pattern = None
+        if self._values:
+            self._pattern = re.compile(_BOUNDARY_BEFORE + "(?:" + _trie_regex(self._values) + ")" + _BOUNDARY_AFTER)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def get(self, phrase: str, default: Any = None) -> Any:
+        """Exact (normalized) lookup, without scanning."""
+        return self._values.get(normalize_phrase(phrase), default)
+
+    def _scan(self, text: str) -> Iterator[re.Match]:
+        if self._pattern is None or not text:
+            return iter(())
+        return self._pattern.finditer(text.replace("\u0130", "i").lower())
+
+    def finditer(self, text: str) -> Iterator[PhraseMatch]:
+        values = self._values
+        for match in self._scan(text):
+            phrase = match.group(0)
+            value = values.get(phrase)
+            if value is None:
+                # Multi-word phrase spread over a line break or extra spaces
+                phrase = normalize_phrase(phrase)
+                value = values.get(phrase)
+                if value is None:
+                    continue
+            start, end = match.span()
+            yield PhraseMatch(start, end, text[start:end], phrase, value)
+
+    def first_values(self, text: str, accept: Optional[Callable[[Any, str], bool]] = None) -> List[Any]:
+        """
+        Values of the matched phrases in order of first mention, without
+        building a PhraseMatch per hit - repeats of a phrase are skipped after
+        one lookup. accept(value, matched_text) can reject an occurrence; a
+        later occurrence of the same phrase is then tried again.
+        """
+        values = self._values
+        found: Dict[str, Any] = {}
+        for match in self._scan(text):
+            phrase = match.group(0)
+            if phrase in found:
+                continue
+            value = values.get(phrase)
+            if value is None:
+                phrase = normalize_phrase(phrase)
+                value = values.get(phrase)
+                if value is None or phrase in found:
+                    continue
+            if accept is not None:
+                start, end = match.span()
+                if not accept(value, text[start:end]):
+                    continue
+            found[phrase] = value
+        return list(found.values())
@@ -0,0 +1,178 @@
+"""
+LLM scheduler
+
+Admission control in front of Ollama. Every call takes a slot for its model;
+at most LLM_MAX_CONCURRENCY calls per model run at once and the rest wait in
+bounded per-priority queues. Interactive calls (editor actions, single
+matches) are always dispatched before bulk ones (backfills, ranking), so a
+bulk job can't push a user-facing request behind dozens of long generations.
+
+When a queue is full - or an interactive call has waited longer than its
+limit - the call fails fast with LLMOverloaded, which the app turns into a
+429 (bulk) or 503 (interactive) with a Retry-After estimate.
+"""
+
+import asyncio
+import contextvars
+import math
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+
+from metrics import stage_seconds
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+PRIORITIES = (INTERACTIVE, BULK)  # dispatch order
+
+# Priority of the LLM calls made by the current request (set by middleware)
+llm_priority: contextvars.ContextVar = contextvars.ContextVar("llm_priority", default=INTERACTIVE)
+
+
+class LLMOverloaded(Exception):
+    """The LLM queue for this priority is full, or the wait limit passed."""
+
+    def __init__(self, priority: str, retry_after: int, reason: str):
+        super().__init__(f"LLM {priority} queue {reason}")
+        self.priority = priority
+        self.retry_after = retry_after
+        self.reason = reason
+
+    @property
+    def status_code(self) -> int:
+        # Bulk callers are asked to back off; interactive ones see the service as busy
+        return 429 if self.priority == BULK else 503
+
+
+class _ModelQueue:
+    def __init__(self):
+        self.active = 0
+        self.service_time = 10.0  # moving average of seconds per call, for Retry-After
+        self.waiting: Dict[str, deque] = {priority: deque() for priority in PRIORITIES}
+
+
+class LLMScheduler:
+    def __init__(self):
+        self.max_concurrency = max(1, int(os.getenv("LLM_MAX_CONCURRENCY", "2")))
+        self.max_queue = {
+            INTERACTIVE: int(os.getenv("LLM_MAX_QUEUE_INTERACTIVE", "16")),
+            BULK: int(os.getenv("LLM_MAX_QUEUE_BULK", "256")),
+        }
+        # Seconds a call may wait for a slot; 0 waits indefinitely
+        self.max_wait = {
+            INTERACTIVE: float(os.getenv("LLM_MAX_WAIT_INTERACTIVE", "30")),
+            BULK: float(os.getenv("LLM_MAX_WAIT_BULK", "0")),
+        }
+        self._models: Dict[str, _ModelQueue] = {}
+        self.admitted = {priority: 0 for priority in PRIORITIES}
+        self.rejected = {priority: 0 for priority in PRIORITIES}
+        self.timed_out = {priority: 0 for priority in PRIORITIES}
+        self.wait_total = {priority: 0.0 for priority in PRIORITIES}
+        self.wait_max = {priority: 0.0 for priority in PRIORITIES}
+
+    def _queue(self, model: str) -> _ModelQueue:
+        queue = self._models.get(model)
+        if queue is None:
+            queue = self._models[model] = _ModelQueue()
+        return queue
+
+    def retry_after(self, queue: _ModelQueue, priority: str) -> int:
+        # Everything queued at this priority or above runs first
+        ahead = queue.active
+        for p in PRIORITIES[:PRIORITIES.index(priority) + 1]:
+            ahead += len(queue.waiting[p])
+        estimate = ahead / self.max_concurrency * queue.service_time
+        return min(300, max(1, math.ceil(estimate)))
+
+    async def acquire(self, model: str, priority: str):
+        queue = self._queue(model)
+        if queue.active < self.max_concurrency and not any(queue.waiting.values()):
+            queue.active += 1
+            self._admit(priority, 0.0)
+            return
+
+        if len(queue.waiting[priority]) >= self.max_queue[priority]:
+            self.rejected[priority] += 1
+            raise LLMOverloaded(priority, self.retry_after(queue, priority), "is full")
+
+        slot = asyncio.get_running_loop().create_future()
+        queue.waiting[priority].append(slot)
+        queued_at = time.monotonic()
+        try:
+            await asyncio.wait_for(slot, self.max_wait[priority] or None)
+        except BaseException as e:
+            if slot.done() and not slot.cancelled():
+                # The slot was handed over just as we gave up - pass it on
+                self.release(model)
+            else:
+                try:
+                    queue.waiting[priority].remove(slot)
+                except ValueError:
+                    pass
+            if isinstance(e, asyncio.TimeoutError):
+                self.timed_out[priority] += 1
+                raise LLMOverloaded(priority, self.retry_after(queue, priority), "wait limit exceeded") from None
+            raise
+        self._admit(priority, time.monotonic() - queued_at)
+
+    def release(self, model: str):
+        queue = self._queue(model)
+        queue.active -= 1
+        for priority in PRIORITIES:
+            waiting = queue.waiting[priority]
+            while waiting:
+                slot = waiting.popleft()
+                if not slot.done():
+                    queue.active += 1
+                    slot.set_result(None)
+                    return
+
+    def _admit(self, priority: str, waited: float):
+        stage_seconds.observe(waited, stage="llm_queue_wait")
+        self.admitted[priority] += 1
+        self.wait_total[priority] += waited
+        self.wait_max[priority] = max(self.wait_max[priority], waited)
+
+    @asynccontextmanager
+    async def slot(self, model: str, priority: Optional[str] = None):
+        priority = priority or llm_priority.get()
+        if priority not in PRIORITIES:
+            priority = INTERACTIVE
+        await self.acquire(model, priority)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            queue = self._queue(model)
+            queue.service_time = 0.8 * queue.service_time + 0.2 * (time.monotonic() - started)
+            self.release(model)
+
+    def stats(self) -> dict:
+        return {
+            "maxConcurrency": self.max_concurrency,
+            "models": {
+                model: {
+                    "active": queue.active,
+                    "avgServiceMs": round(1000 * queue.service_time, 1),
+                    "queued": {priority: len(queue.waiting[priority]) for priority in PRIORITIES},
+                }
+                for model, queue in self._models.items()
+            },
+            "priorities": {
+                priority: {
+                    "maxQueue": self.max_queue[priority],
+                    "admitted": self.admitted[priority],
+                    "rejected": self.rejected[priority],
+                    "timedOut": self.timed_out[priority],
+                    "avgWaitMs": round(1000 * self.wait_total[priority] / self.admitted[priority], 1)
+                    if self.admitted[priority] else 0.0,
+                    "maxWaitMs": round(1000 * self.wait_max[priority], 1),
+                }
+                for priority in PRIORITIES
+            },
+        }
+
+
+llm_scheduler = LLMScheduler()
@@ -0,0 +1,111 @@
+"""
+Skill taxonomy matching
+
+Loads a skill taxonomy (canonical names + aliases, see data/skills.json) once
+at startup and compiles every surface form into a single PhraseMatcher, so
+a resume is scanned once no matter how many skills the taxonomy holds.
+
+Taxonomy entries:
+    {"name": "Kubernetes", "aliases": ["K8s"], "category": "Cloud & DevOps"}
+Optional flags:
+    "caseSensitive": true  - forms only match with their exact casing ("Go", "Excel")
+    "matchName": false     - only the aliases are matched (e.g. "R" -> "R programming")
+"""
+
+import json
+import os
+from typing import Dict, List, NamedTuple, Optional
+
+from phrase_matcher import PhraseMatcher, normalize_phrase
+
+DEFAULT_TAXONOMY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "skills.json")
+
+# Used when the taxonomy file is missing or unreadable
+FALLBACK_SKILLS = [
+    "Python", "Java", "JavaScript", "TypeScript", "React", "Angular", "Vue",
+    "Node.js", "HTML", "CSS", "SQL", "NoSQL", "PostgreSQL", "MongoDB",
+    "AWS", "Azure", "GCP", "Docker", "Kubernetes", "Git", "CI/CD",
+    "Agile", "Scrum", "Communication", "Leadership", "Management"
+]
+
+
+class SkillEntry(NamedTuple):
+    name: str
+    category: Optional[str]
+    case_forms: Optional[frozenset]  # exact-case forms for case-sensitive entries
+
+
+class SkillMatch(NamedTuple):
+    skill: str
+    start: int
+    end: int
+    text: str
+
+
+def _accepts(skill: SkillEntry, text: str) -> bool:
+    return skill.case_forms is None or " ".join(text.split()) in skill.case_forms
+
+
+def load_taxonomy(path: str) -> List[dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    entries = data["skills"] if isinstance(data, dict) else data
+    # Plain lists of names are accepted too
+    return [{"name": entry} if isinstance(entry, str) else entry for entry in entries]
+
+
+class SkillMatcher:
+    def __init__(self, entries: List[dict]):
+        forms: Dict[str, SkillEntry] = {}
+        for entry in entries:
+            name = entry.get("name")
+            if not name:
+                continue
+            surface = list(entry.get("aliases", []))
+            if entry.get("matchName", True):
+                surface.insert(0, name)
+            case_forms = frozenset(" ".join(f.split()) for f in surface) if entry.get("caseSensitive") else None
+            skill = SkillEntry(name, entry.get("category"), case_forms)
+            for form in surface:
+                # First definition wins if two entries share a form
+                forms.setdefault(form, skill)
+        self.skills = {entry["name"] for entry in entries if entry.get("name")}
+        self._matcher = PhraseMatcher(forms)
+        self._canonical = {normalize_phrase(entry["name"]): entry["name"] for entry in entries if entry.get("name")}
+
+    def __len__(self) -> int:
+        return len(self._matcher)
+
+    def find(self, text: str) -> List[SkillMatch]:
+        """Every skill mention in the text, with character offsets."""
+        return [
+            SkillMatch(match.value.name, match.start, match.end, match.text)
+            for match in self._matcher.finditer(text)
+            if _accepts(match.value, match.text)
+        ]
+
+    def extract(self, text: str) -> List[str]:
+        """Canonical skills found in the text, in order of first mention."""
+        return list(dict.fromkeys(skill.name for skill in self._matcher.first_values(text, _accepts)))
+
+    def canonical(self, name: str) -> Optional[str]:
+        """Map a skill name or alias (e.g. from the LLM) to its canonical name."""
+        skill = self._matcher.get(name)
+        if skill is not None:
+            return skill.name
+        return self._canonical.get(normalize_phrase(name))
+
+
+def build_skill_matcher(path: Optional[str] = None) -> SkillMatcher:
+    path = path or os.getenv("SKILL_TAXONOMY_PATH", DEFAULT_TAXONOMY_PATH)
+    try:
+        entries = load_taxonomy(path)
+    except Exception as e:
+        print(f"Could not load skill taxonomy from {path} ({e}); using built-in list")
+        entries = [{"name": name} for name in FALLBACK_SKILLS]
+    matcher = SkillMatcher(entries)
+    print(f"Skill matcher ready: {len(matcher.skills)} skills, {len(matcher)} surface forms")
+    return matcher
+
+
+skill_matcher = build_skill_matcher()
@@ -0,0 +1,81 @@
+"""
+Upload spooling
+
+Uploads are copied in chunks to a named temporary file instead of being read
+into memory, hashed on the way (the parse cache is keyed by content) and cut
+off at a maximum size. Extraction then opens the file by path, so the memory
+an upload costs no longer grows with the file: Starlette already spools the
+multipart body to disk past 1 MB, and this copy moves at most one chunk at a
+time.
+"""
+
+import hashlib
+import os
+import tempfile
+
+CHUNK_SIZE = 1024 * 1024
+
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(20 * 1024 * 1024)))
+UPLOAD_DIR = os.getenv("UPLOAD_DIR") or None  # None -> the system temp directory
+
+
+class UploadTooLarge(Exception):
+    def __init__(self, limit: int):
+        super().__init__(f"File larger than {limit} bytes")
+        self.limit = limit
+
+
+class SpooledUpload:
+    """A finished upload on disk. Use as a context manager to delete the file afterwards."""
+
+    def __init__(self, path: str, size: int, sha256: str):
+        self.path = path
+        self.size = size
+        self.sha256 = sha256
+
+    def remove(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.remove()
+
+
+def spool_upload(source, suffix: str = "", max_bytes: int = UPLOAD_MAX_BYTES) -> SpooledUpload:
+    """
+    Copy a file object (UploadFile.file) to a temporary file in CHUNK_SIZE
+    pieces. Raises UploadTooLarge, without keeping the partial copy, once more
+    than max_bytes have been read. Blocking - call via asyncio.to_thread.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    fd, path = tempfile.mkstemp(prefix="upload-", suffix=suffix, dir=UPLOAD_DIR)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = source.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(max_bytes)
+                digest.update(chunk)
+                out.write(chunk)
+    except BaseException:
+        os.remove(path)
+        raise
+    return SpooledUpload(path, size, digest.hexdigest())
+
+
+def file_sha256(path: str) -> str:
+    """sha256 of a file on disk, read a chunk at a time."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as source:
+        for chunk in iter(lambda: source.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
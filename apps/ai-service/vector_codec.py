@@ -0,0 +1,136 @@
+"""
+Vector encodings
+
+Compact binary forms of embedding matrices, shared by the HTTP layer and
+on-disk storage:
+
+    float32  little-endian IEEE floats - exact
+    float16  little-endian half floats - 2x smaller, ~1e-3 relative error
+    int8     symmetric per-row quantization, row ~= int8 values * scale - 4x smaller
+
+/embeddings and /embeddings/batch return one binary block instead of JSON
+when the request has Accept: application/x-embedding-<dtype>. The shape is
+in the X-Embedding-Shape header ("rows,dim") and the body is, in order:
+
+    data     rows * dim values of <dtype>, zero-padded to a multiple of 4 bytes
+    scales   rows float32 (int8 only)
+    present  rows uint8 - 1 where the row holds a vector, 0 for a failed input
+
+so every section starts 4-byte aligned and maps straight onto a typed array.
+
+On disk a block is an .npy file (plus <name>.scales.npy for int8), which
+np.load(..., mmap_mode="r") maps without reading it into memory.
+"""
+
+import os
+from typing import Optional, Tuple
+
+import numpy as np
+
+DTYPES = {"float32": np.dtype("<f4"), "float16": np.dtype("<f2"), "int8": np.dtype("i1")}
+MEDIA_TYPE_PREFIX = "application/x-embedding-"
+
+
+def media_type(dtype: str) -> str:
+    return MEDIA_TYPE_PREFIX + dtype
+
+
+def negotiate(accept: Optional[str]) -> Optional[str]:
+    """
+    The binary dtype the Accept header asks for, or None for JSON. Honours
+    q-values; JSON wins ties and anything that isn't an x-embedding type.
+    """
+    best, best_q = None, 0.0
+    for part in (accept or "").split(","):
+        fields = [field.strip() for field in part.split(";")]
+        kind = fields[0].lower()
+        q = 1.0
+        for param in fields[1:]:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        dtype = kind[len(MEDIA_TYPE_PREFIX):] if kind.startswith(MEDIA_TYPE_PREFIX) else None
+        if dtype not in DTYPES:
+            dtype = None
+        if q > best_q or (q == best_q and dtype is None):
+            best, best_q = dtype, q
+    return best
+
+
+def quantize(vectors: np.ndarray, dtype: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """(data, scales) for a float matrix; scales is None except for int8."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if dtype != "int8":
+        return vectors.astype(DTYPES[dtype]), None
+    peaks = np.abs(vectors).max(axis=1) if vectors.size else np.zeros(len(vectors), dtype=np.float32)
+    scales = np.where(peaks > 0, peaks / 127.0, 1.0).astype("<f4")
+    data = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(DTYPES["int8"])
+    return data, scales
+
+
+def dequantize(data: np.ndarray, scales: Optional[np.ndarray] = None) -> np.ndarray:
+    vectors = np.asarray(data, dtype=np.float32)
+    return vectors * scales[:, None] if scales is not None else vectors
+
+
+def _padded(size: int) -> int:
+    return (size + 3) & ~3
+
+
+def encode_block(vectors: np.ndarray, dtype: str, present: Optional[np.ndarray] = None) -> bytes:
+    """Binary block for a (rows x dim) matrix; rows missing from present are sent as zeros."""
+    data, scales = quantize(vectors, dtype)
+    present = np.ones(len(data), dtype=np.uint8) if present is None else np.asarray(present, dtype=np.uint8)
+    body = data.tobytes()
+    parts = [body, b"\0" * (_padded(len(body)) - len(body))]
+    if scales is not None:
+        parts.append(scales.tobytes())
+    parts.append(present.tobytes())
+    return b"".join(parts)
+
+
+def decode_block(body: bytes, dtype: str, rows: int, dim: int) -> Tuple[np.ndarray, np.ndarray]:
+    """(float32 vectors, present flags) from encode_block output."""
+    item = DTYPES[dtype]
+    size = rows * dim * item.itemsize
+    data = np.frombuffer(body, dtype=item, count=rows * dim).reshape(rows, dim)
+    offset = _padded(size)
+    scales = None
+    if dtype == "int8":
+        scales = np.frombuffer(body, dtype="<f4", count=rows, offset=offset)
+        offset += 4 * rows
+    present = np.frombuffer(body, dtype=np.uint8, count=rows, offset=offset).astype(bool)
+    return dequantize(data, scales), present
+
+
+def block_headers(dtype: str, rows: int, dim: int) -> dict:
+    return {"X-Embedding-Dtype": dtype, "X-Embedding-Shape": f"{rows},{dim}", "Vary": "Accept"}
+
+
+def _scales_path(path: str) -> str:
+    return os.path.splitext(path)[0] + ".scales.npy"
+
+
+def save_block(path: str, vectors: np.ndarray, dtype: str = "float32"):
+    """Write a matrix as an .npy block (and an int8 scales sidecar)."""
+    data, scales = quantize(vectors, dtype)
+    np.save(path, data)
+    if scales is not None:
+        np.save(_scales_path(path), scales)
+
+
+def load_block(path: str, mmap_mode: Optional[str] = "r") -> np.ndarray:
+    """
+    Read a block saved by save_block as float32. float32 blocks are
+    memory-mapped (with mmap_mode); float16/int8 blocks are mapped and then
+    expanded, so they cost a full read but a quarter to half the disk.
+    """
+    data = np.load(path, mmap_mode=mmap_mode)
+    if data.dtype == np.float32:
+        return data
+    scales_path = _scales_path(path)
+    scales = np.load(scales_path) if data.dtype == np.int8 and os.path.exists(scales_path) else None
+    return dequantize(data, scales)
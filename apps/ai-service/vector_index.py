@@ -0,0 +1,579 @@
+"""
+Vector index
+
+Approximate nearest-neighbour search over candidate embeddings, held in the
+service and partitioned by tenant. Each partition is an IVF-flat index in
+NumPy: spherical k-means splits the vectors into lists, and a query scores
+only the vectors in its nprobe closest lists. Partitions too small to be
+worth training are scanned exactly. Vectors are L2-normalized on the way in,
+so scores are cosine similarities (the same scale as pgvector's 1 - <=>).
+
+Partitions are saved under VECTOR_INDEX_DIR (vectors and list assignments as
+.npy, ids and metadata as JSON) and memory-mapped copy-on-write at startup,
+so a restart doesn't have to read every vector before serving searches.
+VECTOR_INDEX_STORAGE_DTYPE=float16|int8 stores vectors 2-4x smaller on disk
+(see vector_codec); those are expanded to float32 on load instead of mapped,
+since NumPy scores float32 faster than it can convert the compact forms.
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import os
+import shutil
+import tempfile
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from vector_codec import DTYPES, load_block, save_block
+
+# Partitions below this size are scanned exactly; IVF doesn't pay off yet
+IVF_MIN_VECTORS = int(os.getenv("VECTOR_INDEX_IVF_MIN", "20000"))
+# Lists probed per query (more = better recall, slower)
+DEFAULT_NPROBE = int(os.getenv("VECTOR_INDEX_NPROBE", "16"))
+# k-means settings: training sample per list, and iterations
+KMEANS_SAMPLE_PER_LIST = 32
+KMEANS_ITERATIONS = 8
+# Rows scored per matrix multiply when assigning vectors to lists
+ASSIGN_CHUNK = 16384
+# Deleted rows are dropped from the arrays once they are this share of a partition
+COMPACT_RATIO = 0.25
+# On-disk vector encoding: float32 (memory-mapped), float16 or int8
+STORAGE_DTYPE = os.getenv("VECTOR_INDEX_STORAGE_DTYPE", "float32")
+if STORAGE_DTYPE not in DTYPES:
+    raise ValueError(f"VECTOR_INDEX_STORAGE_DTYPE must be one of {', '.join(DTYPES)}")
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """float32 copy with unit-length rows. Raises ValueError on zero or non-finite rows."""
+    vectors = np.array(vectors, dtype=np.float32, ndmin=2)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    if not np.all(np.isfinite(norms)) or np.any(norms == 0):
+        raise ValueError("Vectors must be finite and non-zero")
+    return vectors / norms
+
+
+def nearest_lists(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Index of the closest centroid for every row, computed in chunks to bound memory."""
+    assign = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), ASSIGN_CHUNK):
+        chunk = vectors[start:start + ASSIGN_CHUNK]
+        assign[start:start + len(chunk)] = np.argmax(chunk @ centroids.T, axis=1)
+    return assign
+
+
+def train_centroids(vectors: np.ndarray, lists: int, seed: int = 0) -> np.ndarray:
+    """Spherical k-means on a sample of unit vectors; returns (lists x dim) unit centroids."""
+    rng = np.random.default_rng(seed)
+    sample_size = min(len(vectors), lists * KMEANS_SAMPLE_PER_LIST)
+    sample = vectors[np.sort(rng.choice(len(vectors), sample_size, replace=False))]
+    centroids = sample[rng.choice(len(sample), lists, replace=False)].copy()
+    for _ in range(KMEANS_ITERATIONS):
+        assign = nearest_lists(sample, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, sample)
+        norms = np.linalg.norm(sums, axis=1)
+        empty = norms == 0
+        if empty.any():
+            # Re-seed empty lists with random sample points
+            sums[empty] = sample[rng.choice(len(sample), int(empty.sum()), replace=False)]
+            norms[empty] = 1.0
+        centroids = sums / norms[:, None]
+    return centroids.astype(np.float32)
+
+
+def list_count(size: int) -> int:
+    return max(1, int(math.sqrt(size)))
+
+
+def matches_filters(metadata: Optional[dict], filters: Optional[dict]) -> bool:
+    """
+    Metadata filter: every key must match. A list on either side matches on any
+    shared item (case-insensitive); a string filter matches string metadata that
+    contains it (case-insensitive); anything else must be equal.
+    """
+    if not filters:
+        return True
+    metadata = metadata or {}
+    for key, wanted in filters.items():
+        value = metadata.get(key)
+        if value is None:
+            return False
+        if isinstance(wanted, list) or isinstance(value, list):
+            wanted_set = {str(w).lower() for w in (wanted if isinstance(wanted, list) else [wanted])}
+            values = value if isinstance(value, list) else [value]
+            if not any(str(v).lower() in wanted_set for v in values):
+                return False
+        elif isinstance(wanted, str) and isinstance(value, str):
+            if wanted.lower() not in value.lower():
+                return False
+        elif wanted != value:
+            return False
+    return True
+
+
+class TenantIndex:
+    """
+    One tenant's vectors. Once trained, rows [0, sorted_count) are laid out
+    list by list (offsets[l]:offsets[l + 1] is list l), so probing a list is a
+    contiguous slice rather than a gather. Rows written after training go to
+    a tail that is probed through assign[row]. Deletes clear the row's alive
+    flag; dead rows are dropped by compaction or the next training run.
+    """
+
+    def __init__(self, tenant: str, dim: int):
+        self.tenant = tenant
+        self.dim = dim
+        self.vectors = np.zeros((0, dim), dtype=np.float32)
+        self.alive = np.zeros(0, dtype=bool)
+        self.assign = np.zeros(0, dtype=np.int32)  # row -> IVF list, -1 while untrained
+        self.ids: List[Optional[str]] = []
+        self.metadata: List[Optional[dict]] = []
+        self.rows: Dict[str, int] = {}
+        self.centroids: Optional[np.ndarray] = None
+        self.offsets: Optional[np.ndarray] = None
+        self.sorted_count = 0
+        self.trained_size = 0
+        self.dirty = False
+        self.training = False
+        self._changed_while_training: set = set()
+        self.lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.rows)
+
+    @property
+    def count(self) -> int:
+        return len(self.ids)
+
+    def _reserve(self, extra: int):
+        needed = self.count + extra
+        if needed <= len(self.vectors):
+            return
+        capacity = max(needed, 2 * len(self.vectors), 1024)
+        grown = np.zeros((capacity, self.dim), dtype=np.float32)
+        grown[:self.count] = self.vectors[:self.count]
+        self.vectors = grown
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:self.count] = self.alive[:self.count]
+        self.alive = alive
+        assign = np.full(capacity, -1, dtype=np.int32)
+        assign[:self.count] = self.assign[:self.count]
+        self.assign = assign
+
+    def _append(self, item_ids: List[str], vectors: np.ndarray, metadata: List[Optional[dict]], assign: np.ndarray):
+        self._reserve(len(item_ids))
+        start = self.count
+        end = start + len(item_ids)
+        self.vectors[start:end] = vectors
+        self.alive[start:end] = True
+        self.assign[start:end] = assign
+        for row, item_id in enumerate(item_ids, start):
+            self.rows[item_id] = row
+        self.ids.extend(item_ids)
+        self.metadata.extend(metadata)
+        return range(start, end)
+
+    def _kill(self, row: int):
+        self.alive[row] = False
+        self.ids[row] = None
+        self.metadata[row] = None
+
+    def upsert(self, ids: List[str], vectors: np.ndarray, metadata: List[Optional[dict]]):
+        """Insert or replace vectors (already unit length) by id."""
+        with self.lock:
+            # Last write wins for ids repeated within one batch
+            order = list({item_id: n for n, item_id in enumerate(ids)}.values())
+            vectors = vectors[order]
+            lists = nearest_lists(vectors, self.centroids) if self.centroids is not None else np.full(len(order), -1)
+
+            touched, appended = [], []
+            for position, n in enumerate(order):
+                row = self.rows.get(ids[n])
+                if row is not None and (row >= self.sorted_count or lists[position] == self.assign[row]):
+                    # Still in the right place - overwrite
+                    self.vectors[row] = vectors[position]
+                    self.metadata[row] = metadata[n]
+                    touched.append(row)
+                    continue
+                if row is not None:
+                    # Moved to another list: the sorted slot can't follow it, so re-add at the tail
+                    self._kill(row)
+                    touched.append(row)
+                appended.append(position)
+            if appended:
+                touched.extend(self._append(
+                    [ids[order[p]] for p in appended], vectors[appended],
+                    [metadata[order[p]] for p in appended], lists[appended],
+                ))
+            if self.training:
+                self._changed_while_training.update(touched)
+            self.dirty = True
+
+    def delete(self, ids: Iterable[str]) -> int:
+        with self.lock:
+            deleted = 0
+            for item_id in ids:
+                row = self.rows.pop(item_id, None)
+                if row is None:
+                    continue
+                self._kill(row)
+                deleted += 1
+            if deleted:
+                self.dirty = True
+                if not self.training and self.count - len(self.rows) > COMPACT_RATIO * self.count:
+                    self._compact()
+            return deleted
+
+    def _compact(self):
+        keep = np.flatnonzero(self.alive[:self.count])
+        self.vectors = self.vectors[keep]
+        self.alive = np.ones(len(keep), dtype=bool)
+        self.assign = self.assign[keep]
+        self.ids = [self.ids[row] for row in keep]
+        self.metadata = [self.metadata[row] for row in keep]
+        self.rows = {item_id: row for row, item_id in enumerate(self.ids)}
+        # Dropping rows keeps the sorted region sorted; only its bounds move
+        self.sorted_count = int(np.searchsorted(keep, self.sorted_count))
+        self._set_offsets()
+
+    def _set_offsets(self):
+        if self.centroids is None:
+            self.offsets = None
+            return
+        self.offsets = np.searchsorted(
+            self.assign[:self.sorted_count], np.arange(len(self.centroids) + 1)
+        ).astype(np.int64)
+
+    # Training
+
+    def needs_training(self) -> bool:
+        size = len(self.rows)
+        if self.training or size < IVF_MIN_VECTORS:
+            return False
+        return self.centroids is None or size >= 2 * self.trained_size
+
+    def train(self, seed: int = 0):
+        """
+        (Re)build the IVF lists and re-lay the rows out list by list. The slow
+        part runs without the lock on a snapshot; rows written meanwhile are
+        moved to the tail when the result is installed.
+        """
+        with self.lock:
+            if self.training:
+                return
+            self.training = True
+            self._changed_while_training = set()
+            snapshot_count = self.count
+            live = np.flatnonzero(self.alive[:snapshot_count])
+            vectors = self.vectors[live]
+        try:
+            centroids = train_centroids(vectors, list_count(len(vectors)), seed)
+            assign = nearest_lists(vectors, centroids)
+            order = np.argsort(assign, kind="stable")
+            size = len(live)
+            new_vectors = np.zeros((size + max(size // 4, 1024), self.dim), dtype=np.float32)
+            new_vectors[:size] = vectors[order]
+            del vectors
+            new_assign = np.full(len(new_vectors), -1, dtype=np.int32)
+            new_assign[:size] = assign[order]
+            old_rows = live[order]
+
+            with self.lock:
+                changed = self._changed_while_training | set(range(snapshot_count, self.count))
+                new_alive = np.zeros(len(new_vectors), dtype=bool)
+                new_alive[:size] = self.alive[old_rows]
+                if changed:
+                    new_alive[:size] &= ~np.isin(old_rows, np.fromiter(changed, dtype=np.int64))
+                tail = [row for row in sorted(changed) if self.alive[row]]
+                tail_vectors = self.vectors[tail]
+                tail_ids = [self.ids[row] for row in tail]
+                tail_metadata = [self.metadata[row] for row in tail]
+                ids = [self.ids[row] if new_alive[n] else None for n, row in enumerate(old_rows)]
+                metadata = [self.metadata[row] if new_alive[n] else None for n, row in enumerate(old_rows)]
+
+                self.vectors, self.alive, self.assign = new_vectors, new_alive, new_assign
+                self.ids, self.metadata = ids, metadata
+                self.rows = {item_id: row for row, item_id in enumerate(ids) if item_id is not None}
+                self.centroids = centroids
+                self.sorted_count = size
+                self._set_offsets()
+                if tail:
+                    self._append(tail_ids, tail_vectors, tail_metadata, nearest_lists(tail_vectors, centroids))
+                self.trained_size = size
+                self.dirty = True
+        finally:
+            with self.lock:
+                self.training = False
+                self._changed_while_training = set()
+        print(f"Vector index {self.tenant}: trained {len(centroids)} lists on {size} vectors")
+
+    # Search
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int,
+        min_score: float = -1.0,
+        exclude: Iterable[str] = (),
+        filters: Optional[dict] = None,
+        nprobe: Optional[int] = None,
+    ) -> Tuple[List[Tuple[str, float, Optional[dict]]], bool]:
+        """
+        Top-k (id, score, metadata) by cosine similarity, best first, plus
+        whether the result is exact. With exclusions or metadata filters, an
+        IVF search that comes back short is repeated as an exact scan, so
+        selective filters don't silently lose matches.
+        """
+        exclude = set(exclude)
+        filtered = bool(exclude or filters)
+        with self.lock:
+            if not self.rows:
+                return [], True
+            if self.centroids is not None:
+                rows, scores = self._probe(query, nprobe)
+                results = self._top(rows, scores, k, min_score, exclude, filters)
+                if len(results) >= k or not filtered:
+                    return results, False
+            scores = self.vectors[:self.count] @ query
+            rows = np.flatnonzero(self.alive[:self.count])
+            return self._top(rows, scores[rows], k, min_score, exclude, filters), True
+
+    def _probe(self, query: np.ndarray, nprobe: Optional[int]):
+        """Rows and scores for the nprobe lists closest to the query (sorted region slices plus the tail)."""
+        nprobe = min(max(nprobe or DEFAULT_NPROBE, 1), len(self.centroids))
+        lists = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        row_parts, score_parts = [], []
+        for start, end in zip(self.offsets[lists], self.offsets[lists + 1]):
+            if end > start:
+                row_parts.append(np.arange(start, end))
+                score_parts.append(self.vectors[start:end] @ query)
+        if self.count > self.sorted_count:
+            probed = np.zeros(len(self.centroids) + 1, dtype=bool)  # last slot: unassigned (-1)
+            probed[lists] = True
+            probed[-1] = True
+            tail = self.sorted_count + np.flatnonzero(probed[self.assign[self.sorted_count:self.count]])
+            row_parts.append(tail)
+            score_parts.append(self.vectors[tail] @ query)
+        if not row_parts:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        rows = np.concatenate(row_parts)
+        scores = np.concatenate(score_parts)
+        live = self.alive[rows]
+        return rows[live], scores[live]
+
+    def _top(self, rows, scores, k, min_score, exclude, filters):
+        keep = scores >= min_score
+        rows, scores = rows[keep], scores[keep]
+        if not (exclude or filters) and len(rows) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+            rows, scores = rows[top], scores[top]
+        results = []
+        for i in np.argsort(-scores, kind="stable"):
+            row = rows[i]
+            item_id = self.ids[row]
+            if item_id in exclude or not matches_filters(self.metadata[row], filters):
+                continue
+            results.append((item_id, float(scores[i]), self.metadata[row]))
+            if len(results) >= k:
+                break
+        return results
+
+    # Persistence
+
+    def snapshot(self) -> dict:
+        """Live rows only (layout preserved), copied under the lock so saving doesn't block writers."""
+        with self.lock:
+            live = np.flatnonzero(self.alive[:self.count])
+            state = {
+                "tenant": self.tenant,
+                "dim": self.dim,
+                "vectors": self.vectors[live],
+                "assign": self.assign[live],
+                "centroids": None if self.centroids is None else self.centroids.copy(),
+                "sortedCount": int(np.searchsorted(live, self.sorted_count)),
+                "trainedSize": self.trained_size,
+                "items": [[self.ids[row], self.metadata[row]] for row in live],
+            }
+            self.dirty = False
+            return state
+
+    @classmethod
+    def load(cls, directory: str) -> "TenantIndex":
+        with open(os.path.join(directory, "manifest.json")) as f:
+            manifest = json.load(f)
+        with open(os.path.join(directory, "items.json")) as f:
+            items = json.load(f)
+        index = cls(manifest["tenant"], manifest["dim"])
+        # Copy-on-write mapping: pages are read on first use, writes stay private
+        index.vectors = load_block(os.path.join(directory, "vectors.npy"), mmap_mode="c")
+        if manifest.get("dtype", "float32") != "float32" and len(index.vectors):
+            # Quantization error leaves rows slightly off unit length
+            index.vectors = normalize_rows(index.vectors)
+        if len(index.vectors) != len(items) or index.vectors.shape[1:] != (index.dim,):
+            raise ValueError("vector and item counts differ")
+        index.assign = np.array(np.load(os.path.join(directory, "assign.npy")), dtype=np.int32)
+        index.alive = np.ones(len(items), dtype=bool)
+        index.ids = [item_id for item_id, _ in items]
+        index.metadata = [metadata for _, metadata in items]
+        index.rows = {item_id: row for row, item_id in enumerate(index.ids)}
+        centroids_path = os.path.join(directory, "centroids.npy")
+        if os.path.exists(centroids_path):
+            index.centroids = np.load(centroids_path)
+            index.sorted_count = manifest.get("sortedCount", 0)
+            index.trained_size = manifest.get("trainedSize", len(items))
+            index._set_offsets()
+        return index
+
+
+def save_snapshot(state: dict, directory: str):
+    """Write a partition snapshot to directory, replacing the old copy atomically."""
+    parent = os.path.dirname(directory)
+    tmp = tempfile.mkdtemp(prefix=".tmp-", dir=parent)
+    try:
+        save_block(os.path.join(tmp, "vectors.npy"), state["vectors"], STORAGE_DTYPE)
+        np.save(os.path.join(tmp, "assign.npy"), state["assign"])
+        if state["centroids"] is not None:
+            np.save(os.path.join(tmp, "centroids.npy"), state["centroids"])
+        with open(os.path.join(tmp, "items.json"), "w") as f:
+            json.dump(state["items"], f, separators=(",", ":"))
+        with open(os.path.join(tmp, "manifest.json"), "w") as f:
+            json.dump({"tenant": state["tenant"], "dim": state["dim"], "count": len(state["items"]),
+                       "dtype": STORAGE_DTYPE, "sortedCount": state["sortedCount"],
+                       "trainedSize": state["trainedSize"]}, f)
+        old = None
+        if os.path.exists(directory):
+            old = directory + ".old"
+            shutil.rmtree(old, ignore_errors=True)
+            os.rename(directory, old)
+        os.rename(tmp, directory)
+        if old:
+            shutil.rmtree(old, ignore_errors=True)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+
+class VectorIndex:
+    """Tenant partitions plus background training and periodic saving."""
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or os.getenv("VECTOR_INDEX_DIR") or os.path.join(
+            tempfile.gettempdir(), "talentx-ai-vectors"
+        )
+        self.save_interval = float(os.getenv("VECTOR_INDEX_SAVE_INTERVAL", "30"))
+        self.partitions: Dict[str, TenantIndex] = {}
+        self._save_task: Optional[asyncio.Task] = None
+        self._training: Dict[str, asyncio.Task] = {}
+
+    def _partition_dir(self, tenant: str) -> str:
+        # Tenant ids are caller-supplied; never use them as path components directly
+        return os.path.join(self.directory, hashlib.sha256(tenant.encode("utf-8")).hexdigest()[:32])
+
+    async def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self.partitions = await asyncio.to_thread(self._load_all)
+        for index in self.partitions.values():
+            self._maybe_train(index)
+        self._save_task = asyncio.create_task(self._save_loop())
+        print(f"Vector index ready ({len(self.partitions)} tenants, {sum(map(len, self.partitions.values()))} vectors)")
+
+    async def stop(self):
+        for task in [self._save_task, *self._training.values()]:
+            if task:
+                task.cancel()
+        self._save_task = None
+        await self.save()
+
+    def _load_all(self) -> Dict[str, TenantIndex]:
+        partitions = {}
+        for name in sorted(os.listdir(self.directory)):
+            path = os.path.join(self.directory, name)
+            if name.startswith(".") or name.endswith(".old") or not os.path.isdir(path):
+                continue
+            try:
+                index = TenantIndex.load(path)
+                partitions[index.tenant] = index
+            except Exception as e:
+                print(f"Skipping unreadable vector index partition {name}: {e}")
+        return partitions
+
+    async def _save_loop(self):
+        while True:
+            await asyncio.sleep(self.save_interval)
+            try:
+                await self.save()
+            except Exception as e:
+                print(f"Vector index save failed: {e}")
+
+    async def save(self):
+        """Persist every partition changed since its last save."""
+        for tenant, index in list(self.partitions.items()):
+            if not index.dirty:
+                continue
+            state = await asyncio.to_thread(index.snapshot)
+            try:
+                await asyncio.to_thread(save_snapshot, state, self._partition_dir(tenant))
+            except Exception:
+                index.dirty = True
+                raise
+            if self.partitions.get(tenant) is not index:
+                # Dropped while it was being written
+                await asyncio.to_thread(shutil.rmtree, self._partition_dir(tenant), True)
+
+    def _maybe_train(self, index: TenantIndex):
+        if index.needs_training() and index.tenant not in self._training:
+            task = asyncio.create_task(asyncio.to_thread(index.train))
+            self._training[index.tenant] = task
+            task.add_done_callback(lambda _: self._training.pop(index.tenant, None))
+
+    async def upsert(self, tenant: str, ids: List[str], vectors, metadata: List[Optional[dict]]):
+        """Raises ValueError for bad vectors or a dimension that doesn't match the partition."""
+        vectors = normalize_rows(vectors)
+        index = self.partitions.get(tenant)
+        if index is None:
+            index = self.partitions.setdefault(tenant, TenantIndex(tenant, vectors.shape[1]))
+        if vectors.shape[1] != index.dim:
+            raise ValueError(f"Expected {index.dim}-dimensional vectors, got {vectors.shape[1]}")
+        await asyncio.to_thread(index.upsert, ids, vectors, metadata)
+        self._maybe_train(index)
+
+    async def delete(self, tenant: str, ids: List[str]) -> int:
+        index = self.partitions.get(tenant)
+        if index is None:
+            return 0
+        return await asyncio.to_thread(index.delete, ids)
+
+    async def search(self, tenant: str, vector, k: int, **options):
+        """(results, exact) for the tenant; an unknown tenant has no results."""
+        index = self.partitions.get(tenant)
+        if index is None:
+            return [], True
+        query = normalize_rows(vector)[0]
+        if len(query) != index.dim:
+            raise ValueError(f"Expected a {index.dim}-dimensional vector, got {len(query)}")
+        return await asyncio.to_thread(index.search, query, k, **options)
+
+    async def drop(self, tenant: str) -> bool:
+        index = self.partitions.pop(tenant, None)
+        await asyncio.to_thread(shutil.rmtree, self._partition_dir(tenant), True)
+        return index is not None
+
+    def partition_stats(self, index: TenantIndex) -> dict:
+        return {
+            "tenant": index.tenant,
+            "vectors": len(index),
+            "dim": index.dim,
+            "lists": 0 if index.centroids is None else len(index.centroids),
+            "training": index.tenant in self._training,
+        }
+
+    def stats(self) -> dict:
+        return {
+            "tenants": len(self.partitions),
+            "vectors": sum(len(index) for index in self.partitions.values()),
+            "training": len(self._training),
+        }
@@ -6,17 +6,48 @@ dotenv.config();
 
 const prisma = new PrismaClient();
 const AI_SERVICE_URL = process.env.AI_SERVICE_URL || 'http://127.0.0.1:8000';
+const BATCH_SIZE = parseInt(process.env.EMBEDDING_BATCH_SIZE || '64', 10);
 
-async function getEmbedding(text: string): Promise<number[]> {
+interface BatchEmbeddingItem {
+    index: number;
+    embedding: number[] | null;
+    error: string | null;
+}
+
+// Ask for the AI service's binary float32 encoding rather than JSON: about a
+// fifth of the bytes and no float parsing. Layout (see vector_codec.py):
+// rows*dim little-endian float32 values, then one uint8 "present" flag per row.
+const EMBEDDING_MEDIA_TYPE = 'application/x-embedding-float32';
+
+function decodeEmbeddingBlock(data: Buffer, shape: string): BatchEmbeddingItem[] {
+    const [rows, dim] = shape.split(',').map((value) => parseInt(value, 10));
+    const view = new DataView(data.buffer, data.byteOffset, data.byteLength);
+    const presentOffset = rows * dim * 4;
+    const items: BatchEmbeddingItem[] = [];
+    for (let row = 0; row < rows; row++) {
+        if (!view.getUint8(presentOffset + row)) {
+            items.push({ index: row, embedding: null, error: 'Embedding failed' });
+            continue;
+        }
+        const embedding = new Array<number>(dim);
+        for (let i = 0; i < dim; i++) {
+            embedding[i] = view.getFloat32((row * dim + i) * 4, true);
+        }
+        items.push({ index: row, embedding, error: null });
+    }
+    return items;
+}
+
+async function getEmbeddings(texts: string[]): Promise<BatchEmbeddingItem[]> {
     try {
-        const response = await axios.post(
-            `${AI_SERVICE_URL}/embeddings`,
-            { text: text.substring(0, 8000) },
-            { timeout: 10000 }
+        const response = await axios.post<Buffer>(
+            `${AI_SERVICE_URL}/embeddings/batch`,
+            { texts, chunking: true },
+            { timeout: 120000, responseType: 'arraybuffer', headers: { Accept: EMBEDDING_MEDIA_TYPE } }
         );
-        return response.data.embedding;
+        return decodeEmbeddingBlock(Buffer.from(response.data), response.headers['x-embedding-shape']);
     } catch (error: any) {
-        console.error('Failed to get embedding:', error.message);
+        console.error('Failed to get embeddings:', error.message);
         throw error;
     }
 }
@@ -28,7 +59,7 @@ function buildCandidateText(candidate: any): string {
     if (candidate.location) parts.push(`Location: ${candidate.location}`);
     if (candidate.skills?.length) parts.push(`Skills: ${candidate.skills.join(', ')}`);
     if (candidate.summary) parts.push(candidate.summary);
-    if (candidate.resumeText) parts.push(candidate.resumeText.substring(0, 2000));
+    if (candidate.resumeText) parts.push(candidate.resumeText);
     return parts.join(' ');
 }
 
@@ -45,24 +76,38 @@ async function main() {
 
     console.log(`Found ${candidates.length} candidates without embeddings.`);
 
-    for (let i = 0; i < candidates.length; i++) {
-        const candidate = candidates[i];
-        console.log(`[${i + 1}/${candidates.length}] Processing ${candidate.firstName} ${candidate.lastName} (${candidate.id})...`);
+    for (let start = 0; start < candidates.length; start += BATCH_SIZE) {
+        const batch = candidates.slice(start, start + BATCH_SIZE);
+        console.log(`[${start + 1}-${start + batch.length}/${candidates.length}] Embedding batch...`);
 
+        let items: BatchEmbeddingItem[];
         try {
-            const text = buildCandidateText(candidate);
-            const embedding = await getEmbedding(text);
-            const embeddingArray = `[${embedding.join(',')}]`;
+            items = await getEmbeddings(batch.map(buildCandidateText));
+        } catch (error: any) {
+            console.error(`Failed to embed batch starting at ${start}:`, error.message);
+            continue;
+        }
 
-            await prisma.$executeRawUnsafe(
-                `UPDATE candidates SET embedding = $1::vector WHERE id = $2`,
-                embeddingArray,
-                candidate.id
-            );
+        for (const item of items) {
+            const candidate = batch[item.index];
+            if (!item.embedding) {
+                console.error(`Failed to process candidate ${candidate.id}:`, item.error);
+                continue;
+            }
 
-            console.log(`Successfully updated embedding for ${candidate.id}`);
-        } catch (error: any) {
-            console.error(`Failed to process candidate ${candidate.id}:`, error.message);
+            try {
+                const embeddingArray = `[${item.embedding.join(',')}]`;
+
+                await prisma.$executeRawUnsafe(
+                    `UPDATE candidates SET embedding = $1::vector WHERE id = $2`,
+                    embeddingArray,
+                    candidate.id
+                );
+
+                console.log(`Successfully updated embedding for ${candidate.id}`);
+            } catch (error: any) {
+                console.error(`Failed to process candidate ${candidate.id}:`, error.message);
+            }
         }
     }
 
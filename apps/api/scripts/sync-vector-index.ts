@@ -0,0 +1,93 @@
+import { PrismaClient } from '@prisma/client';
+import axios from 'axios';
+import * as dotenv from 'dotenv';
+
+dotenv.config();
+
+// Loads candidate embeddings already stored in pgvector into the AI service's
+// per-tenant vector index (POST /vectors/{tenantId}/upsert). Run once per
+// environment, and again after restoring the index directory from scratch.
+//
+//   npx ts-node scripts/sync-vector-index.ts [tenantId]
+
+const prisma = new PrismaClient();
+const AI_SERVICE_URL = process.env.AI_SERVICE_URL || 'http://127.0.0.1:8000';
+const BATCH_SIZE = parseInt(process.env.VECTOR_SYNC_BATCH_SIZE || '500', 10);
+
+interface CandidateVectorRow {
+    id: string;
+    tenantId: string;
+    skills: string[];
+    location: string | null;
+    embedding: string; // pgvector text form: "[0.1,0.2,...]"
+}
+
+async function upsert(tenantId: string, rows: CandidateVectorRow[]): Promise<number> {
+    const response = await axios.post(
+        `${AI_SERVICE_URL}/vectors/${encodeURIComponent(tenantId)}/upsert`,
+        {
+            items: rows.map((row) => ({
+                id: row.id,
+                vector: JSON.parse(row.embedding),
+                metadata: { skills: row.skills ?? [], location: row.location ?? undefined },
+            })),
+        },
+        { timeout: 120000 }
+    );
+    for (const error of response.data.errors) {
+        console.error(`Failed to index candidate ${error.id}:`, error.error);
+    }
+    return response.data.upserted;
+}
+
+async function main() {
+    const onlyTenant = process.argv[2];
+    console.log(`Syncing candidate embeddings to the vector index${onlyTenant ? ` for tenant ${onlyTenant}` : ''}...`);
+
+    let lastId = '';
+    let total = 0;
+    for (;;) {
+        // Keyset pagination so large tables are streamed, not loaded at once
+        const rows: CandidateVectorRow[] = onlyTenant
+            ? await prisma.$queryRaw`
+                SELECT id, "tenantId", skills, location, embedding::text AS embedding
+                FROM candidates
+                WHERE embedding IS NOT NULL AND id > ${lastId} AND "tenantId" = ${onlyTenant}
+                ORDER BY id
+                LIMIT ${BATCH_SIZE}
+            `
+            : await prisma.$queryRaw`
+                SELECT id, "tenantId", skills, location, embedding::text AS embedding
+                FROM candidates
+                WHERE embedding IS NOT NULL AND id > ${lastId}
+                ORDER BY id
+                LIMIT ${BATCH_SIZE}
+            `;
+        if (rows.length === 0) break;
+        lastId = rows[rows.length - 1].id;
+
+        const byTenant = new Map<string, CandidateVectorRow[]>();
+        for (const row of rows) {
+            byTenant.set(row.tenantId, [...(byTenant.get(row.tenantId) ?? []), row]);
+        }
+        for (const [tenantId, tenantRows] of byTenant) {
+            try {
+                total += await upsert(tenantId, tenantRows);
+            } catch (error: any) {
+                console.error(`Failed to index ${tenantRows.length} candidates for tenant ${tenantId}:`, error.message);
+            }
+        }
+        console.log(`Indexed ${total} candidates so far...`);
+    }
+
+    console.log(`Vector index sync completed (${total} candidates).`);
+}
+
+main()
+    .catch((e) => {
+        console.error(e);
+        process.exit(1);
+    })
+    .finally(async () => {
+        await prisma.$disconnect();
+    });
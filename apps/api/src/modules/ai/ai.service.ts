@@ -15,10 +15,12 @@ export class AiService {
   }
 
   async generateJd(dto: GenerateJdDto) {
+    const { regenerate, ...request } = dto;
     try {
       const response = await axios.post(
         `${this.aiServiceUrl}/generate-jd`,
-        dto,
+        request,
+        { params: { refresh: regenerate ?? false } },
       );
       return response.data;
     } catch (error) {
@@ -69,18 +71,28 @@ export class AiService {
       );
     }
   }
-  async matchCandidate(resumeText: string, jobDescription: string) {
+  /**
+   * mode: "fast" (deterministic, milliseconds), "llm" (LLM, deterministic score
+   * if it fails) or "hybrid" (fast score now, LLM result on later calls).
+   */
+  async matchCandidate(
+    resumeText: string,
+    jobDescription: string,
+    mode: "fast" | "llm" | "hybrid" = "llm",
+  ) {
     try {
       const response = await axios.post(`${this.aiServiceUrl}/match`, {
         resumeText,
         jobDescription,
+        mode,
       });
       return response.data;
     } catch (error) {
       console.error("AI Service Error (Match):", error);
-      // Return fallback so we don't crash
+      // Return fallback so we don't crash - a null score leaves the application unscored
+      // instead of ranking it at 0
       return {
-        score: 0,
+        score: null,
         matchedSkills: [],
         missingSkills: [],
         summary: "AI matching unavailable",
@@ -1,4 +1,10 @@
-import { IsString, IsArray, IsOptional, IsNotEmpty } from "class-validator";
+import {
+  IsString,
+  IsArray,
+  IsOptional,
+  IsNotEmpty,
+  IsBoolean,
+} from "class-validator";
 import { ApiProperty, ApiPropertyOptional } from "@nestjs/swagger";
 
 export class GenerateJdDto {
@@ -27,4 +33,12 @@ export class GenerateJdDto {
   @IsString()
   @IsOptional()
   tone?: string;
+
+  @ApiPropertyOptional({
+    example: false,
+    description: "Skip the cached result and generate a new description",
+  })
+  @IsBoolean()
+  @IsOptional()
+  regenerate?: boolean;
 }
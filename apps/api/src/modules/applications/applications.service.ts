@@ -118,6 +118,9 @@ export class ApplicationsService {
     // Calculate AI Match Score if candidate has resume text
     let matchScore = null;
     let matchSummary = null;
+    // Set when the AI service is still refining the score with the LLM
+    let refineMatch: { resumeText: string; jobDescription: string } | null =
+      null;
 
     try {
       const candidate = await this.prisma.candidate.findUnique({
@@ -148,12 +151,20 @@ export class ApplicationsService {
       }
 
       if (textToMatch && job?.description) {
+        // Hybrid: don't hold up the application on the LLM
         const matchResult = await this.aiService.matchCandidate(
           textToMatch,
           job.description,
+          "hybrid",
         );
         matchScore = matchResult.score;
         matchSummary = matchResult.summary;
+        if (matchResult.refining) {
+          refineMatch = {
+            resumeText: textToMatch,
+            jobDescription: job.description,
+          };
+        }
       }
     } catch (error) {
       console.error("Failed to calculate match score:", error);
@@ -185,9 +196,37 @@ export class ApplicationsService {
     // Send notification for new application
     await this.sendNewApplicationNotification(application);
 
+    if (refineMatch) {
+      this.storeRefinedMatch(application.id, refineMatch);
+    }
+
     return application;
   }
 
+  /**
+   * Replace the fast score saved at creation with the LLM score once the AI
+   * service's background refinement finishes. mode=llm joins the refinement
+   * already in flight instead of starting a second LLM call.
+   */
+  private storeRefinedMatch(
+    applicationId: string,
+    match: { resumeText: string; jobDescription: string },
+  ) {
+    this.aiService
+      .matchCandidate(match.resumeText, match.jobDescription, "llm")
+      .then(async (result) => {
+        // Fast fallback or AI service down - keep the score we already have
+        if (result.source !== "llm") return;
+        await this.prisma.application.update({
+          where: { id: applicationId },
+          data: { matchScore: result.score, matchSummary: result.summary },
+        });
+      })
+      .catch((err) =>
+        console.error(`Refined match failed for ${applicationId}`, err),
+      );
+  }
+
   private async sendNewApplicationNotification(application: any) {
     try {
       const job = application.job;
@@ -314,6 +353,9 @@ export class ApplicationsService {
     // Calculate AI Match Score if candidate has resume text
     let matchScore = null;
     let matchSummary = null;
+    // Set when the AI service is still refining the score with the LLM
+    let refineMatch: { resumeText: string; jobDescription: string } | null =
+      null;
 
     try {
       // Re-fetch full candidate details to ensure we have latest data
@@ -335,12 +377,20 @@ export class ApplicationsService {
       }
 
       if (textToMatch && job.description) {
+        // Hybrid: don't hold up the application on the LLM
         const matchResult = await this.aiService.matchCandidate(
           textToMatch,
           job.description,
+          "hybrid",
         );
         matchScore = matchResult.score;
         matchSummary = matchResult.summary;
+        if (matchResult.refining) {
+          refineMatch = {
+            resumeText: textToMatch,
+            jobDescription: job.description,
+          };
+        }
       }
     } catch (error) {
       console.error("Failed to calculate match score for public app:", error);
@@ -381,10 +431,10 @@ export class ApplicationsService {
     // Send notification for new application
     await this.sendNewApplicationNotification(application);
 
-    // Trigger AI Matching asynchronously
-    this.calculateMatch(application.id).catch((err) =>
-      console.error("AI Match failed", err),
-    );
+    // The LLM score replaces the fast one when the refinement finishes
+    if (refineMatch) {
+      this.storeRefinedMatch(application.id, refineMatch);
+    }
 
     return application;
   }
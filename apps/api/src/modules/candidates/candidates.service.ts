@@ -401,7 +401,7 @@ export class CandidatesService {
     }
 
     // Transaction to ensure data integrity
-    return this.prisma.$transaction(async (tx) => {
+    const merged = await this.prisma.$transaction(async (tx) => {
       // 1. Move Applications
       await tx.application.updateMany({
         where: { candidateId: secondaryId },
@@ -448,15 +448,22 @@ export class CandidatesService {
 
       return tx.candidate.findUnique({ where: { id: primaryId } });
     });
+
+    await this.semanticSearchService.removeFromVectorIndex(tenantId, [
+      secondaryId,
+    ]);
+    return merged;
   }
 
   async bulkDelete(ids: string[], tenantId: string) {
-    return this.prisma.candidate.deleteMany({
+    const result = await this.prisma.candidate.deleteMany({
       where: {
         id: { in: ids },
         tenantId,
       },
     });
+    await this.semanticSearchService.removeFromVectorIndex(tenantId, ids);
+    return result;
   }
 
   async findById(id: string) {
@@ -516,8 +523,12 @@ export class CandidatesService {
   }
 
   async remove(id: string) {
-    await this.findById(id);
-    return this.prisma.candidate.delete({ where: { id } });
+    const candidate = await this.findById(id);
+    const deleted = await this.prisma.candidate.delete({ where: { id } });
+    await this.semanticSearchService.removeFromVectorIndex(candidate.tenantId, [
+      id,
+    ]);
+    return deleted;
   }
 
   async addTags(id: string, tags: string[]) {
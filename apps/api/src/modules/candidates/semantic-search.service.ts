@@ -34,6 +34,17 @@ interface EmbeddingResponse {
   embedding: number[];
 }
 
+interface VectorSearchHit {
+  id: string;
+  score: number;
+}
+
+interface VectorSearchResponse {
+  hits: VectorSearchHit[];
+  exact: boolean;
+  tookMs: number;
+}
+
 interface CandidateWithEmbedding {
   id: string;
   firstName: string;
@@ -74,6 +85,13 @@ export class SemanticSearchService {
   ): Promise<SemanticSearchResult[]> {
     const { query, tenantId, limit = 20, minScore = 0.5, filters } = options;
 
+    // Per-tenant ANN index in the AI service; pgvector below is the fallback
+    // while a tenant isn't indexed or the AI service can't embed the query
+    const indexed = await this.searchVectorIndex(options);
+    if (indexed) {
+      return indexed;
+    }
+
     try {
       // Step 1: Get query embedding from AI service
       const queryEmbedding = await this.getEmbedding(query);
@@ -153,6 +171,12 @@ export class SemanticSearchService {
             `;
 
       this.logger.log(`Updated embedding for candidate ${candidateId}`);
+
+      await this.upsertVectorIndex(
+        tenantId,
+        candidate as CandidateWithEmbedding,
+        text,
+      );
     } catch (error) {
       this.logger.error(
         `Failed to update candidate embedding for ${candidateId}:`,
@@ -161,6 +185,27 @@ export class SemanticSearchService {
     }
   }
 
+  /**
+   * Remove candidates from the AI service's vector index
+   */
+  async removeFromVectorIndex(
+    tenantId: string,
+    candidateIds: string[],
+  ): Promise<void> {
+    if (!candidateIds.length) return;
+    try {
+      await axios.post(
+        `${this.aiServiceUrl}/vectors/${encodeURIComponent(tenantId)}/delete`,
+        { ids: candidateIds },
+        { timeout: 10000 },
+      );
+    } catch (error) {
+      this.logger.warn(
+        `Failed to remove ${candidateIds.length} candidates from the vector index: ${error}`,
+      );
+    }
+  }
+
   /**
    * Find similar candidates to a given candidate
    */
@@ -280,7 +325,8 @@ export class SemanticSearchService {
     try {
       const response = await axios.post<EmbeddingResponse>(
         `${this.aiServiceUrl}/embeddings`,
-        { text: text.substring(0, 8000) }, // Limit text length
+        // Whole text, embedded as overlapping chunks and mean-pooled by the AI service
+        { text, chunking: true },
         { timeout: 10000 },
       );
       return response.data.embedding;
@@ -290,6 +336,113 @@ export class SemanticSearchService {
     }
   }
 
+  /**
+   * Search the tenant's partition of the AI service's vector index.
+   * Returns null when there is nothing usable (tenant not indexed, no hits
+   * or AI service unavailable) so the caller can fall back to pgvector.
+   */
+  private async searchVectorIndex(
+    options: SemanticSearchOptions,
+  ): Promise<SemanticSearchResult[] | null> {
+    const { query, tenantId, limit = 20, minScore = 0.5, filters } = options;
+    const metadataFilters: Record<string, unknown> = {};
+    if (filters?.skills?.length) metadataFilters.skills = filters.skills;
+    if (filters?.location) metadataFilters.location = filters.location;
+
+    let hits: VectorSearchHit[];
+    try {
+      const response = await axios.post<VectorSearchResponse>(
+        `${this.aiServiceUrl}/vectors/${encodeURIComponent(tenantId)}/search`,
+        {
+          text: query,
+          k: limit,
+          minScore,
+          excludeIds: filters?.excludeCandidateIds ?? [],
+          filters: Object.keys(metadataFilters).length
+            ? metadataFilters
+            : undefined,
+        },
+        { timeout: 10000 },
+      );
+      hits = response.data.hits;
+    } catch (error) {
+      this.logger.warn(`Vector index search failed, using pgvector: ${error}`);
+      return null;
+    }
+    if (!hits.length) return null;
+
+    // Hits may name candidates deleted since they were indexed; those drop out here
+    const candidates = await this.prisma.candidate.findMany({
+      where: { id: { in: hits.map((hit) => hit.id) }, tenantId },
+      select: {
+        id: true,
+        firstName: true,
+        lastName: true,
+        email: true,
+        currentTitle: true,
+        currentCompany: true,
+        location: true,
+        skills: true,
+        summary: true,
+        resumeText: true,
+      },
+    });
+    const byId = new Map(candidates.map((c) => [c.id, c]));
+
+    return hits
+      .filter((hit) => byId.has(hit.id))
+      .map((hit) => {
+        const candidate = byId.get(hit.id) as CandidateWithEmbedding;
+        return {
+          candidateId: candidate.id,
+          firstName: candidate.firstName,
+          lastName: candidate.lastName,
+          email: candidate.email,
+          currentTitle: candidate.currentTitle || undefined,
+          currentCompany: candidate.currentCompany || undefined,
+          location: candidate.location || undefined,
+          skills: candidate.skills,
+          matchScore: hit.score,
+          matchReason: this.generateMatchReason(query, candidate),
+          highlights: this.extractHighlights(query, candidate),
+        };
+      });
+  }
+
+  /**
+   * Add or refresh a candidate in the AI service's vector index. The text is
+   * embedded there (a cache hit after getEmbedding) with the embedding model
+   * only, so a fallback vector never enters the index.
+   */
+  private async upsertVectorIndex(
+    tenantId: string,
+    candidate: CandidateWithEmbedding,
+    text: string,
+  ): Promise<void> {
+    try {
+      await axios.post(
+        `${this.aiServiceUrl}/vectors/${encodeURIComponent(tenantId)}/upsert`,
+        {
+          items: [
+            {
+              id: candidate.id,
+              text,
+              metadata: {
+                skills: candidate.skills ?? [],
+                location: candidate.location ?? undefined,
+              },
+            },
+          ],
+        },
+        { timeout: 10000 },
+      );
+    } catch (error) {
+      this.logger.warn(
+        `Failed to index candidate ${candidate.id} for vector search: ${error}`,
+      );
+    }
+  }
+
   /**
    * Calculate cosine similarity between two vectors
    */
@@ -359,7 +512,7 @@ export class SemanticSearchService {
       parts.push(candidate.summary);
     }
     if (candidate.resumeText) {
-      parts.push(candidate.resumeText.substring(0, 2000));
+      parts.push(candidate.resumeText);
     }
 
     return parts.join(" ");
@@ -9,47 +9,61 @@ const axios = require('axios');
 const prisma = new PrismaClient();
 const AI_SERVICE_URL = process.env.AI_SERVICE_URL || 'http://localhost:8000';
 
-async function matchApplication(application) {
-    console.log(`\nProcessing application ${application.id}...`);
-    console.log(`  Candidate: ${application.candidate.firstName} ${application.candidate.lastName}`);
-    console.log(`  Job: ${application.job.title}`);
-
-    if (!application.candidate.resumeText) {
-        console.log(`  ⚠️  No resume text found - skipping`);
-        return false;
-    }
+const MATCH_TOP_K = parseInt(process.env.MATCH_TOP_K || '20', 10);
+
+async function matchJob(job, applications) {
+    console.log(`\nProcessing job ${job.id} (${job.title}) - ${applications.length} applications...`);
 
-    if (!application.job.description) {
+    if (!job.description) {
         console.log(`  ⚠️  No job description found - skipping`);
-        return false;
+        return { matched: 0, skipped: applications.length, failed: 0 };
+    }
+
+    const withResume = applications.filter(app => app.candidate.resumeText);
+    const skipped = applications.length - withResume.length;
+    if (skipped > 0) {
+        console.log(`  ⚠️  ${skipped} applications have no resume text - skipping them`);
+    }
+    if (withResume.length === 0) {
+        return { matched: 0, skipped, failed: 0 };
     }
 
     try {
-        // Call AI service
-        console.log(`  🤖 Calling AI service...`);
-        const response = await axios.post(`${AI_SERVICE_URL}/match`, {
-            resumeText: application.candidate.resumeText,
-            jobDescription: application.job.description
+        // One ranking call per job: every resume gets a fast score, the top K an LLM score
+        console.log(`  🤖 Ranking ${withResume.length} resumes (top ${MATCH_TOP_K} scored by LLM)...`);
+        const response = await axios.post(`${AI_SERVICE_URL}/match/rank`, {
+            jobDescription: job.description,
+            resumes: withResume.map(app => ({ id: app.id, text: app.candidate.resumeText })),
+            topK: MATCH_TOP_K
         });
 
-        const { score, summary } = response.data;
-
-        // Update application in database
-        await prisma.application.update({
-            where: { id: application.id },
-            data: {
-                matchScore: score,
-                matchSummary: summary
+        let matched = 0;
+        let failed = 0;
+        for (const candidate of response.data.candidates) {
+            const summary = candidate.summary ||
+                `Matched ${candidate.matchedSkills.length} of ${response.data.jobSkills.length} key skills.`;
+            try {
+                await prisma.application.update({
+                    where: { id: candidate.id },
+                    data: {
+                        matchScore: candidate.score,
+                        matchSummary: summary
+                    }
+                });
+                matched++;
+            } catch (error) {
+                console.error(`  ❌ Failed to update ${candidate.id}:`, error.message);
+                failed++;
             }
-        });
+        }
 
-        console.log(`  ✅ Match score: ${score.toFixed(1)}%`);
-        console.log(`  📝 Summary: ${summary.substring(0, 80)}...`);
-        return true;
+        const best = response.data.candidates[0];
+        console.log(`  ✅ Ranked ${matched} applications, best match ${best.score.toFixed(1)}%`);
+        return { matched, skipped, failed };
 
     } catch (error) {
         console.error(`  ❌ Error:`, error.response?.data || error.message);
-        return false;
+        return { matched: 0, skipped, failed: withResume.length };
     }
 }
 
@@ -96,18 +110,20 @@ async function main() {
         let skippedCount = 0;
         let failedCount = 0;
 
+        // Group by job so each job description is ranked against all its applicants at once
+        const byJob = new Map();
         for (const app of applications) {
-            const result = await matchApplication(app);
-            if (result === true) {
-                successCount++;
-            } else if (result === false) {
-                skippedCount++;
-            } else {
-                failedCount++;
+            if (!byJob.has(app.job.id)) {
+                byJob.set(app.job.id, { job: app.job, applications: [] });
             }
+            byJob.get(app.job.id).applications.push(app);
+        }
 
-            // Small delay to avoid overwhelming the AI service
-            await new Promise(resolve => setTimeout(resolve, 500));
+        for (const { job, applications: jobApplications } of byJob.values()) {
+            const result = await matchJob(job, jobApplications);
+            successCount += result.matched;
+            skippedCount += result.skipped;
+            failedCount += result.failed;
         }
 
         console.log('\n' + '='.repeat(50));